@@ -0,0 +1,103 @@
+"""Time to read the file version and thumbnail of large blendfiles.
+
+    python benchmarks/bench_blend_blocks.py --megabytes 200
+
+Writes an uncompressed, a gzip and a zstd blendfile with a thumbnail, a GLOB block and a large data block, then times
+read_blendfile_info on each against reading the whole (decompressed) file. The version fields and the thumbnail come
+before the data, so the time should not grow with --megabytes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import os
+import statistics
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import zstandard
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "source"))
+
+from modules.blendfile_reader import read_blendfile_info
+
+THUMBNAIL_SIZE = 128
+
+
+def bhead(code: bytes, data: bytes) -> bytes:
+    # 8 byte pointers, little endian
+    return struct.pack("<4siQii", code, len(data), 0, 0, 1) + data
+
+
+def make_blendfile(megabytes: int) -> bytes:
+    rgba = os.urandom(THUMBNAIL_SIZE * THUMBNAIL_SIZE * 4)
+    return b"".join(
+        (
+            b"BLENDER-v402",
+            bhead(b"REND", bytes(72)),
+            bhead(b"TEST", struct.pack("<ii", THUMBNAIL_SIZE, THUMBNAIL_SIZE) + rgba),
+            bhead(b"GLOB", b"v402" + struct.pack("<hhh", 65, 402, 0) + bytes(1024)),
+            # Compresses about as well as real data does
+            bhead(b"DATA", os.urandom(megabytes * 1024 * 256) * 4),
+            bhead(b"ENDB", b""),
+        )
+    )
+
+
+def read_whole(pth: Path) -> int:
+    with pth.open("rb") as f:
+        data = f.read(4)
+        f.seek(0)
+        if data.startswith(b"\x1f\x8b"):
+            return len(gzip.GzipFile(fileobj=f).read())
+        if data.startswith(b"\x28\xb5\x2f\xfd"):
+            return len(zstandard.ZstdDecompressor().stream_reader(f).read())
+        return len(f.read())
+
+
+def timed(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    data = make_blendfile(args.megabytes)
+    with tempfile.TemporaryDirectory(prefix="bl-bench-") as tmp:
+        files = {
+            "NONE": data,
+            "GZIP": gzip.compress(data, compresslevel=1),
+            "ZSTD": zstandard.ZstdCompressor().compress(data),
+        }
+
+        print(f"{'compression':<14}{'MiB':>8}{'info ms':>10}{'whole ms':>10}")
+        for name, content in files.items():
+            pth = Path(tmp, f"{name}.blend")
+            pth.write_bytes(content)
+
+            info = read_blendfile_info(pth)
+            if info is None or info.subversion != 65 or info.thumbnail is None:
+                sys.exit(f"Could not read the {name} blendfile: {info}")
+            png = info.thumbnail.to_png()
+            if not png.startswith(b"\x89PNG"):
+                sys.exit(f"Bad thumbnail of the {name} blendfile")
+
+            fast = timed(lambda pth=pth: read_blendfile_info(pth), args.repeat)
+            whole = timed(lambda pth=pth: read_whole(pth), args.repeat)
+            print(f"{name:<14}{len(content) / 2**20:>8.1f}{fast * 1000:>10.2f}{whole * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Time to scan a project folder for the versions its .blend files were saved with.
+
+    python benchmarks/bench_blendfile_scan.py --files 20000
+
+Writes a tree of small uncompressed, gzip and zstd blendfiles to a temporary folder, then scans it: reading every
+header one at a time, reading them in the thread pool, and again with every header cached. Checks that the scans
+agree. Local disks hide most of what the thread pool gains on network shares, where each read waits on a round trip.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+import zstandard
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "source"))
+
+from modules.blendfile_scanner import HeaderCache, scan
+
+VERSIONS = ("279", "283", "293", "306", "401", "402", "403")
+
+
+def make_project(root: Path, count: int, rng: random.Random):
+    compressor = zstandard.ZstdCompressor()
+    for i in range(count):
+        folder = root / f"seq{i % 20:02}" / f"shot{i % 97:03}"
+        folder.mkdir(parents=True, exist_ok=True)
+        version = rng.choice(VERSIONS)
+        data = f"BLENDER-v{version}REND".encode() + rng.randbytes(2048)
+        if version >= "300" and i % 2:
+            data = compressor.compress(data)
+        elif version < "300" and i % 2:
+            data = gzip.compress(data)
+        (folder / f"file{i}.blend").write_bytes(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bl-bench-") as tmp:
+        root = Path(tmp, "project")
+        make_project(root, args.files, random.Random(args.seed))
+        cache_path = Path(tmp, "headers.json")
+
+        serial = scan(root, workers=1)
+        pooled = scan(root, HeaderCache(cache_path), workers=args.workers)
+        cached = scan(root, HeaderCache(cache_path), workers=args.workers)
+
+        if not serial.versions == pooled.versions == cached.versions:
+            sys.exit("The scans disagree")
+        if cached.read != 0:
+            sys.exit(f"{cached.read} headers were read again although no file changed")
+
+        print(f"{'scan':<30}{'seconds':>10}{'read':>8}{'cached':>8}")
+        for name, report in (
+            ("one file at a time", serial),
+            (f"{args.workers} workers", pooled),
+            (f"{args.workers} workers, cached", cached),
+        ):
+            print(f"{name:<30}{report.seconds:>10.3f}{report.read:>8}{report.cached:>8}")
+
+        versions = ", ".join(f"{v.major}.{v.minor}: {len(files)}" for v, files in cached.versions.items())
+        print(f"\n{args.files} files, {os.path.getsize(cache_path) / 1024:.0f} KiB cache. {versions}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Time and peak memory of reading the builder JSON feeds, as the scraper does with archive builds enabled.
+
+    python benchmarks/bench_builder_feed.py --builds 5000
+
+The stand-in server publishes every build for four platforms, so each feed holds 4 * --builds entries.
+Compares the previous approach (json.loads of the whole feed, then up to two passes over it) with the
+streaming decoder, on a response read while it arrives with the HTTP cache off and on, and on the body the
+HTTP cache kept after the server answered 304. Fails if a streamed run peaks at more than twice the memory
+of streaming without the cache, that is if the feed was buffered. Settings live in a temporary folder, see
+bench_network.py.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import lru_cache
+from pathlib import Path
+
+from bench_network import isolate
+from standin_server import Catalog, StandinServer
+
+
+def legacy_scrape(scraper, use_cache: bool):
+    """scrape_automated_releases before the feeds were decoded incrementally"""
+    for branch_type in ("daily/archive", "experimental/archive", "patch/archive"):
+        url = f"https://builder.blender.org/download/{branch_type}/?format=json&v=1"
+        r = scraper.manager.request("GET", url, use_cache=use_cache)
+        if r is None:
+            continue
+
+        data = json.loads(r.data)
+        branch_type = branch_type.replace("/archive", "")
+        architecture_specific_build = False
+        for build in data:
+            if (
+                build["platform"] == scraper.json_platform
+                and build["architecture"].lower() == scraper.architecture.lower()
+                and scraper.b3d_link.match(build["file_name"])
+            ):
+                architecture_specific_build = True
+                yield scraper.new_build_from_dict(build, branch_type, architecture_specific_build)
+
+        if not architecture_specific_build:
+            for build in data:
+                if build["platform"] == scraper.json_platform and scraper.b3d_link.match(build["file_name"]):
+                    yield scraper.new_build_from_dict(build, branch_type, architecture_specific_build)
+
+
+def measure(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--builds", type=int, default=2500, help="Builds per branch feed")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory(prefix="bl-bench-")
+    isolate(Path(tmp.name))
+
+    from modules.connection_manager import ConnectionManager
+    from modules.settings import (
+        set_show_daily_archive_builds,
+        set_show_experimental_archive_builds,
+        set_show_patch_archive_builds,
+        set_use_http_cache,
+    )
+    from PyQt5.QtCore import QCoreApplication
+    from semver import Version
+    from threads.scraper import Scraper
+
+    app = QCoreApplication(sys.argv)  # noqa: F841 -- ConnectionManager owns a QTimer
+
+    set_show_daily_archive_builds(True)
+    set_show_experimental_archive_builds(True)
+    set_show_patch_archive_builds(True)
+
+    server = StandinServer(catalog=Catalog(builds=args.builds)).start()
+    # Generated once up front, so the server side does not show up in the measured allocations
+    server.generator.builder_feed = lru_cache(maxsize=None)(server.generator.builder_feed)
+    feed_size = sum(len(server.generator.builder_feed(branch)) for branch in server.generator.catalog.branches)
+
+    cm = ConnectionManager(Version(0, 0, 0))
+    cm.setup()
+    cm.origin_overrides = server.origin_overrides()
+    scraper = Scraper(None, cm)
+
+    def streaming():
+        scraper.use_cache = False
+        return list(scraper.scrape_automated_releases())
+
+    def revalidated():
+        scraper.use_cache = True
+        return list(scraper.scrape_automated_releases())
+
+    def legacy():
+        return list(legacy_scrape(scraper, use_cache=False))
+
+    # (reader, whether the HTTP cache is enabled, run, whether it streams)
+    runs = (
+        ("json.loads, two passes", False, legacy, False),
+        ("streamed", False, streaming, True),
+        ("streamed into HTTP cache", True, streaming, True),
+        ("streamed from HTTP cache", True, revalidated, True),
+    )
+
+    print(f"{'reader':<26}{'seconds':>10}{'peak MiB':>10}{'builds':>8}")
+    reference = None
+    streamed_peak = None
+    for name, use_http_cache, fn, streams in runs:
+        set_use_http_cache(use_http_cache)
+        cm.reconfigure()
+        builds, seconds, peak = measure(fn, args.repeat)
+        print(f"{name:<26}{seconds:>10.4f}{peak / 1024**2:>10.2f}{len(builds):>8}")
+        links = [build.link for build in builds]
+        if reference is None:
+            reference = links
+        elif links != reference:
+            sys.exit(f"{name} found different builds than the previous approach")
+        if streams:
+            if streamed_peak is None:
+                streamed_peak = peak
+            elif peak > 2 * streamed_peak:
+                sys.exit(f"{name} peaked at {peak / streamed_peak:.1f}x the memory of streaming, the feed was buffered")
+
+    server.stop()
+    print(f"\n{args.builds * 4} entries per feed, {feed_size / 1024**2:.1f} MiB over three feeds")
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
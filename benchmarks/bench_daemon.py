@@ -0,0 +1,159 @@
+"""How quickly the daemon answers compared to reading the library in every process.
+
+    python benchmarks/bench_daemon.py --builds 300 --runs 10
+
+Creates a temporary library of fake builds and starts `main.py --offline daemon` on it. Reports:
+  - the round trip of `list` and `launch` requests, sent from this process
+  - the wall time of `launch --cli` in fresh processes, with the daemon and without it
+Exits with an error if the median `launch` request exceeds --budget milliseconds, or if `launch --cli` is not faster
+with the daemon than without it. Settings and caches live in the temporary folder. Linux and macOS only, the fake
+builds are shell scripts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPOSITORY = Path(__file__).parent.parent
+VERSION = "2.3.0-rc.1"
+
+EXECUTABLES = {
+    "linux": "blender",
+    "darwin": "Blender/Blender.app/Contents/MacOS/Blender",
+}
+
+
+def make_library(root: Path, count: int) -> Path:
+    library = root / "library"
+    for folder in ("stable", "daily", "experimental", "custom"):
+        (library / folder).mkdir(parents=True)
+
+    for i in range(count):
+        version = f"4.{i % 5}.{i // 5}"
+        build = library / "daily" / f"blender-{version}-fake"
+        exe = build / EXECUTABLES[sys.platform]
+        exe.parent.mkdir(parents=True)
+        exe.write_text("#!/bin/sh\nexit 0\n")
+        exe.chmod(0o755)
+
+        blinfo = {
+            "subversion": version,
+            "build_hash": f"{i:012x}",
+            "commit_time": f"2024-07-16T10:{i % 60:02}:00+00:00",
+            "branch": "daily",
+            "custom_name": "",
+            "is_favorite": False,
+            "custom_executable": None,
+        }
+        (build / ".blinfo").write_text(json.dumps({"file_version": "1.3", "blinfo": [blinfo]}))
+    return library
+
+
+def environment(root: Path) -> dict[str, str]:
+    env = dict(os.environ)
+    # HOME covers macOS, where the config folder is not configurable
+    for var in ("HOME", "XDG_CONFIG_HOME", "XDG_CACHE_HOME"):
+        env[var] = str(root)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+def timed_run(cmd: list[str], env: dict[str, str]) -> float:
+    started = time.perf_counter()
+    result = subprocess.run(cmd, env=env, cwd=REPOSITORY, capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        sys.exit(f"{' '.join(cmd)} failed:\n{result.stdout}\n{result.stderr}")
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--builds", type=int, default=300)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=50, help="Milliseconds the median launch request may take")
+    args = parser.parse_args()
+
+    if sys.platform not in EXECUTABLES:
+        sys.exit(f"Not supported on {sys.platform}")
+    if (REPOSITORY / "Blender Launcher.ini").exists():
+        sys.exit("A portable Blender Launcher.ini exists in the repository root, its library would be used")
+
+    tmp = tempfile.TemporaryDirectory(prefix="bl-bench-")
+    root = Path(tmp.name)
+    library = make_library(root, args.builds)
+    env = environment(root)
+
+    config = Path(root, "Library/Application Support" if sys.platform == "darwin" else "", "Blender Launcher")
+    config.mkdir(parents=True, exist_ok=True)
+    (config / "Blender Launcher.ini").write_text(f"[General]\nlibrary_folder={library.as_posix()}\nlaunch_timer=0\n")
+
+    # The client reads the socket location from the environment, like the processes started below
+    os.environ.update(env)
+    sys.path.insert(0, str(REPOSITORY / "source"))
+    from modules import instance_protocol as ipc
+    from modules.daemon_client import send_to_daemon
+
+    launch = [sys.executable, "source/main.py", "launch", "--cli", "-v", "4.2.^"]
+    without = [timed_run(launch, env) for _ in range(args.runs)]
+
+    daemon = subprocess.Popen(
+        [sys.executable, "source/main.py", "--offline", "daemon"],
+        env=env,
+        cwd=REPOSITORY,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            status = send_to_daemon(ipc.request(ipc.STATUS, VERSION))
+            if status is not None and status.get("library_read"):
+                break
+            if time.monotonic() > deadline or daemon.poll() is not None:
+                sys.exit("The daemon did not start")
+            time.sleep(0.1)
+        print(f"Daemon read {status['builds']} builds")
+
+        def request(command: str, **fields) -> float:
+            started = time.perf_counter()
+            answer = send_to_daemon(ipc.request(command, VERSION, **fields))
+            elapsed = time.perf_counter() - started
+            assert answer is not None and answer["status"] == ipc.OK, answer
+            return elapsed
+
+        listing = [request(ipc.LIST) for _ in range(args.runs)]
+        resolving = [request(ipc.LAUNCH, version="4.2.^") for _ in range(args.runs)]
+        with_daemon = [timed_run(launch, env) for _ in range(args.runs)]
+    finally:
+        daemon.terminate()
+        daemon.wait()
+        tmp.cleanup()
+
+    print(f"\n{'':<28}{'median':>10}{'min':>10}{'max':>10}")
+    for name, times in (
+        ("list request", listing),
+        ("launch request", resolving),
+        ("launch --cli, no daemon", without),
+        ("launch --cli, daemon", with_daemon),
+    ):
+        ms = [t * 1000 for t in times]
+        print(f"{name:<28}{statistics.median(ms):>9.1f}ms{min(ms):>8.1f}ms{max(ms):>8.1f}ms")
+
+    median = statistics.median(resolving) * 1000
+    if median > args.budget:
+        sys.exit(f"\nThe daemon took {median:.1f} ms to answer, over the budget of {args.budget:.0f} ms")
+    if statistics.median(with_daemon) >= statistics.median(without):
+        sys.exit("\nlaunch --cli is not faster with the daemon than without it")
+    print(f"\nWithin the budget of {args.budget:.0f} ms, launch --cli is faster with the daemon")
+
+
+if __name__ == "__main__":
+    main()
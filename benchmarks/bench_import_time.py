@@ -0,0 +1,102 @@
+"""Cold-start import time of the launcher, from -X importtime.
+
+    python benchmarks/bench_import_time.py --module windows.main_window --budget 350
+
+Imports --module in fresh interpreters and reports the median cumulative import time and the modules that
+cost the most on their own. Exits with an error if the median exceeds --budget milliseconds, or if one of the
+modules that are supposed to load on first use (see DEFERRED) was imported on the way.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+REPOSITORY = Path(__file__).parent.parent
+
+# Only needed by some features, imported through modules.lazy or inside the functions that use them
+DEFERRED = (
+    "pynput",
+    "zstandard",
+    "distro",
+    "send2trash",
+    "webbrowser",
+    "concurrent.futures.process",
+    "bs4",
+    "lxml",
+    "threads.deduplicator",
+)
+
+# The budget the deferred imports set out to meet. windows.main_window took 578 ms before they were deferred
+BUDGET = 350
+
+
+def import_times(module: str, env: dict[str, str]) -> dict[str, tuple[int, int]]:
+    """{module: (self, cumulative)} in microseconds, for everything imported by `import module`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        cwd=REPOSITORY,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        sys.exit(f"Importing {module} failed:\n{result.stderr}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="windows.main_window", help="Module to import, relative to source/")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget", type=float, default=BUDGET, help="Milliseconds the median import may take")
+    parser.add_argument("--top", type=int, default=15, help="How many of the most expensive modules to list")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory(prefix="bl-bench-")
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(REPOSITORY / "source")
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    for var in ("XDG_CONFIG_HOME", "XDG_CACHE_HOME", "LOCALAPPDATA"):
+        env[var] = tmp.name
+
+    # The first run also writes bytecode, it is not measured
+    import_times(args.module, env)
+    runs = [import_times(args.module, env) for _ in range(args.runs)]
+    tmp.cleanup()
+
+    totals = [times[args.module][1] / 1000 for times in runs]
+    median = statistics.median(totals)
+    last = runs[-1]
+
+    print(f"{'module':<48}{'self ms':>10}{'cumul. ms':>10}")
+    for name, (own, cumulative) in sorted(last.items(), key=lambda item: item[1][0], reverse=True)[: args.top]:
+        print(f"{name:<48}{own / 1000:>10.1f}{cumulative / 1000:>10.1f}")
+    print(f"\nimport {args.module}: median {median:.1f} ms, min {min(totals):.1f} ms over {args.runs} runs")
+
+    failures = []
+    eager = sorted(name for name in last if name.split(".")[0] in DEFERRED or name in DEFERRED)
+    if eager:
+        failures.append(f"Imported eagerly: {', '.join(eager)}")
+    if median > args.budget:
+        failures.append(f"Import took {median:.1f} ms, over the budget of {args.budget:.0f} ms")
+    if failures:
+        sys.exit("\n".join(failures))
+    print(f"Within the budget of {args.budget:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Parse time and peak memory of the index listing parsers.
+
+    python benchmarks/bench_index_parser.py --entries 5000
+
+Compares the streaming parser in modules.index_parser with the BeautifulSoup fallback on a generated release
+listing and on a builder style page with build-var spans, and checks that both agree.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+
+from standin_server import EPOCH, index_page
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "source"))
+
+from modules.index_parser import iter_index_links, parse_index_links_bs4
+
+
+def release_listing(entries: int) -> bytes:
+    return index_page(
+        "/release/Blender4.2/",
+        [(f"blender-4.2.{i}-linux-x64.tar.xz", EPOCH - timedelta(hours=i), 300_000_000 + i) for i in range(entries)],
+    )
+
+
+def builder_listing(entries: int) -> bytes:
+    rows = [
+        f'<li><a href="blender-4.3.0-alpha+main.{i:012x}-linux.x86_64-release.tar.xz">download</a>'
+        f'<div><span class="build-var">Alpha</span> <span class="date">{EPOCH - timedelta(hours=i):%d-%b-%Y %H:%M}</span>'
+        "</div></li>"
+        for i in range(entries)
+    ]
+    return ("<html><body><ul>" + "\n".join(rows) + "</ul></body></html>").encode()
+
+
+def measure(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=2000, help="Links per generated page")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024, help="Bytes fed to the streaming parser at once")
+    args = parser.parse_args()
+
+    pages = {
+        "release listing": (release_listing(args.entries), False),
+        "builder listing": (builder_listing(args.entries), True),
+    }
+
+    print(f"{'page':<18}{'parser':<14}{'seconds':>10}{'peak MiB':>10}")
+    for name, (content, build_vars) in pages.items():
+
+        def streaming(content=content, build_vars=build_vars):
+            chunks = (content[i : i + args.chunk_size] for i in range(0, len(content), args.chunk_size))
+            return list(iter_index_links(chunks, build_vars))
+
+        def soup(content=content, build_vars=build_vars):
+            return parse_index_links_bs4(content, build_vars)
+
+        fast, fast_time, fast_peak = measure(streaming, args.repeat)
+        slow, slow_time, slow_peak = measure(soup, args.repeat)
+
+        print(f"{name:<18}{'streaming':<14}{fast_time:>10.4f}{fast_peak / 1024**2:>10.2f}")
+        print(f"{name:<18}{'BeautifulSoup':<14}{slow_time:>10.4f}{slow_peak / 1024**2:>10.2f}")
+        if fast != slow:
+            sys.exit(f"The parsers disagree on the {name}")
+
+    print(f"\n{args.entries} links per page, {len(pages['release listing'][0]) / 1024:.0f} KiB release listing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""How long the launching window takes to update its list when the query changes.
+
+    python benchmarks/bench_launching_search.py --builds 5000
+
+Opens a LaunchingWindow on a synthetic library, off screen, and times each step of a typing session: filling the
+query boxes and searching the list, as if the edits were finished. Reports the time to fill the list too. Exits
+with an error if the slowest step exceeds --budget milliseconds. Settings live in a temporary folder.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+tmp = tempfile.TemporaryDirectory(prefix="bl-bench-")
+# HOME covers macOS, where the config folder is not configurable
+for var in ("HOME", "XDG_CONFIG_HOME", "XDG_CACHE_HOME"):
+    os.environ[var] = tmp.name
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "source"))
+
+from modules.build_info import BuildInfo  # noqa: E402
+from modules.settings import set_launch_timer_duration  # noqa: E402
+from modules.version_matcher import VersionSearchQuery  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+BRANCHES = ("stable", "lts", "daily", "experimental")
+EPOCH = datetime(2024, 7, 16, tzinfo=timezone.utc)
+
+# Someone narrowing the list down and widening it again
+SESSION = (
+    "*.*.*@*",
+    "4.*.*@*",
+    "4.2.*@*",
+    "4.2.^@*",
+    "4.2.^",
+    "4.2.*@^",
+    "4.*.*@*",
+    "*.*.*@*",
+    "^.^.^",
+    "*.*.*-daily@*",
+    "*.*.*-daily@-",
+    "3.*.*@*",
+)
+
+
+def make_builds(count: int, rng: random.Random) -> list[BuildInfo]:
+    builds = []
+    for i in range(count):
+        branch = rng.choice(BRANCHES)
+        version = f"{rng.randint(2, 4)}.{rng.randint(0, 6)}.{rng.randint(0, 20)}"
+        builds.append(
+            BuildInfo(
+                f"{tmp.name}/library/{branch}/blender-{version}-{i}",
+                version,
+                f"{rng.getrandbits(48):012x}",
+                EPOCH - timedelta(hours=i),
+                branch,
+            )
+        )
+    return builds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--builds", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3, help="Times to run through the typing session")
+    parser.add_argument("--budget", type=float, default=50, help="Milliseconds the slowest step may take")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    builds = make_builds(args.builds, random.Random(args.seed))
+    # A single match would launch it
+    set_launch_timer_duration(-1)
+
+    app = QApplication([])
+    from windows.launching_window import LaunchingWindow
+
+    started = time.perf_counter()
+    window = LaunchingWindow(app, VersionSearchQuery.parse("*.*.*@*"), builds=builds, exit_on_launch=False)
+    opened = time.perf_counter() - started
+
+    steps: dict[str, list[float]] = {query: [] for query in SESSION}
+    for _ in range(args.rounds):
+        for query in SESSION:
+            started = time.perf_counter()
+            window.update_query_boxes(VersionSearchQuery.parse(query))
+            window.update_query_from_edits()
+            app.processEvents()
+            steps[query].append(time.perf_counter() - started)
+
+    window.close()
+    tmp.cleanup()
+
+    print(f"Opening the window with {args.builds} builds: {opened * 1000:.1f} ms\n")
+    print(f"{'query':<18}{'median ms':>10}{'max ms':>10}")
+    for query, times in steps.items():
+        print(f"{query:<18}{statistics.median(times) * 1000:>10.1f}{max(times) * 1000:>10.1f}")
+
+    slowest = max(max(times) for times in steps.values()) * 1000
+    if slowest > args.budget:
+        sys.exit(f"\nThe slowest step took {slowest:.1f} ms, over the budget of {args.budget:.0f} ms")
+    print(f"\nWithin the budget of {args.budget:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""End-to-end timings of scraping and installing builds against the local stand-in server.
+
+    python benchmarks/bench_network.py --latency 0.05 --bandwidth 5000000 --failure-rate 0.05
+
+Runs a cold scrape (HTTP cache bypassed, like Force Check), a warm scrape, and downloads and extracts one
+build. Settings, caches and the library live in a temporary folder, so the real configuration is left alone
+on Windows and Linux. A portable "Blender Launcher.ini" in the repository root would take precedence, so the
+benchmark refuses to run next to one.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from standin_server import Catalog, Faults, StandinServer
+
+REPOSITORY = Path(__file__).parent.parent
+
+
+def isolate(root: Path):
+    """Points settings and caches at `root`. Has to run before anything from the launcher is imported"""
+    if (REPOSITORY / "Blender Launcher.ini").exists():
+        sys.exit("A portable Blender Launcher.ini exists in the repository root, refusing to overwrite its settings")
+
+    for var in ("XDG_CONFIG_HOME", "XDG_CACHE_HOME", "LOCALAPPDATA"):
+        os.environ[var] = str(root)
+    # Resources are looked up relative to the working directory when running from source
+    os.chdir(REPOSITORY)
+    sys.path.insert(0, str(REPOSITORY / "source"))
+
+
+def timed(label: str, results: list[tuple[str, float, str]], fn):
+    started = time.perf_counter()
+    detail = fn()
+    results.append((label, time.perf_counter() - started, detail))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each answer")
+    parser.add_argument("--bandwidth", type=int, default=None, help="Bytes per second for response bodies")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-mode", choices=("status", "reset", "truncate"), default="status")
+    parser.add_argument("--stable-releases", type=int, default=6)
+    parser.add_argument("--builds", type=int, default=20, help="Builds per builder branch")
+    parser.add_argument("--archive-size", type=int, default=4 * 1024 * 1024)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory(prefix="bl-bench-")
+    root = Path(tmp.name)
+    isolate(root)
+
+    from modules.connection_manager import ConnectionManager
+    from modules.settings import (
+        set_library_folder,
+        set_scrape_automated_builds,
+        set_scrape_stable_builds,
+        set_show_daily_archive_builds,
+        set_show_experimental_archive_builds,
+        set_show_patch_archive_builds,
+    )
+    from PyQt5.QtCore import QCoreApplication
+    from semver import Version
+    from threads.downloader import DownloadTask
+    from threads.extractor import ExtractTask
+    from threads.scraper import Scraper
+
+    app = QCoreApplication(sys.argv)  # noqa: F841 -- ConnectionManager owns a QTimer
+
+    library = root / "library"
+    library.mkdir()
+    set_library_folder(str(library))
+    set_scrape_stable_builds(True)
+    set_scrape_automated_builds(True)
+    set_show_daily_archive_builds(False)
+    set_show_experimental_archive_builds(False)
+    set_show_patch_archive_builds(False)
+
+    faults = Faults(args.latency, args.bandwidth, args.failure_rate, args.failure_mode)
+    catalog = Catalog(stable_releases=args.stable_releases, builds=args.builds, archive_size=args.archive_size)
+    server = StandinServer(faults, catalog).start()
+    server.generator.warm()
+
+    cm = ConnectionManager(Version(0, 0, 0))
+    cm.setup()
+    cm.origin_overrides = server.origin_overrides()
+
+    results: list[tuple[str, float, str]] = []
+    builds = []
+
+    def scrape(use_cache: bool):
+        builds.clear()
+        scraper = Scraper(None, cm)
+        scraper.use_cache = use_cache
+        scraper.links.connect(builds.append)
+        scraper.run()
+        return f"{len(builds)} builds"
+
+    timed("scrape (cold)", results, lambda: scrape(use_cache=False))
+    # The stable folder cache from the first run makes the second one skip unchanged folders
+    timed("scrape (warm)", results, lambda: scrape(use_cache=True))
+
+    downloaded: list[Path] = []
+    extracted: list[Path] = []
+
+    def download():
+        if not builds:
+            return "nothing to download"
+        task = DownloadTask(cm, builds[0].link, checksum=builds[0].checksum)
+        task.finished.connect(downloaded.append)
+        task.run()
+        return f"{downloaded[0].stat().st_size / 1024**2:.1f} MiB" if downloaded else "failed"
+
+    def extract():
+        if not downloaded:
+            return "nothing to extract"
+        task = ExtractTask(downloaded[0], library)
+        task.finished.connect(extracted.append)
+        task.run()
+        return str(extracted[0].name) if extracted else "failed"
+
+    timed("download", results, download)
+    timed("extract", results, extract)
+
+    server.stop()
+
+    print(f"\nStand-in: {faults}")
+    print(f"{'step':<16}{'seconds':>10}  detail")
+    for label, seconds, detail in results:
+        print(f"{label:<16}{seconds:>10.3f}  {detail}")
+    print(f"{'install':<16}{sum(s for label, s, _ in results if label in ('download', 'extract')):>10.3f}")
+    print(f"\n{server.requests} requests served")
+    for line in cm.metrics.summary():
+        print(line)
+
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Startup time of `launch --cli`, which has to stay clear of Qt.
+
+    python benchmarks/bench_startup.py --runs 10 --budget 0.3
+
+Launches a fake Blender build from a temporary library through source/main.py, several times in fresh
+processes, and reports the median wall time next to the time it takes just to import PyQt5.QtWidgets. Exits
+with an error if the median exceeds --budget seconds, or if any PyQt5 module was imported on the way, as
+reported by -X importtime. Settings and caches live in the temporary folder. Linux and macOS only, the fake
+build is a shell script.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPOSITORY = Path(__file__).parent.parent
+
+EXECUTABLES = {
+    "linux": "blender",
+    "darwin": "Blender/Blender.app/Contents/MacOS/Blender",
+}
+
+
+def make_library(root: Path) -> Path:
+    library = root / "library"
+    build = library / "stable" / "blender-4.2.0-fake"
+    exe = build / EXECUTABLES[sys.platform]
+    exe.parent.mkdir(parents=True)
+    exe.write_text("#!/bin/sh\nexit 0\n")
+    exe.chmod(0o755)
+
+    blinfo = {
+        "subversion": "4.2.0",
+        "build_hash": "0123456789ab",
+        "commit_time": "2024-07-16T10:20:00+00:00",
+        "branch": "stable",
+        "custom_name": "",
+        "is_favorite": False,
+        "custom_executable": None,
+    }
+    (build / ".blinfo").write_text(json.dumps({"file_version": "1.3", "blinfo": [blinfo]}))
+    for folder in ("daily", "experimental", "custom"):
+        (library / folder).mkdir()
+    return library
+
+
+def environment(root: Path) -> dict[str, str]:
+    env = dict(os.environ)
+    # HOME covers macOS, where the config folder is not configurable
+    for var in ("HOME", "XDG_CONFIG_HOME", "XDG_CACHE_HOME"):
+        env[var] = str(root)
+    return env
+
+
+def timed_run(cmd: list[str], env: dict[str, str]) -> tuple[float, subprocess.CompletedProcess]:
+    started = time.perf_counter()
+    result = subprocess.run(cmd, env=env, cwd=REPOSITORY, capture_output=True, text=True, check=False)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=0.3, help="Seconds the median CLI launch may take")
+    args = parser.parse_args()
+
+    if sys.platform not in EXECUTABLES:
+        sys.exit(f"Not supported on {sys.platform}")
+    if (REPOSITORY / "Blender Launcher.ini").exists():
+        sys.exit("A portable Blender Launcher.ini exists in the repository root, its library would be used")
+
+    tmp = tempfile.TemporaryDirectory(prefix="bl-bench-")
+    root = Path(tmp.name)
+    library = make_library(root)
+    env = environment(root)
+
+    config = Path(root, "Library/Application Support" if sys.platform == "darwin" else "", "Blender Launcher")
+    config.mkdir(parents=True, exist_ok=True)
+    (config / "Blender Launcher.ini").write_text(f"[General]\nlibrary_folder={library.as_posix()}\n")
+    (root / "Blender Launcher").mkdir(exist_ok=True)
+
+    launch = [sys.executable, "source/main.py", "launch", "--cli", "-v", "4.2.^"]
+
+    # Also a warm up, so the first measured run does not pay for writing bytecode
+    _, result = timed_run([sys.executable, "-X", "importtime", *launch[1:]], env)
+    if result.returncode != 0:
+        sys.exit(f"The CLI launch failed:\n{result.stdout}\n{result.stderr}")
+    qt_modules = sorted({line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines() if "PyQt5" in line})
+
+    cli = [timed_run(launch, env)[0] for _ in range(args.runs)]
+    qt = [timed_run([sys.executable, "-c", "import PyQt5.QtWidgets"], env)[0] for _ in range(args.runs)]
+    tmp.cleanup()
+
+    median = statistics.median(cli)
+    print(f"{'command':<26}{'median':>10}{'min':>10}{'max':>10}")
+    print(f"{'launch --cli':<26}{median:>10.3f}{min(cli):>10.3f}{max(cli):>10.3f}")
+    print(f"{'import PyQt5.QtWidgets':<26}{statistics.median(qt):>10.3f}{min(qt):>10.3f}{max(qt):>10.3f}")
+
+    failures = []
+    if qt_modules:
+        failures.append(f"launch --cli imported {', '.join(qt_modules)}")
+    if median > args.budget:
+        failures.append(f"launch --cli took {median:.3f}s, over the budget of {args.budget:.3f}s")
+    if failures:
+        sys.exit("\n".join(failures))
+    print(f"\nWithin the budget of {args.budget:.3f}s, without loading Qt")
+
+
+if __name__ == "__main__":
+    main()
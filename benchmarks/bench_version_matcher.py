@@ -0,0 +1,130 @@
+"""Query time of BInfoMatcher on a large synthetic library.
+
+    python benchmarks/bench_version_matcher.py --builds 10000
+
+Times the indexed matcher against the full scans it replaced, once with the index built and once including the
+time to build it, and checks that both find the same builds for a few thousand random queries.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from operator import attrgetter
+from pathlib import Path
+
+from semver import Version
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "source"))
+
+from modules.version_matcher import BasicBuildInfo, BInfoMatcher, VersionSearchQuery
+
+BRANCHES = ("stable", "lts", "daily", "experimental")
+PLACES = ("^", "-", "*")
+EPOCH = datetime(2024, 7, 16, tzinfo=timezone.utc)
+
+
+def scan_match(versions: tuple[BasicBuildInfo, ...], s: VersionSearchQuery) -> tuple[BasicBuildInfo, ...]:
+    """BInfoMatcher.match before the index"""
+    for place in ("build_hash", "major", "minor", "patch", "branch", "commit_time"):
+        getter = attrgetter(place)
+        p = getter(s)
+        if p == "^":
+            max_p = max(getter(v) for v in versions)
+            versions = [v for v in versions if getter(v) == max_p]
+        elif p == "*" or p is None:
+            continue
+        elif p == "-":
+            min_p = min(getter(v) for v in versions)
+            versions = [v for v in versions if getter(v) == min_p]
+        else:
+            versions = [v for v in versions if getter(v) == p]
+
+        if not versions:
+            return ()
+
+    return tuple(versions)
+
+
+def make_builds(count: int, rng: random.Random) -> tuple[BasicBuildInfo, ...]:
+    builds = []
+    for _ in range(count):
+        branch = rng.choice(BRANCHES)
+        builds.append(
+            BasicBuildInfo(
+                Version(rng.randint(2, 4), rng.randint(0, 6), rng.randint(0, 20)),
+                branch,
+                "" if branch in ("stable", "lts") else f"{rng.getrandbits(48):012x}",
+                # Some builds share a commit time
+                EPOCH - timedelta(hours=rng.randint(0, count // 2)),
+            )
+        )
+    return tuple(builds)
+
+
+def random_queries(builds: tuple[BasicBuildInfo, ...], count: int, rng: random.Random) -> list[VersionSearchQuery]:
+    queries = []
+    for _ in range(count):
+        build = rng.choice(builds)
+        major, minor, patch = (rng.choice((*PLACES, n)) for n in (build.major, build.minor, build.patch))
+        queries.append(
+            VersionSearchQuery(
+                major,
+                minor,
+                patch,
+                branch=rng.choice((None, "*", build.branch, "nightly")),
+                build_hash=rng.choice((None, None, None, build.build_hash)),
+                commit_time=rng.choice((*PLACES, build.commit_time)),
+            )
+        )
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--builds", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=2000, help="Random queries to compare the matchers on")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    builds = make_builds(args.builds, rng)
+    queries = random_queries(builds, args.queries, rng)
+
+    matcher = BInfoMatcher(builds)
+    for query in queries:
+        if matcher.match(query) != scan_match(builds, query):
+            sys.exit(f"The matchers disagree on {query}")
+    print(f"The matchers agree on {len(queries)} random queries\n")
+
+    common = [
+        VersionSearchQuery.parse(s) for s in ("^.^.^", "4.2.^", "^.*.*-daily@^", "-.*.^", "*.*.*@*", "3.*.*-lts@-")
+    ]
+
+    print(f"{'query':<18}{'scan ms':>10}{'index ms':>10}{'+ build ms':>12}")
+    for query in common:
+        repeat = 20
+        started = time.perf_counter()
+        for _ in range(repeat):
+            scan_match(builds, query)
+        scan = (time.perf_counter() - started) / repeat
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            matcher.match(query)
+        indexed = (time.perf_counter() - started) / repeat
+
+        started = time.perf_counter()
+        BInfoMatcher(builds).match(query)
+        cold = time.perf_counter() - started
+
+        print(f"{query!s:<18}{scan * 1000:>10.3f}{indexed * 1000:>10.3f}{cold * 1000:>12.3f}")
+
+    print(f"\n{args.builds} builds")
+
+
+if __name__ == "__main__":
+    main()
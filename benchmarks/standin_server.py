@@ -0,0 +1,502 @@
+"""A local stand-in for blender.org and GitHub, for benchmarking and testing network code offline.
+
+It serves Apache-style release index pages, builder JSON feeds, the GitHub endpoints the launcher uses and
+synthetic archives, with configurable latency, bandwidth and failures. Every host is served under its own
+path prefix, e.g. http://127.0.0.1:<port>/builder.blender.org/download/daily/?format=json&v=1
+
+    with StandinServer(Faults(latency=0.05)) as server:
+        connection_manager.origin_overrides = server.origin_overrides()
+        ...
+
+Recorded responses can be served instead of the generated ones by passing a directory laid out as
+<host>/<path>, where index pages are stored as index.html and query strings are ignored.
+"""
+
+from __future__ import annotations
+
+import base64
+import contextlib
+import hashlib
+import io
+import json
+import random
+import re
+import socket
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+API_FOLDER = Path(__file__).parent.parent / "source" / "resources" / "api"
+
+HOSTS = (
+    "download.blender.org",
+    "builder.blender.org",
+    "cdn.builder.blender.org",
+    "api.github.com",
+    "github.com",
+)
+
+REPO = "Victor-IX/Blender-Launcher-V2"
+
+# Every generated document claims to be this old, so conditional requests get stable answers
+EPOCH = datetime(2024, 7, 16, 10, 20, tzinfo=timezone.utc)
+
+# (platform, architecture, suffix) of the archives published for every build
+PLATFORMS = (
+    ("linux", "x64", ".tar.xz"),
+    ("windows", "x64", ".zip"),
+    ("macos", "arm64", ".dmg"),
+    ("macos", "x64", ".dmg"),
+)
+
+BUILDER_PLATFORMS = {"linux": "linux", "windows": "windows", "macos": "darwin"}
+BUILDER_ARCHITECTURES = {"x64": "x86_64", "arm64": "arm64"}
+
+
+def current_platform() -> str:
+    if sys.platform == "win32":
+        return "windows"
+    if sys.platform == "darwin":
+        return "macos"
+    return "linux"
+
+
+@dataclass
+class Faults:
+    """What can go wrong, and how slowly things go right
+
+    latency -- seconds to wait before answering
+    bandwidth -- bytes per second for response bodies, unlimited when None
+    failure_rate -- fraction of requests that fail
+    failure_mode -- "status" answers 503, "reset" drops the connection, "truncate" cuts the body short
+    retry_after -- Retry-After value sent with 503 answers
+    seed -- makes the sequence of failures reproducible
+    """
+
+    latency: float = 0.0
+    bandwidth: int | None = None
+    failure_rate: float = 0.0
+    failure_mode: str = "status"
+    retry_after: int | None = None
+    seed: int = 0
+
+
+@dataclass
+class Catalog:
+    """Shape of the generated data
+
+    stable_releases -- release folders, counting down minor versions from 4.2
+    patches -- patch releases per folder
+    builds -- builds per builder branch
+    archive_size -- uncompressed size of each synthetic archive
+    archive_members -- files inside each synthetic archive
+    """
+
+    stable_releases: int = 6
+    patches: int = 2
+    builds: int = 20
+    archive_size: int = 4 * 1024 * 1024
+    archive_members: int = 64
+    launcher_version: str = "2.3.0"
+    branches: tuple[str, ...] = ("daily", "experimental", "patch")
+    # Only archives of this platform are generated for checksum manifests, the others get placeholder hashes
+    platform: str = field(default_factory=current_platform)
+    seed: int = 0
+
+    def stable_versions(self) -> list[tuple[int, int]]:
+        versions = []
+        major, minor = 4, 2
+        for _ in range(self.stable_releases):
+            versions.append((major, minor))
+            if minor == 0:
+                major, minor = major - 1, 6
+            else:
+                minor -= 1
+        return versions
+
+
+def http_date(dt: datetime) -> str:
+    return format_datetime(dt, usegmt=True)
+
+
+def index_page(path: str, entries: list[tuple[str, datetime, int | None]]) -> bytes:
+    """An Apache/nginx style autoindex listing of (name, modified date, size) entries"""
+    lines = [
+        f"<html><head><title>Index of {path}</title></head><body>",
+        f'<h1>Index of {path}</h1><hr><pre><a href="../">../</a>',
+    ]
+    for name, modified, size in entries:
+        padding = " " * max(51 - len(name), 1)
+        size_column = "-" if size is None else str(size)
+        lines.append(f'<a href="{name}">{name}</a>{padding}{modified:%d-%b-%Y %H:%M}{size_column:>20}')
+    lines.append("</pre><hr></body></html>")
+    return "\n".join(lines).encode()
+
+
+class Generator:
+    """Produces the documents of every host the launcher talks to"""
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self.archive = lru_cache(maxsize=None)(self._archive)
+
+    def _archive(self, name: str) -> bytes:
+        """A reproducible archive that unpacks to a folder named after the file"""
+        rng = random.Random(f"{self.catalog.seed}-{name}")
+        folder = name.removesuffix(".tar.xz").removesuffix(".zip").removesuffix(".dmg")
+        member_size = self.catalog.archive_size // self.catalog.archive_members
+        # Partially repetitive content, so compression does some work without taking forever
+        members = [
+            (f"{folder}/lib/file_{i:04}.bin", rng.randbytes(max(member_size // 4, 1)) * 4)
+            for i in range(self.catalog.archive_members)
+        ]
+
+        buffer = io.BytesIO()
+        if name.endswith(".zip"):
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+                for member, data in members:
+                    zf.writestr(member, data)
+        elif name.endswith(".tar.xz"):
+            with tarfile.open(fileobj=buffer, mode="w:xz", preset=0) as tar:
+                for member, data in members:
+                    info = tarfile.TarInfo(member)
+                    info.size = len(data)
+                    info.mtime = int(EPOCH.timestamp())
+                    tar.addfile(info, io.BytesIO(data))
+        else:
+            for _, data in members:
+                buffer.write(data)
+        return buffer.getvalue()
+
+    def warm(self):
+        """Generates the archives that checksum manifests refer to, so it doesn't count towards timings"""
+        for major, minor in self.catalog.stable_versions():
+            for name in self.release_files(major, minor):
+                if name.endswith(".sha256"):
+                    self.manifest(name)
+
+    def release_index(self) -> bytes:
+        entries = [
+            (f"Blender{major}.{minor}/", EPOCH - timedelta(days=30 * i), None)
+            for i, (major, minor) in enumerate(self.catalog.stable_versions())
+        ]
+        return index_page("/release/", sorted(entries))
+
+    def release_files(self, major: int, minor: int) -> list[str]:
+        files = []
+        for patch in range(self.catalog.patches):
+            version = f"{major}.{minor}.{patch}"
+            files.extend(f"blender-{version}-{platform}-{arch}{suffix}" for platform, arch, suffix in PLATFORMS)
+            files.append(f"blender-{version}.sha256")
+        return files
+
+    def release_folder(self, major: int, minor: int) -> bytes:
+        entries = [
+            (name, EPOCH, 256 if name.endswith(".sha256") else self.catalog.archive_size)
+            for name in self.release_files(major, minor)
+        ]
+        return index_page(f"/release/Blender{major}.{minor}/", entries)
+
+    def manifest(self, name: str) -> bytes:
+        version = name.removeprefix("blender-").removesuffix(".sha256")
+        lines = []
+        for platform, arch, suffix in PLATFORMS:
+            file_name = f"blender-{version}-{platform}-{arch}{suffix}"
+            if platform == self.catalog.platform:
+                checksum = hashlib.sha256(self.archive(file_name)).hexdigest()
+            else:
+                checksum = hashlib.sha256(file_name.encode()).hexdigest()
+            lines.append(f"{checksum}  {file_name}")
+        return ("\n".join(lines) + "\n").encode()
+
+    def builder_feed(self, branch: str) -> bytes:
+        builds = []
+        for i in range(self.catalog.builds):
+            build_hash = hashlib.sha1(f"{branch}-{i}".encode()).hexdigest()[:12]
+            version = f"4.{3 + i % 2}.0"
+            for platform, arch, suffix in PLATFORMS:
+                file_name = (
+                    f"blender-{version}-alpha+{branch}-{i}.{build_hash}-"
+                    f"{BUILDER_PLATFORMS[platform]}.{BUILDER_ARCHITECTURES[arch]}-release{suffix}"
+                )
+                builds.append(
+                    {
+                        "app": "Blender",
+                        "url": f"https://cdn.builder.blender.org/download/{branch}/{file_name}",
+                        "version": version,
+                        "branch": "main" if branch == "daily" else f"{branch}-{i}",
+                        "patch": f"PR{1000 + i}" if branch == "patch" else None,
+                        "hash": build_hash,
+                        "platform": BUILDER_PLATFORMS[platform],
+                        "architecture": BUILDER_ARCHITECTURES[arch],
+                        "bitness": 64,
+                        "file_mtime": int((EPOCH - timedelta(hours=i)).timestamp()),
+                        "file_name": file_name,
+                        "file_size": self.catalog.archive_size,
+                        "file_extension": suffix.rsplit(".", 1)[-1],
+                        "release_cycle": "alpha",
+                    }
+                )
+        return json.dumps(builds).encode()
+
+    def api_contents(self, file: str) -> bytes | None:
+        path = API_FOLDER / file
+        if not path.is_file():
+            return None
+        content = base64.b64encode(path.read_bytes()).decode()
+        return json.dumps({"name": file, "encoding": "base64", "content": content}).encode()
+
+    def releases(self) -> bytes:
+        tag = f"v{self.catalog.launcher_version}"
+        assets = []
+        for platform in ("Windows", "Linux", "Ubuntu", "macOS"):
+            name = f"Blender_Launcher_{tag}_{platform}_x64.zip"
+            assets.append(
+                {"name": name, "browser_download_url": f"https://github.com/{REPO}/releases/download/{tag}/{name}"}
+            )
+        return json.dumps([{"tag_name": tag, "assets": assets}]).encode()
+
+
+@dataclass
+class Response:
+    status: int = 200
+    body: bytes = b""
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+class StandinServer:
+    def __init__(
+        self,
+        faults: Faults | None = None,
+        catalog: Catalog | None = None,
+        recordings: Path | None = None,
+        port: int = 0,
+    ):
+        self.faults = faults or Faults()
+        self.generator = Generator(catalog or Catalog())
+        self.recordings = recordings
+        self.requests = 0
+        self._rng = random.Random(self.faults.seed)
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.handle(self, head=False)
+
+            def do_HEAD(self):
+                server.handle(self, head=True)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def origin_overrides(self) -> dict[str, str]:
+        """Mapping for ConnectionManager.origin_overrides that sends every known host here"""
+        return {f"https://{host}": f"{self.base_url}/{host}" for host in HOSTS}
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            return self._rng.random() < self.faults.failure_rate
+
+    def route(self, host: str, path: str) -> Response:
+        if self.recordings is not None:
+            file = self.recordings / host / (path.lstrip("/") or "index.html")
+            if file.is_dir():
+                file = file / "index.html"
+            if file.is_file():
+                return Response(body=file.read_bytes())
+
+        gen = self.generator
+        if host == "download.blender.org":
+            if path == "/release/":
+                return Response(body=gen.release_index(), headers={"Content-Type": "text/html"})
+            if m := re.fullmatch(r"/release/Blender(\d+)\.(\d+)/", path):
+                major, minor = int(m.group(1)), int(m.group(2))
+                if (major, minor) in gen.catalog.stable_versions():
+                    return Response(body=gen.release_folder(major, minor), headers={"Content-Type": "text/html"})
+            if m := re.fullmatch(r"/release/Blender\d+\.\d+/([^/]+)", path):
+                name = m.group(1)
+                if name.endswith(".sha256"):
+                    return Response(body=gen.manifest(name))
+                return Response(body=gen.archive(name))
+
+        elif host == "builder.blender.org":
+            if (m := re.fullmatch(r"/download/(\w+)(/archive)?/", path)) and m.group(1) in gen.catalog.branches:
+                return Response(body=gen.builder_feed(m.group(1)), headers={"Content-Type": "application/json"})
+
+        elif host == "cdn.builder.blender.org":
+            if m := re.fullmatch(r"/download/\w+/([^/]+)", path):
+                return Response(body=gen.archive(m.group(1)))
+
+        elif host == "api.github.com":
+            prefix = f"/repos/{REPO}/contents/source/resources/api/"
+            if path.startswith(prefix) and (body := gen.api_contents(path.removeprefix(prefix))) is not None:
+                return Response(body=body, headers={"Cache-Control": "public, max-age=60"})
+            if path == f"/repos/{REPO}/releases":
+                return Response(body=gen.releases(), headers={"Cache-Control": "public, max-age=60"})
+
+        elif host == "github.com":
+            if path == f"/{REPO}/releases/latest":
+                tag = f"v{gen.catalog.launcher_version}"
+                return Response(302, headers={"Location": f"{self.base_url}/github.com/{REPO}/releases/tag/{tag}"})
+            if path.startswith(f"/{REPO}/releases/tag/"):
+                return Response(body=b"<html></html>", headers={"Content-Type": "text/html"})
+            if m := re.fullmatch(rf"/{REPO}/releases/download/[^/]+/([^/]+)", path):
+                return Response(body=gen.archive(m.group(1)))
+
+        return Response(404, b"Not Found")
+
+    def handle(self, handler: BaseHTTPRequestHandler, head: bool):
+        faults = self.faults
+        if faults.latency:
+            time.sleep(faults.latency)
+
+        host, _, path = handler.path.lstrip("/").partition("/")
+        path = "/" + urlsplit(path).path
+
+        fail = self._should_fail()
+        if fail and faults.failure_mode == "reset":
+            handler.close_connection = True
+            handler.connection.shutdown(socket.SHUT_RDWR)
+            return
+        if fail and faults.failure_mode == "status":
+            headers = {"Retry-After": str(faults.retry_after)} if faults.retry_after is not None else {}
+            self.send(handler, Response(503, b"Service Unavailable", headers), head)
+            return
+
+        response = self.route(host, path)
+        if response.status == 200:
+            response = self.conditional(handler, response)
+            response = self.ranged(handler, response)
+
+        self.send(handler, response, head, truncate=fail and faults.failure_mode == "truncate")
+
+    def conditional(self, handler: BaseHTTPRequestHandler, response: Response) -> Response:
+        etag = f'"{hashlib.sha1(response.body).hexdigest()}"'
+        response.headers.setdefault("ETag", etag)
+        response.headers.setdefault("Last-Modified", http_date(EPOCH))
+
+        not_modified = Response(304, headers=response.headers)
+        if "If-None-Match" in handler.headers:
+            return not_modified if handler.headers["If-None-Match"] == etag else response
+        if (since := handler.headers.get("If-Modified-Since")) is not None:
+            try:
+                if parsedate_to_datetime(since) >= EPOCH:
+                    return not_modified
+            except (TypeError, ValueError):
+                pass
+        return response
+
+    def ranged(self, handler: BaseHTTPRequestHandler, response: Response) -> Response:
+        response.headers["Accept-Ranges"] = "bytes"
+        value = handler.headers.get("Range")
+        if value is None:
+            return response
+
+        size = len(response.body)
+        m = re.fullmatch(r"bytes=(\d*)-(\d*)", value.strip())
+        if m is None or m.groups() == ("", ""):
+            return Response(416, headers={"Content-Range": f"bytes */{size}"})
+
+        start, end = m.groups()
+        if start == "":  # Suffix range, the last N bytes
+            start, end = max(size - int(end), 0), size - 1
+        else:
+            start, end = int(start), min(int(end), size - 1) if end else size - 1
+        if start >= size or start > end:
+            return Response(416, headers={"Content-Range": f"bytes */{size}"})
+
+        headers = {**response.headers, "Content-Range": f"bytes {start}-{end}/{size}"}
+        return Response(206, response.body[start : end + 1], headers)
+
+    def send(self, handler: BaseHTTPRequestHandler, response: Response, head: bool, truncate=False):
+        handler.send_response(response.status)
+        for key, value in response.headers.items():
+            handler.send_header(key, value)
+        handler.send_header("Content-Length", str(len(response.body)))
+        handler.end_headers()
+        if head or response.status == 304:
+            return
+
+        body = response.body
+        if truncate:
+            body = body[: len(body) // 2]
+
+        bandwidth = self.faults.bandwidth
+        chunk_size = 64 * 1024 if bandwidth is None else max(min(bandwidth // 20, 64 * 1024), 1)
+        started = time.monotonic()
+        sent = 0
+        try:
+            for offset in range(0, len(body), chunk_size):
+                handler.wfile.write(body[offset : offset + chunk_size])
+                sent += min(chunk_size, len(body) - offset)
+                if bandwidth is not None:
+                    # Sleep until the amount sent so far matches the configured rate
+                    ahead = sent / bandwidth - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            handler.close_connection = True
+            return
+
+        if truncate:
+            handler.close_connection = True
+            handler.wfile.flush()
+            handler.connection.shutdown(socket.SHUT_RDWR)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for blender.org and GitHub")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each answer")
+    parser.add_argument("--bandwidth", type=int, default=None, help="Bytes per second for response bodies")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-mode", choices=("status", "reset", "truncate"), default="status")
+    parser.add_argument("--recordings", type=Path, default=None, help="Serve recorded responses from this folder")
+    args = parser.parse_args()
+
+    faults = Faults(args.latency, args.bandwidth, args.failure_rate, args.failure_mode)
+    with StandinServer(faults, recordings=args.recordings, port=args.port) as server:
+        print(f"Serving on {server.base_url}")
+        for origin, target in server.origin_overrides().items():
+            print(f"  {origin} -> {target}")
+        with contextlib.suppress(KeyboardInterrupt):
+            threading.Event().wait()
@@ -9,6 +9,11 @@ PYTHONOPTIMIZE=2 pyinstaller \
 	--hidden-import "pynput.keyboard._xorg" \
 	--hidden-import "pynput.mouse._xorg" \
 	--hidden-import "python-xlib" \
+	--hidden-import "distro" \
+	--hidden-import "send2trash" \
+	--hidden-import "threads.deduplicator" \
+	--hidden-import "webbrowser" \
+	--hidden-import "zstandard" \
 	--clean \
 	--noconsole \
 	--noupx \
@@ -11,6 +11,11 @@ PYTHONOPTIMIZE=2 pyinstaller \
     --icon "source/resources/icons/bl/bl.icns" \
     --hidden-import "pynput.keyboard._darwin" \
     --hidden-import "pynput.mouse._darwin" \
+    --hidden-import "distro" \
+    --hidden-import "send2trash" \
+    --hidden-import "threads.deduplicator" \
+    --hidden-import "webbrowser" \
+    --hidden-import "zstandard" \
     --name="Blender Launcher" \
     --add-binary="source/resources/certificates/custom.pem:files" \
     --add-data="source/resources/api/blender_launcher_api.json:files" \
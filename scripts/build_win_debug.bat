@@ -10,6 +10,11 @@ if exist "Blender Launcher.spec" del /Q "Blender Launcher.spec"
 python -OO -m PyInstaller ^
 --hidden-import "pynput.keyboard._win32" ^
 --hidden-import "pynput.mouse._win32" ^
+--hidden-import "distro" ^
+--hidden-import "send2trash" ^
+--hidden-import "threads.deduplicator" ^
+--hidden-import "webbrowser" ^
+--hidden-import "zstandard" ^
 --clean ^
 --noconsole ^
 --noupx ^
@@ -5,18 +5,19 @@ import logging
 import os
 import sys
 from argparse import ArgumentParser
+from multiprocessing import freeze_support
 from pathlib import Path
-from typing import NoReturn
+from typing import TYPE_CHECKING, NoReturn
 
-import modules._resources_rc
 from modules import argument_parsing as ap
 from modules._platform import _popen, get_cache_path, get_cwd, get_launcher_name, get_platform, is_frozen
-from modules.cli_launching import cli_launch
-from modules.shortcut import register_windows_filetypes, unregister_windows_filetypes
 from modules.version_matcher import VALID_FULL_QUERIES, VALID_QUERIES, VERSION_SEARCH_SYNTAX
-from PyQt5.QtWidgets import QApplication
 from semver import Version
-from windows.dialog_window import DialogWindow
+
+# Qt is only imported once it is needed, `launch --cli` never loads it
+if TYPE_CHECKING:
+    from modules.version_matcher import VersionSearchQuery
+    from PyQt5.QtWidgets import QApplication
 
 LOG_COLORS = {
     "DEBUG": "\033[36m",  # Cyan
@@ -112,6 +113,19 @@ def main():
         help="Do not check for existing instance.",
         action="store_true",
     )
+    http_grp = parser.add_mutually_exclusive_group()
+    http_grp.add_argument(
+        "--record-http",
+        help="Record every response received from the network into a folder, for replaying it later.",
+        type=Path,
+        metavar="DIR",
+    )
+    http_grp.add_argument(
+        "--replay-http",
+        help="Serve responses recorded with --record-http from a folder instead of using the network.",
+        type=Path,
+        metavar="DIR",
+    )
 
     launch_parser = subparsers.add_parser(
         "launch",
@@ -133,6 +147,41 @@ def main():
         help="Launch Blender from CLI. does not open any QT frontend. WARNING: LIKELY DOES NOT WORK IN WINDOWS BUNDLED EXECUTABLE",
     )
 
+    daemon_parser = subparsers.add_parser(
+        "daemon",
+        help="Run without windows, keeping the library in memory to answer list, launch and install requests from other"
+        " processes, like launch --cli. With a request, sends it to the running daemon instead.",
+        add_help=False,
+    )
+    add_help(daemon_parser)
+    daemon_parser.add_argument(
+        "request",
+        nargs="?",
+        choices=("status", "list", "install"),
+        help="Request to send to the running daemon.",
+    )
+    daemon_parser.add_argument("-v", "--version", help=f"Builds to list or install. {VERSION_SEARCH_SYNTAX}")
+    daemon_parser.add_argument(
+        "-a",
+        "--available",
+        action="store_true",
+        help="List the builds available for download instead of the installed ones.",
+    )
+
+    scan_parser = subparsers.add_parser(
+        "scan",
+        help="Read which Blender versions the .blend files in a folder were saved with, and report the installed builds"
+        " that open them. Headers are cached, so scanning the folder again only reads new and changed files.",
+        add_help=False,
+    )
+    add_help(scan_parser)
+    scan_parser.add_argument("folder", type=Path, nargs="?", help="Folder to scan, including its subfolders.")
+    scan_parser.add_argument(
+        "-w", "--workers", type=int, default=16, help="Files to read at once. (default: %(default)s)"
+    )
+    scan_parser.add_argument("--files", action="store_true", help="List the files saved with each version.")
+    scan_parser.add_argument("--no-cache", action="store_true", help="Read every file, ignoring cached headers.")
+
     if sys.platform == "win32":
         subparsers.add_parser(
             "register",
@@ -157,7 +206,7 @@ def main():
 
     # Custom help is necessary for frozen Windows builds
     if args.help:
-        ap.show_help(parser, update_parser, launch_parser, args)
+        ap.show_help(parser, update_parser, launch_parser, daemon_parser, scan_parser, args)
         sys.exit(0)
 
     if args.debug:
@@ -168,6 +217,32 @@ def main():
     # Log Blender Launcher version
     logger.info(f"Blender Launcher Version: {version}")
 
+    if args.record_http is not None or args.replay_http is not None:
+        from modules import http_recorder
+
+        if args.record_http is not None:
+            http_recorder.start_recording(args.record_http)
+        elif (args.replay_http / "responses.jsonl").is_file():
+            http_recorder.start_replaying(args.replay_http)
+        else:
+            ap.error(parser, f"{args.replay_http} does not contain a recording")
+
+    if args.command == "launch" and args.cli and args.set_library_folder is None:
+        start_cli_launch(args.file, args.version, args.open_last)
+
+    if args.command == "scan":
+        if args.folder is None:
+            ap.error(scan_parser, "the folder to scan is missing")
+        start_scan(args.folder, args.workers, not args.no_cache, args.files)
+
+    if args.command == "daemon":
+        if args.request is not None:
+            send_daemon_request(args.request, args.version, args.available)
+        start_daemon(args.offline, args.set_library_folder)
+
+    import modules._resources_rc  # Registers the Qt resources
+    from PyQt5.QtWidgets import QApplication
+
     # Create an instance of application and set its core properties
     app = QApplication([])
     app.setStyle("Fusion")
@@ -181,7 +256,7 @@ def main():
         start_update(app, args.instanced, args.version)
 
     if args.command == "launch":
-        start_launch(app, args.file, args.version, args.open_last, cli=args.cli)
+        start_launch(app, args.file, args.version, args.open_last, cli=args.cli, is_instanced=args.instanced)
 
     if args.command == "register":
         start_register()
@@ -205,6 +280,8 @@ def start_set_library_folder(app: QApplication, lib_folder: str):
     if set_library_folder(str(lib_folder)):
         logging.info(f"Library folder set to {lib_folder!s}")
     else:
+        from windows.dialog_window import DialogWindow
+
         logging.error("Failed to set library folder")
         dlg = DialogWindow(
             title="Warning",
@@ -242,15 +319,8 @@ def start_update(app: QApplication, is_instanced: bool, tag: str | None):
         sys.exit(0)
 
 
-def start_launch(
-    app: QApplication,
-    file: Path | None = None,
-    version_query: str | None = None,
-    open_last: bool = False,
-    cli: bool = False,
-) -> NoReturn:
+def parse_launch_args(file: Path | None, version_query: str | None) -> tuple[Path | None, VersionSearchQuery | None]:
     from modules.version_matcher import VersionSearchQuery
-    from windows.launching_window import LaunchingWindow
 
     # convert version_query to VersionSearchQuery
     if version_query is not None:
@@ -269,42 +339,193 @@ def start_launch(
     if file is not None:
         file = Path(str(file).strip('"'))
 
-    if cli:
-        cli_launch(file=file, version_query=query, open_last=open_last)
+    return file, query
+
+
+def start_cli_launch(file: Path | None = None, version_query: str | None = None, open_last: bool = False) -> NoReturn:
+    from modules.cli_launching import cli_launch
+    from modules.settings import use_read_only_settings
+
+    # Settings changes cannot be saved without QSettings, and nothing on this path needs to save any
+    use_read_only_settings()
+    file, query = parse_launch_args(file, version_query)
+    cli_launch(file=file, version_query=query, open_last=open_last, launcher=str(version))
+    sys.exit(1)
+
+
+def start_scan(folder: Path, workers: int, use_cache: bool, show_files: bool) -> NoReturn:
+    from modules.cli_launching import cli_scan
+    from modules.settings import use_read_only_settings
+
+    if not folder.is_dir():
+        print(f"{folder} is not a folder")
         sys.exit(1)
-    else:
-        LaunchingWindow(app, version_query=query, blendfile=file, open_last=open_last).show()
-        sys.exit(app.exec())
+    use_read_only_settings()
+    cli_scan(folder, max(1, workers), use_cache, show_files)
+
+
+def start_daemon(offline: bool, lib_folder: Path | None) -> NoReturn:
+    import signal
+
+    from modules import instance_protocol as ipc
+    from modules.daemon import LauncherDaemon
+    from modules.daemon_client import send_to_daemon
+    from modules.settings import is_library_folder_valid, set_library_folder
+    from PyQt5.QtCore import QCoreApplication, QTimer
+
+    if lib_folder is not None and not set_library_folder(str(lib_folder)):
+        logger.error(f"{lib_folder} is not a valid folder or it doesn't have write permissions")
+        sys.exit(1)
+    if not is_library_folder_valid():
+        logger.error("The library folder is not set or not writable, set it with -set-library-folder")
+        sys.exit(1)
+    if send_to_daemon(ipc.request(ipc.STATUS, str(version))) is not None:
+        logger.error("A daemon is already running")
+        sys.exit(1)
+
+    app = QCoreApplication([])
+    app.setApplicationVersion(str(version))
+    daemon = LauncherDaemon(app, version, offline=offline)
+    if not daemon.start():
+        sys.exit(1)
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: app.quit())
+    # Python signal handlers only run once the interpreter gets control back from the event loop
+    wakeup = QTimer()
+    wakeup.timeout.connect(lambda: None)
+    wakeup.start(500)
+
+    code = app.exec()
+    daemon.stop()
+    sys.exit(code)
+
+
+def send_daemon_request(request: str, version_query: str | None, available: bool) -> NoReturn:
+    from modules import instance_protocol as ipc
+    from modules.daemon_client import send_to_daemon
+
+    _, query = parse_launch_args(None, version_query)
+    answer = send_to_daemon(
+        ipc.request(request, str(version), version=str(query) if query is not None else None, available=available)
+    )
+    if answer is None:
+        print("No daemon is running")
+        sys.exit(1)
+
+    status = answer.get("status")
+    if status == ipc.OK and request == ipc.LIST:
+        for build in answer.get("builds", []):
+            print(f"{build['name']:<40} {build['commit_time']}  {build['link']}")
+    elif status == ipc.OK and request == ipc.STATUS:
+        for key, value in answer.items():
+            if key not in ("protocol", "status", "message"):
+                print(f"{key}: {value}")
+    if answer.get("message"):
+        print(answer["message"])
+    sys.exit(0 if status in (ipc.OK, ipc.INSTALLING) else 1)
+
+
+def start_launch(
+    app: QApplication,
+    file: Path | None = None,
+    version_query: str | None = None,
+    open_last: bool = False,
+    cli: bool = False,
+    is_instanced: bool = False,
+) -> NoReturn:
+    if cli:
+        start_cli_launch(file, version_query, open_last)
+
+    file, query = parse_launch_args(file, version_query)
+    if not is_instanced and forward_launch(file, query, open_last):
+        sys.exit(0)
+
+    from windows.launching_window import LaunchingWindow
+
+    LaunchingWindow(app, version_query=query, blendfile=file, open_last=open_last).show()
+    sys.exit(app.exec())
 
 
 def start_register():
-    import sys
+    from modules.shortcut import register_windows_filetypes
 
     register_windows_filetypes()
-
     sys.exit(0)
 
 
 def start_unregister():
-    import sys
+    from modules.shortcut import unregister_windows_filetypes
 
     unregister_windows_filetypes()
     sys.exit(0)
 
 
-def check_for_instance():
-    from PyQt5.QtCore import QByteArray
+def send_to_instance(message: bytes, wait_for_reply: bool = True) -> dict | None:
+    """Sends a request to the running Blender Launcher. Returns its reply, or None if no instance is running or it
+    did not answer"""
+    from modules import instance_protocol as ipc
     from PyQt5.QtNetwork import QLocalSocket
 
     socket = QLocalSocket()
-    socket.connectToServer("blender-launcher-server")
-    is_running = socket.waitForConnected()
-    if is_running:
-        socket.write(QByteArray(str(version).encode()))
-        socket.waitForBytesWritten()
+    socket.connectToServer(ipc.SERVER_NAME)
+    if not socket.waitForConnected(ipc.CONNECT_TIMEOUT):
+        return None
+
+    socket.write(message)
+    socket.waitForBytesWritten()
+    if not wait_for_reply:
         socket.close()
+        return {}
+
+    while not socket.canReadLine() and socket.waitForReadyRead(ipc.REPLY_TIMEOUT):
+        pass
+    answer = None
+    if socket.canReadLine():
+        try:
+            answer = ipc.decode(bytes(socket.readLine()))
+        except ValueError as e:
+            logger.error(f"Malformed reply from the running instance: {e}")
+    else:
+        logger.warning("The running instance did not answer")
+    socket.close()
+    return answer
+
+
+def check_for_instance():
+    from modules import instance_protocol as ipc
+
+    if send_to_instance(ipc.request(ipc.SHOW, str(version)), wait_for_reply=False) is not None:
         sys.exit()
 
 
+def forward_launch(file: Path | None, query: VersionSearchQuery | None, open_last: bool) -> bool:
+    """Asks the running instance to launch, which already knows the library. Returns whether it did so or is
+    showing the build choice itself"""
+    from modules import instance_protocol as ipc
+
+    answer = send_to_instance(
+        ipc.request(
+            ipc.LAUNCH,
+            str(version),
+            # The running instance may have a different working directory
+            file=str(file.absolute()) if file is not None else None,
+            version=str(query) if query is not None else None,
+            open_last=open_last,
+        )
+    )
+    if answer is None:
+        return False
+
+    status = answer.get("status")
+    if status in (ipc.LAUNCHED, ipc.CHOOSING):
+        logger.info(answer.get("message") or status)
+        return True
+    logger.info(f"Launching from this process, the running instance answered {status}: {answer.get('message')}")
+    return False
+
+
 if __name__ == "__main__":
+    # Required for the process pool used by the zip extractor in frozen builds
+    freeze_support()
     main()
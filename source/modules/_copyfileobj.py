@@ -5,17 +5,19 @@ import shutil
 READINTO_BUFSIZE = 1024 * 1024
 
 
-def copyfileobj(fsrc, fdst, callback, length=0):
+def copyfileobj(fsrc, fdst, callback, length=0, hasher=None):
     """
     Inject support for a callback function to report
     each time another block has copied
     For more info check https://stackoverflow.com/a/29967714
+
+    If a hashlib object is passed as hasher, it is updated with every block as it is copied
     """
 
     try:
         # Check for optimization opportunity
         if "b" in fsrc.mode and "b" in fdst.mode and fsrc.readinto:
-            return _copyfileobj_readinto(fsrc, fdst, callback, length)
+            return _copyfileobj_readinto(fsrc, fdst, callback, length, hasher)
     except AttributeError:
         # One or both file objects do not
         # support a .mode or .readinto attribute
@@ -33,11 +35,13 @@ def copyfileobj(fsrc, fdst, callback, length=0):
         if not buf:
             break
         fdst_write(buf)
+        if hasher is not None:
+            hasher.update(buf)
         copied += len(buf)
         callback(copied)
 
 
-def _copyfileobj_readinto(fsrc, fdst, callback, length=0):
+def _copyfileobj_readinto(fsrc, fdst, callback, length=0, hasher=None):
     """readinto()/memoryview() based variant of copyfileobj().
     *fsrc* must support readinto() method and both files must be
     open in binary mode.
@@ -62,7 +66,11 @@ def _copyfileobj_readinto(fsrc, fdst, callback, length=0):
             if n < length:
                 with mv[:n] as smv:
                     fdst.write(smv)
+                    if hasher is not None:
+                        hasher.update(smv)
             else:
                 fdst_write(mv)
+                if hasher is not None:
+                    hasher.update(mv)
             copied += n
             callback(copied)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from modules.settings import get_archive_cache_size, get_library_folder
+
+logger = logging.getLogger()
+
+# Every DownloadTask runs in its own worker thread, so index reads and writes must be serialized
+_lock = threading.Lock()
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    validator: str | None
+    name: str
+    size: int
+    last_used: float
+
+
+def link_or_copy(src: Path, dst: Path):
+    """Hardlinks `src` to `dst`, falling back to a copy when the two are on different filesystems"""
+    with contextlib.suppress(FileNotFoundError):
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class ArchiveCache:
+    """A size-bounded store of downloaded archives, keyed by URL and validated by ETag / Last-Modified.
+
+    Least recently used archives are evicted once the total size exceeds `budget` bytes.
+    """
+
+    def __init__(self, path: Path, budget: int):
+        self.path = path
+        self.budget = budget
+        self.index_path = path / "index.json"
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()[:32]
+
+    def _read_index(self) -> dict[str, CacheEntry]:
+        if not self.index_path.is_file():
+            return {}
+
+        try:
+            with self.index_path.open(encoding="utf-8") as f:
+                return {key: CacheEntry(**entry) for key, entry in json.load(f).items()}
+        except (json.JSONDecodeError, TypeError) as e:
+            logger.error(f"Archive cache index is corrupted, starting over: {e}")
+            return {}
+
+    def _write_index(self, index: dict[str, CacheEntry]):
+        tmp = self.index_path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump({key: asdict(entry) for key, entry in index.items()}, f)
+        os.replace(tmp, self.index_path)
+
+    def _remove(self, index: dict[str, CacheEntry], key: str):
+        entry = index.pop(key)
+        with contextlib.suppress(FileNotFoundError):
+            (self.path / entry.name).unlink()
+
+    def contains(self, url: str) -> bool:
+        """Whether there is an archive for `url`, before it is worth asking the server whether it is current"""
+        with _lock:
+            return self.key(url) in self._read_index()
+
+    def get(self, url: str, validator: str | None, dst: Path) -> bool:
+        """Links the cached archive for `url` to `dst`, if there is one. Returns whether it did.
+
+        When `validator` is None (e.g. the server could not be reached) the cached archive is trusted as-is.
+        """
+        key = self.key(url)
+        with _lock:
+            index = self._read_index()
+            entry = index.get(key)
+            if entry is None:
+                return False
+
+            file = self.path / entry.name
+            if not file.is_file() or (validator is not None and validator != entry.validator):
+                logger.debug(f"Archive cache entry for {url} is stale")
+                self._remove(index, key)
+                self._write_index(index)
+                return False
+
+            # Linked while holding the lock, so a concurrent put can't evict the archive in between
+            try:
+                link_or_copy(file, dst)
+            except OSError as e:
+                logger.error(f"Failed to use the cached archive for {url}: {e}")
+                return False
+
+            entry.last_used = time.time()
+            self._write_index(index)
+
+        logger.info(f"Using cached archive for {url}")
+        return True
+
+    def put(self, url: str, validator: str | None, file: Path):
+        size = file.stat().st_size
+        if size > self.budget:
+            return
+
+        key = self.key(url)
+        name = f"{key}-{file.name}"
+        with _lock:
+            index = self._read_index()
+            if key in index:
+                self._remove(index, key)
+
+            link_or_copy(file, self.path / name)
+            index[key] = CacheEntry(url, validator, name, size, time.time())
+            self._evict(index)
+            self._write_index(index)
+
+    def _evict(self, index: dict[str, CacheEntry]):
+        total = sum(entry.size for entry in index.values())
+        for key, entry in sorted(index.items(), key=lambda item: item[1].last_used):
+            if total <= self.budget:
+                break
+            logger.debug(f"Evicting {entry.name} from the archive cache")
+            total -= entry.size
+            self._remove(index, key)
+
+    def clear(self):
+        with _lock:
+            index = self._read_index()
+            for key in list(index):
+                self._remove(index, key)
+            self._write_index(index)
+
+
+def get_archive_cache_path() -> Path:
+    return Path(get_library_folder()) / ".archives"
+
+
+def get_archive_cache() -> ArchiveCache:
+    return ArchiveCache(get_archive_cache_path(), get_archive_cache_size() * 1024**3)
@@ -30,6 +30,8 @@ def show_help(
     parser: ArgumentParser,
     update_parser: ArgumentParser,
     launch_parser: ArgumentParser,
+    daemon_parser: ArgumentParser,
+    scan_parser: ArgumentParser,
     args: Namespace,
 ):
     if is_frozen() and sys.platform == "win32":
@@ -37,6 +39,10 @@ def show_help(
             show_windows_help(update_parser)
         elif args.command == "launch":
             show_windows_help(launch_parser)
+        elif args.command == "daemon":
+            show_windows_help(daemon_parser)
+        elif args.command == "scan":
+            show_windows_help(scan_parser)
         else:
             show_windows_help(parser)
     else:
@@ -44,5 +50,9 @@ def show_help(
             update_parser.print_help()
         elif args.command == "launch":
             launch_parser.print_help()
+        elif args.command == "daemon":
+            daemon_parser.print_help()
+        elif args.command == "scan":
+            scan_parser.print_help()
         else:
             parser.print_help()
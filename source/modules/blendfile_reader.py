@@ -3,19 +3,25 @@ from __future__ import annotations
 import contextlib
 import gzip
 import logging
-import os
+import mmap
+import struct
+import zlib
 from dataclasses import dataclass
 from enum import Enum
 from typing import TYPE_CHECKING
 
-import zstandard
+from modules.lazy import lazy_import
 from semver import Version
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
     from pathlib import Path
+    from typing import BinaryIO
 
 logger = logging.getLogger()
 
+zstandard = lazy_import("zstandard")
+
 
 # See https://docs.blender.org/manual/en/latest/files/blend/open_save.html#id8
 class CompressionType(Enum):
@@ -28,69 +34,341 @@ class CompressionType(Enum):
 class BlendfileHeader:
     version: Version
     compression_type: CompressionType
+    pointer_size: int = 8
+    little_endian: bool = True
+
+
+# Magic bytes at the start of a file
+BLEND_MAGICS = (b"BLENDER", b"BULLETf")
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# "BLENDER-v402": magic, pointer size, endianness and version. Since 5.0, "BLENDER17-01v0500": magic, header size,
+# format version, endianness and a four digit version
+LEGACY_HEADER_SIZE = 12
+MAX_HEADER_SIZE = 17
+
+# Bytes of compressed data read at once while decompressing the header
+CHUNK_SIZE = 1024
 
 
 def parse_header_version(header: bytes):
-    version = [x - ord("0") for x in header[9::]]
+    version = int(header[len(header) - (4 if len(header) > LEGACY_HEADER_SIZE else 3) :])
 
     return Version(
-        major=version[0],
-        minor=version[1] * 10 + version[2],
+        major=version // 100,
+        minor=version % 100,
         patch=0,
     )
 
 
-def __try_read_basic(pth: Path) -> bytes | None:
-    """Tries to read the file header from an uncompressed file, returning None upon failure"""
-    with pth.open("rb") as handle, contextlib.suppress(UnicodeDecodeError):
-        if handle.read(7).decode() in {"BLENDER", "BULLETf"}:
-            handle.seek(0, os.SEEK_SET)
-            return handle.read(12)
-    return None
+def parse_header_layout(header: bytes) -> tuple[int, bool, bool]:
+    """The pointer size, endianness and whether the blocks use the large BHead (since 5.0) of a header"""
+    if len(header) > LEGACY_HEADER_SIZE:
+        if header[10:12] != b"01":
+            raise ValueError(f"Unknown blendfile format {header[10:12]!r}")
+        return 8, header[12:13] == b"v", True
+    return (4 if header[7:8] == b"_" else 8), header[8:9] == b"v", False
 
 
-def __try_read_gzip(pth: Path) -> bytes | None:
-    """Tries to read the file header from a gzip file, returning None upon failure"""
-    with gzip.open(pth, "rb") as fs, contextlib.suppress(gzip.BadGzipFile):
-        return fs.read(12)
+def sniff_compression(magic: bytes) -> CompressionType | None:
+    """Tells the compression of a blendfile from its first bytes, None if it is not a blendfile"""
+    if magic.startswith(BLEND_MAGICS):
+        return CompressionType.NONE
+    if magic.startswith(GZIP_MAGIC):
+        return CompressionType.GZIP
+    if magic.startswith(ZSTD_MAGIC):
+        return CompressionType.ZSTD
     return None
 
 
-def __try_read_zstd(pth: Path) -> bytes | None:
-    """Tries to read the file header from a zstandard file, returning None upon failure"""
-    with zstandard.open(pth, "rb") as fs, contextlib.suppress(zstandard.ZstdError):
-        return fs.read(12)
-    return None
+def __cut_header(data: bytes) -> bytes | None:
+    """The header at the start of the (decompressed) data, None if it is not one"""
+    if not data.startswith(BLEND_MAGICS):
+        return None
+    size = int(data[7:9]) if data[7:9].isdigit() else LEGACY_HEADER_SIZE
+    if len(data) < size:
+        return None
+    return data[:size]
 
 
-def get_blendfile_header(pth: Path) -> tuple[bytes, CompressionType] | None:
-    header = __try_read_basic(pth)
-    if header is not None:
-        logger.debug("no compression detected, assuming none")
-        return header, CompressionType.NONE
+def __decompress_header(stream: BinaryIO, start: bytes, decompressor, error: type[Exception]) -> bytes | None:
+    """Feeds the decompressor until it has produced the header, reading as little of the stream as possible"""
+    data = b""
+    chunk = start
+    with contextlib.suppress(error):
+        while chunk:
+            data += decompressor.decompress(chunk)
+            if len(data) >= MAX_HEADER_SIZE:
+                break
+            chunk = stream.read(CHUNK_SIZE)
+    return __cut_header(data)
 
-    if header is None:
-        header = __try_read_gzip(pth)
-        if header is not None:
-            logger.debug("gzip blendfile detected")
-            return header, CompressionType.GZIP
+
+def read_header(stream: BinaryIO) -> tuple[bytes, CompressionType] | None:
+    """Reads the header from the start of an open binary stream, decompressing it if needed. Reads the stream once
+    from where it is and never seeks, so it works on pipes and files on slow network mounts alike. Returns None if
+    it is not a blendfile"""
+    start = stream.read(MAX_HEADER_SIZE)
+    compression_type = sniff_compression(start)
+
+    if compression_type is CompressionType.NONE:
+        header = __cut_header(start)
+    elif compression_type is CompressionType.GZIP:
+        header = __decompress_header(stream, start, zlib.decompressobj(16 + zlib.MAX_WBITS), zlib.error)
+    elif compression_type is CompressionType.ZSTD:
+        header = __decompress_header(stream, start, zstandard.ZstdDecompressor().decompressobj(), zstandard.ZstdError)
+    else:
+        return None
 
     if header is None:
-        header = __try_read_zstd(pth)
-        if header is not None:
-            logger.debug("zstd blendfile detected")
-            return header, CompressionType.ZSTD
+        return None
+    logger.debug(f"{compression_type.value} blendfile detected")
+    return header, compression_type
 
-    return None
+
+def get_blendfile_header(pth: Path) -> tuple[bytes, CompressionType] | None:
+    with pth.open("rb") as handle:
+        return read_header(handle)
 
 
-def read_blendfile_header(pth: Path) -> BlendfileHeader | None:
-    header = get_blendfile_header(pth)
+def read_blendfile_header(source: Path | BinaryIO) -> BlendfileHeader | None:
+    """Reads the header of the blendfile at the path, or from the start of an open binary stream"""
+    header = read_header(source) if hasattr(source, "read") else get_blendfile_header(source)  # type: ignore
     if header is None:
         raise Exception("Could not decode blendfile header")
 
     header, compression_type = header
     logger.debug(f"HEADER: {header}")
     version = parse_header_version(header)
+    pointer_size, little_endian, _ = parse_header_layout(header)
+
+    return BlendfileHeader(version, compression_type, pointer_size, little_endian)
+
+
+# Blocks written before the data of the file, in this order. See writefile.cc
+REND_CODE = b"REND"
+TEST_CODE = b"TEST"  # the thumbnail
+GLOB_CODE = b"GLOB"  # FileGlobal
+ENDB_CODE = b"ENDB"
+PREAMBLE_CODES = (REND_CODE, TEST_CODE)
+
+# Bytes read at once when skipping over the data of a compressed block
+SKIP_SIZE = 64 * 1024
+
+
+@dataclass
+class BHead:
+    code: bytes
+    length: int
+    old: int
+    sdna_index: int
+    count: int
+
+
+@dataclass
+class BlendThumbnail:
+    width: int
+    height: int
+    rgba: bytes  # rows from the bottom up, as Blender stores them
+
+    def to_png(self) -> bytes:
+        row = self.width * 4
+        # Rows from the top down, each after the byte of its (lack of) filter
+        raw = b"".join(b"\x00" + self.rgba[start : start + row] for start in range((self.height - 1) * row, -1, -row))
+
+        def chunk(kind: bytes, data: bytes) -> bytes:
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+        return b"".join(
+            (
+                b"\x89PNG\r\n\x1a\n",
+                chunk(b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8, 6, 0, 0, 0)),
+                chunk(b"IDAT", zlib.compress(raw)),
+                chunk(b"IEND", b""),
+            )
+        )
+
+
+@dataclass
+class BlendfileInfo:
+    header: BlendfileHeader
+    subversion: int | None = None
+    min_version: Version | None = None
+    "The oldest Blender that fully reads the file, with its subversion as the patch"
+    thumbnail: BlendThumbnail | None = None
+
+    @property
+    def file_version(self) -> Version:
+        """The version the file was saved with, with its subversion as the patch if it is known"""
+        return self.header.version.replace(patch=self.subversion or 0)
+
+
+class _MappedSource:
+    """An uncompressed file mapped into memory, skipping over a block never reads it"""
+
+    def __init__(self, buffer: mmap.mmap):
+        self.buffer = buffer
+        self.pos = 0
+
+    def read(self, size: int) -> bytes:
+        data = self.buffer[self.pos : self.pos + size]
+        self.pos += len(data)
+        return data
+
+    def skip(self, size: int):
+        self.pos += size
+
+
+class _StreamSource:
+    """A decompressing stream, read from start to end. Corrupt data ends it like a truncated file"""
+
+    def __init__(self, stream: BinaryIO, errors: tuple[type[Exception], ...]):
+        self.stream = stream
+        self.errors = errors
+        self.pos = 0
+
+    def _read(self, size: int) -> bytes:
+        try:
+            data = self.stream.read(size)
+        except self.errors as e:
+            logger.debug(f"Cannot decompress blendfile: {e}")
+            return b""
+        self.pos += len(data)
+        return data
+
+    def read(self, size: int) -> bytes:
+        data = self._read(size)
+        # Decompressing readers may return less than asked for before the end
+        while data and len(data) < size:
+            more = self._read(size - len(data))
+            if not more:
+                break
+            data += more
+        return data
+
+    def skip(self, size: int):
+        while size > 0:
+            data = self._read(min(size, SKIP_SIZE))
+            if not data:
+                break
+            size -= len(data)
+
+
+class BlockReader:
+    """Walks the blocks of a blendfile one after the other. `read` reads the data of the current block, whatever is
+    left of it is skipped when moving on to the next"""
+
+    def __init__(self, source: _MappedSource | _StreamSource, header: BlendfileHeader, large_bhead: bool):
+        self.header = header
+        self.endian = "<" if header.little_endian else ">"
+        self._source = source
+        self._large_bhead = large_bhead
+        if large_bhead:
+            self._bhead = struct.Struct(f"{self.endian}4siQqq")
+        else:
+            self._bhead = struct.Struct(f"{self.endian}4si{'I' if header.pointer_size == 4 else 'Q'}ii")
+        self._end = source.pos
+
+    def blocks(self) -> Iterator[BHead]:
+        while True:
+            self._source.skip(self._end - self._source.pos)
+            data = self._source.read(self._bhead.size)
+            if len(data) < self._bhead.size:
+                return
+
+            if self._large_bhead:
+                code, sdna_index, old, length, count = self._bhead.unpack(data)
+            else:
+                code, length, old, sdna_index, count = self._bhead.unpack(data)
+            if code == ENDB_CODE or length < 0:
+                return
+
+            self._end = self._source.pos + length
+            yield BHead(code, length, old, sdna_index, count)
+
+    def read(self, size: int | None = None) -> bytes:
+        """Reads up to `size` bytes of the current block, the rest of it by default"""
+        left = self._end - self._source.pos
+        return self._source.read(left if size is None else min(size, left))
+
+
+def __start_blocks(source: _MappedSource | _StreamSource, compression_type: CompressionType) -> BlockReader | None:
+    data = source.read(LEGACY_HEADER_SIZE)
+    if data[7:9].isdigit():
+        data += source.read(MAX_HEADER_SIZE - LEGACY_HEADER_SIZE)
+    header = __cut_header(data)
+    if header is None:
+        return None
+
+    try:
+        version = parse_header_version(header)
+        pointer_size, little_endian, large_bhead = parse_header_layout(header)
+    except ValueError:
+        logger.debug(f"Malformed header: {header!r}")
+        return None
+    return BlockReader(source, BlendfileHeader(version, compression_type, pointer_size, little_endian), large_bhead)
+
+
+@contextlib.contextmanager
+def open_blendfile_blocks(pth: Path) -> Iterator[BlockReader | None]:
+    """Opens the blendfile at the path to walk its blocks. Uncompressed files are mapped into memory, so the blocks
+    that are skipped are never read from the disk; compressed ones are decompressed as a stream, up to the last
+    block read. Yields None if it is not a blendfile"""
+    with pth.open("rb") as handle, contextlib.ExitStack() as stack:
+        compression_type = sniff_compression(handle.read(MAX_HEADER_SIZE))
+        handle.seek(0)
+
+        if compression_type is CompressionType.NONE:
+            source = _MappedSource(stack.enter_context(mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)))
+        elif compression_type is CompressionType.GZIP:
+            source = _StreamSource(
+                stack.enter_context(gzip.GzipFile(fileobj=handle)),  # type: ignore
+                (OSError, EOFError, zlib.error),
+            )
+        elif compression_type is CompressionType.ZSTD:
+            source = _StreamSource(
+                stack.enter_context(zstandard.ZstdDecompressor().stream_reader(handle, closefd=False)),
+                (zstandard.ZstdError,),
+            )
+        else:
+            yield None
+            return
+
+        yield __start_blocks(source, compression_type)
+
+
+def __read_thumbnail(reader: BlockReader) -> BlendThumbnail | None:
+    width, height = struct.unpack(f"{reader.endian}ii", reader.read(8).ljust(8, b"\0"))
+    if width <= 0 or height <= 0:
+        return None
+    rgba = reader.read(width * height * 4)
+    if len(rgba) < width * height * 4:
+        return None
+    return BlendThumbnail(width, height, rgba)
+
+
+def read_blendfile_info(pth: Path, thumbnail: bool = True) -> BlendfileInfo | None:
+    """Reads the header of the blendfile at the path, then the file version fields of its GLOB block and its
+    thumbnail. Both come before the data of the file, so this reads a few KB of it at most. Returns None if it is
+    not a blendfile"""
+    with open_blendfile_blocks(pth) as reader:
+        if reader is None:
+            return None
 
-    return BlendfileHeader(version, compression_type=compression_type)
+        info = BlendfileInfo(reader.header)
+        for bhead in reader.blocks():
+            if bhead.code == TEST_CODE and thumbnail:
+                info.thumbnail = __read_thumbnail(reader)
+            elif bhead.code == GLOB_CODE:
+                # subvstr[4], subversion, minversion, minsubversion
+                data = reader.read(10)
+                if len(data) == 10:
+                    _, subversion, minversion, minsubversion = struct.unpack(f"{reader.endian}4shhh", data)
+                    if min(subversion, minversion, minsubversion) >= 0:
+                        info.subversion = subversion
+                        info.min_version = Version(minversion // 100, minversion % 100, minsubversion)
+                break
+            elif bhead.code not in PREAMBLE_CODES:
+                break
+        return info
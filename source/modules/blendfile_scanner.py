@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from modules._platform import get_cache_path
+from modules.blendfile_reader import parse_header_version, read_header
+from semver import Version
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+logger = logging.getLogger()
+
+# Header reads mostly wait on the disk or the network share, so more threads than cores pay off
+SCAN_WORKERS = 16
+# Files each worker reads per task, handing out files one by one costs more than reading a small one
+SCAN_BATCH = 64
+
+
+@dataclass
+class ScannedFile:
+    size: int
+    mtime: int  # nanoseconds
+    version: str | None  # None if the file is not a readable blendfile
+    compression_type: str | None
+
+
+@dataclass
+class ScanReport:
+    root: Path
+    versions: dict[Version, list[str]] = field(default_factory=dict)
+    "The paths of the files saved with each version, newest version first"
+    unreadable: list[str] = field(default_factory=list)
+    read: int = 0
+    cached: int = 0
+    seconds: float = 0.0
+
+
+class HeaderCache:
+    """The headers of scanned blendfiles by path, reused while the size and modification time of the file match"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._index = self._read_index()
+        self._changed = False
+
+    def _read_index(self) -> dict[str, ScannedFile]:
+        if not self.path.is_file():
+            return {}
+
+        try:
+            with self.path.open(encoding="utf-8") as f:
+                return {pth: ScannedFile(*entry) for pth, entry in json.load(f).items()}
+        except (json.JSONDecodeError, TypeError) as e:
+            logger.error(f"Blendfile header cache is corrupted, starting over: {e}")
+            return {}
+
+    def save(self):
+        if not self._changed:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            # Lists instead of objects keep the index small, it holds an entry for every file of every project
+            json.dump(
+                {pth: [e.size, e.mtime, e.version, e.compression_type] for pth, e in self._index.items()},
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(tmp, self.path)
+        self._changed = False
+
+    def get(self, pth: str, stat: os.stat_result) -> ScannedFile | None:
+        entry = self._index.get(pth)
+        if entry is None or entry.size != stat.st_size or entry.mtime != stat.st_mtime_ns:
+            return None
+        return entry
+
+    def put(self, pth: str, entry: ScannedFile):
+        self._index[pth] = entry
+        self._changed = True
+
+    def forget_missing(self, root: Path, seen: set[str]):
+        """Drops the entries of files under `root` that were not seen while scanning it"""
+        prefix = os.path.join(root, "")
+        for pth in [p for p in self._index if p.startswith(prefix) and p not in seen]:
+            del self._index[pth]
+            self._changed = True
+
+
+def get_header_cache_path() -> Path:
+    return Path(get_cache_path()) / "blendfile_headers.json"
+
+
+def _visit_entry(entry: os.DirEntry, folders: list[str]) -> os.stat_result | None:
+    """Queues folders to be scanned next and returns the stat of .blend files, None for anything else"""
+    try:
+        if entry.is_dir(follow_symlinks=False):
+            folders.append(entry.path)
+        elif entry.name.lower().endswith(".blend") and entry.is_file():
+            return entry.stat()
+    except OSError as e:
+        logger.warning(f"Skipping {entry.path}: {e}")
+    return None
+
+
+def walk_blendfiles(root: Path) -> Iterator[tuple[str, os.stat_result]]:
+    """Every .blend file under root with its stat, without following symlinks to folders"""
+    folders = [str(root)]
+    while folders:
+        folder = folders.pop()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    stat = _visit_entry(entry, folders)
+                    if stat is not None:
+                        yield entry.path, stat
+        except OSError as e:
+            logger.warning(f"Cannot scan {folder}: {e}")
+
+
+def read_scanned_file(pth: str, stat: os.stat_result) -> ScannedFile:
+    unreadable = ScannedFile(stat.st_size, stat.st_mtime_ns, None, None)
+    try:
+        with open(pth, "rb") as handle:
+            header = read_header(handle)
+    except OSError as e:
+        logger.debug(f"Cannot read {pth}: {e}")
+        return unreadable
+    if header is None:
+        return unreadable
+
+    data, compression_type = header
+    try:
+        version = parse_header_version(data)
+    except ValueError:
+        logger.debug(f"Malformed header in {pth}: {data!r}")
+        return unreadable
+    return ScannedFile(stat.st_size, stat.st_mtime_ns, str(version), compression_type.value)
+
+
+def read_scanned_files(batch: list[tuple[str, os.stat_result]]) -> list[ScannedFile]:
+    return [read_scanned_file(pth, stat) for pth, stat in batch]
+
+
+def scan(root: Path, cache: HeaderCache | None = None, workers: int = SCAN_WORKERS) -> ScanReport:
+    """Reads the version of every .blend file under root. Headers of files that did not change since they were
+    cached are not read again; the others are read in a thread pool and cached"""
+    started = time.perf_counter()
+    root = root.absolute()
+    report = ScanReport(root)
+
+    files: dict[str, ScannedFile] = {}
+    to_read: list[tuple[str, os.stat_result]] = []
+    for pth, stat in walk_blendfiles(root):
+        entry = cache.get(pth, stat) if cache is not None else None
+        if entry is None:
+            to_read.append((pth, stat))
+        else:
+            files[pth] = entry
+    report.cached = len(files)
+
+    if to_read:
+        logger.info(f"Reading {len(to_read)} blendfile headers, {report.cached} are cached")
+        batches = [to_read[i : i + SCAN_BATCH] for i in range(0, len(to_read), SCAN_BATCH)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for batch, entries in zip(batches, pool.map(read_scanned_files, batches)):
+                for (pth, _), entry in zip(batch, entries):
+                    files[pth] = entry
+                    if cache is not None:
+                        cache.put(pth, entry)
+        report.read = len(to_read)
+
+    if cache is not None:
+        cache.forget_missing(root, set(files))
+        cache.save()
+
+    by_version: defaultdict[str | None, list[str]] = defaultdict(list)
+    for pth in sorted(files):
+        by_version[files[pth].version].append(pth)
+    report.unreadable = by_version.pop(None, [])
+    report.versions = dict(sorted(((Version.parse(v), paths) for v, paths in by_version.items()), reverse=True))
+
+    report.seconds = time.perf_counter() - started
+    return report
@@ -11,14 +11,13 @@ from pathlib import Path
 
 from modules._platform import _check_output, _popen, get_platform, reset_locale, set_locale
 from modules.bl_api_manager import lts_blender_version
+from modules.lazy import deferred
 from modules.settings import (
     get_bash_arguments,
     get_blender_startup_arguments,
     get_launch_blender_no_console,
     get_library_folder,
 )
-from modules.task import Task
-from PyQt5.QtCore import pyqtSignal
 from semver import Version
 
 logger = logging.getLogger()
@@ -108,7 +107,8 @@ class BuildInfo:
     # Class variables
     file_version = "1.3"
     # https://www.blender.org/download/lts/
-    lts_tags = lts_blender_version()
+    # Read from the API file on first use instead of on import
+    lts_tags = deferred(lts_blender_version)
 
     # Build variables
     link: str
@@ -119,6 +119,8 @@ class BuildInfo:
     custom_name: str = ""
     is_favorite: bool = False
     custom_executable: str | None = None
+    # SHA-256 of the archive, if the scraper found a published checksum for it
+    checksum: str | None = None
 
     def __post_init__(self):
         if self.branch == "stable" and self.subversion.startswith(self.lts_tags):
@@ -213,6 +215,7 @@ class BuildInfo:
             blinfo["custom_name"],
             blinfo["is_favorite"],
             blinfo.get("custom_executable", ""),
+            blinfo.get("checksum"),
         )
 
     def to_dict(self):
@@ -227,6 +230,7 @@ class BuildInfo:
                     "custom_name": self.custom_name,
                     "is_favorite": self.is_favorite,
                     "custom_executable": self.custom_executable,
+                    "checksum": self.checksum,
                 }
             ],
         }
@@ -351,23 +355,6 @@ def read_blender_version(
     )
 
 
-@dataclass(frozen=True)
-class WriteBuildTask(Task):
-    written = pyqtSignal()
-    error = pyqtSignal()
-
-    path: Path
-    build_info: BuildInfo
-
-    def run(self):
-        try:
-            self.build_info.write_to(self.path)
-            self.written.emit()
-        except Exception:
-            self.error.emit()
-            raise
-
-
 def fill_build_info(
     path: Path,
     archive_name: str | None = None,
@@ -405,29 +392,6 @@ def fill_build_info(
     return build_info
 
 
-@dataclass(frozen=True)
-class ReadBuildTask(Task):
-    path: Path
-    info: BuildInfo | None = None
-    archive_name: str | None = None
-    auto_write: bool = True
-
-    finished = pyqtSignal(BuildInfo)
-    failure = pyqtSignal(Exception)
-
-    def run(self):
-        try:
-            build_info = fill_build_info(self.path, self.archive_name, self.info, self.auto_write)
-            self.finished.emit(build_info)
-
-        except Exception as e:
-            self.failure.emit(e)
-            raise
-
-    def __str__(self):
-        return f"Read build at {self.path}"
-
-
 class LaunchMode: ...
 
 
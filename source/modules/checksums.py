@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import re
+
+# Matches "<hex digest>  <file name>" (sha256sum format, with an optional '*' for binary mode) or a bare digest
+_manifest_line = re.compile(r"^(?P<hash>[0-9a-fA-F]{64})(?:\s+\*?(?P<name>.+))?$")
+
+
+def parse_sha256_manifest(text: str) -> dict[str, str]:
+    """Parses a .sha256 file published next to Blender builds
+
+    Returns:
+        dict[str, str] -- file name to lowercase hex digest. A bare digest is stored under the "" key.
+    """
+    checksums = {}
+    for line in text.splitlines():
+        m = _manifest_line.match(line.strip())
+        if m is not None:
+            checksums[(m.group("name") or "").strip()] = m.group("hash").lower()
+    return checksums
+
+
+def manifest_checksum(text: str, file_name: str) -> str | None:
+    checksums = parse_sha256_manifest(text)
+    return checksums.get(file_name, checksums.get(""))
+
+
+# e.g. blender-4.0.2-linux-x64.tar.xz, whose checksum is in blender-4.0.2.sha256
+_release_name = re.compile(r"^(?P<release>blender-\d+\.\d+[^-]*)-")
+
+
+def checksum_link(link: str, branch: str) -> str | None:
+    """Where the checksum of the archive at `link` is published, if anywhere
+
+    Automated builds publish one next to each archive, stable releases one manifest per release in the same folder.
+    """
+    if branch not in ("stable", "lts"):
+        return f"{link}.sha256"
+
+    folder, _, name = link.rpartition("/")
+    m = _release_name.match(name)
+    if m is None:
+        return None
+    return f"{folder}/{m.group('release')}.sha256"
@@ -5,106 +5,227 @@ import json
 import logging
 import subprocess
 import sys
+from dataclasses import dataclass
 from pathlib import Path
-from typing import NoReturn
+from typing import TYPE_CHECKING, NoReturn
 
-from modules.blendfile_reader import read_blendfile_header
-from modules.build_info import BuildInfo, LaunchMode, LaunchOpenLast, LaunchWithBlendFile, get_args
+from modules import instance_protocol as ipc
+from modules.daemon_client import send_to_daemon
+from modules.lazy import lazy_import
+from modules.library import get_blender_builds
 from modules.settings import get_favorite_path, get_version_specific_queries
 from modules.version_matcher import BasicBuildInfo, BInfoMatcher, VersionSearchQuery
-from threads.library_drawer import get_blender_builds
+
+if TYPE_CHECKING:
+    from modules.build_info import BuildInfo, LaunchMode
+    from semver import Version
 
 logger = logging.getLogger()
 
+# Only needed when there is no daemon to ask, so launching through one does not pay for them
+blendfile_reader = lazy_import("modules.blendfile_reader")
+build_info = lazy_import("modules.build_info")
 
-def cli_launch(
-    file: Path | None = None, version_query: VersionSearchQuery | None = None, open_last: bool = False
-) -> NoReturn:
-    # Search for builds
-    logger.info("Searching for all builds")
+
+@dataclass(frozen=True)
+class LaunchSettings:
+    """The settings a launch is resolved with"""
+
+    favorite_path: str | None
+    version_queries: dict[Version, VersionSearchQuery]
+
+    @classmethod
+    def read(cls) -> LaunchSettings:
+        return cls(get_favorite_path(), get_version_specific_queries())
+
+
+def read_library() -> list[BuildInfo]:
+    """Every build in the library with a .blinfo file, newest first"""
     builds: list[BuildInfo] = []
     for build, _ in get_blender_builds(folders=("stable", "daily", "experimental", "custom")):
         if (blinfo := build / ".blinfo").exists():
             with blinfo.open("r", encoding="utf-8") as f:
                 blinfo = json.load(f)
             with contextlib.suppress(Exception):
-                info = BuildInfo.from_dict(str(build), blinfo["blinfo"][0])
+                info = build_info.BuildInfo.from_dict(str(build), blinfo["blinfo"][0])
                 builds.append(info)
 
     builds.sort(reverse=True)
+    return builds
 
-    if version_query is None and file is None and (path := get_favorite_path()):
-        logger.info("Launching quick launch build")
-        for build in builds:
-            if build.link == path:
-                launch_mode = None
-                if open_last:
-                    launch_mode = LaunchOpenLast()
 
-                args = get_args(build, launch_mode=launch_mode, linux_nohup=False)
-                logger.info(f"Launching build with args: {args}")
-                proc = subprocess.Popen(args, shell=True)
-                sys.exit(proc.wait())
+def build_label(info: BuildInfo) -> str:
+    return f"{Path(info.link).parent.stem}/{info.full_semversion}"
 
+
+def build_index(builds: list[BuildInfo]) -> tuple[dict[BasicBuildInfo, BuildInfo], BInfoMatcher]:
+    """A matcher for the builds, and the build each of its matches stands for"""
     basics = {BasicBuildInfo.from_buildinfo(b): b for b in builds}
+    return basics, BInfoMatcher(tuple(basics))
+
+
+def query_for_version(version: Version, all_queries: dict[Version, VersionSearchQuery]) -> VersionSearchQuery:
+    """The query that picks the build for files saved with the version: the one saved for it, or its latest patch"""
+    if version in all_queries:
+        return all_queries[version]
+    return VersionSearchQuery(version.major, version.minor, "^")
+
+
+def resolve_launch(
+    builds: list[BuildInfo],
+    file: Path | None = None,
+    version_query: VersionSearchQuery | None = None,
+    open_last: bool = False,
+    index: tuple[dict[BasicBuildInfo, BuildInfo], BInfoMatcher] | None = None,
+    settings: LaunchSettings | None = None,
+) -> tuple[VersionSearchQuery | None, list[BuildInfo], LaunchMode | None]:
+    """Finds the builds to choose from for a launch: the quick launch build if nothing was asked for, or the builds
+    matching the query or the version the file was saved with. Returns the query used, the builds and how to launch
+    them. Pass the build_index of the builds and the settings to reuse them across launches"""
+    if settings is None:
+        settings = LaunchSettings.read()
 
-    matcher = BInfoMatcher(tuple(basics.keys()))
+    launch_mode: LaunchMode | None = None
+    if file is not None:
+        launch_mode = build_info.LaunchWithBlendFile(file)
+    if open_last:
+        launch_mode = build_info.LaunchOpenLast()
 
-    all_queries = get_version_specific_queries()
+    if version_query is None and file is None and (path := settings.favorite_path):
+        logger.info("Launching quick launch build")
+        for build in builds:
+            if build.link == path:
+                return None, [build], launch_mode
 
-    if version_query is not None:
-        query = version_query
+    basics, matcher = index if index is not None else build_index(builds)
+
+    query = version_query
 
     if file is not None and file.exists():
         logger.info("Reading file header...")
-        header = read_blendfile_header(file)
+        header = blendfile_reader.read_blendfile_header(file)
 
         logger.debug(f"File header: {header}")
 
         if header is not None:
-            v = header.version
-            if v in all_queries:
-                query = all_queries[v]
-            else:
-                query = VersionSearchQuery(v.major, v.minor, "^")
+            query = query_for_version(header.version, settings.version_queries)
 
     if query is None:
         logger.warning("Could not read file header and no version was provided! defaulting to ^.^.^")
         query = VersionSearchQuery("^", "^", "^")
 
-    matches = matcher.match(query)
+    return query, [basics[b] for b in matcher.match(query)], launch_mode
+
+
+def resolve_with_daemon(
+    launcher: str, file: Path | None, version_query: VersionSearchQuery | None, open_last: bool
+) -> tuple[str, list[tuple[str, list[str] | str]]] | None:
+    """Lets the daemon resolve the launch against the library it keeps in memory. Returns a message for when nothing
+    matches and the (label, args) of each match, or None if there is no daemon to ask"""
+    answer = send_to_daemon(
+        ipc.request(
+            ipc.LAUNCH,
+            launcher,
+            file=str(file.absolute()) if file is not None else None,
+            version=str(version_query) if version_query is not None else None,
+            open_last=open_last,
+        )
+    )
+    if answer is None:
+        return None
+    if answer.get("status") != ipc.OK:
+        logger.info(f"Reading the library, the daemon answered {answer.get('status')}: {answer.get('message')}")
+        return None
+    return answer.get("message", ""), [(match["name"], match["args"]) for match in answer.get("matches", [])]
 
-    launch_mode: LaunchMode | None = None
-    if file is not None:
-        launch_mode = LaunchWithBlendFile(file)
-    if open_last:
-        launch_mode = LaunchOpenLast()
 
-    if len(matches) > 1:
-        print(f"Found {len(matches)} matching builds:")
-        for i, b in enumerate(matches):
-            info = basics[b]
-            print(f"- {i}: {Path(info.link).parent.stem}/{info.full_semversion}")
+def cli_launch(
+    file: Path | None = None,
+    version_query: VersionSearchQuery | None = None,
+    open_last: bool = False,
+    launcher: str = "",
+) -> NoReturn:
+    resolved = resolve_with_daemon(launcher, file, version_query, open_last)
+    if resolved is not None:
+        no_match, candidates = resolved
+    else:
+        # Search for builds
+        logger.info("Searching for all builds")
+        query, matches, launch_mode = resolve_launch(read_library(), file, version_query, open_last)
+        no_match = f"No builds match {query}"
+        candidates = [
+            (build_label(b), build_info.get_args(b, launch_mode=launch_mode, linux_nohup=False)) for b in matches
+        ]
+
+    if not candidates:
+        print(no_match)
+        sys.exit(1)
+
+    choice = 0
+    if len(candidates) > 1:
+        print(f"Found {len(candidates)} matching builds:")
+        for i, (label, _) in enumerate(candidates):
+            print(f"- {i}: {label}")
 
         # Enter which build to launch?
         while True:
             try:
-                choice = int(input(f"\nEnter the number of the build you want to launch (0-{len(matches)-1}): "))
-                if 0 <= choice < len(matches):
+                choice = int(input(f"\nEnter the number of the build you want to launch (0-{len(candidates)-1}): "))
+                if 0 <= choice < len(candidates):
                     break
             except ValueError:
                 print("Invalid input!")
 
-        build = matches[choice]
-        build_info = basics[build]
-
-    if len(matches) == 1:
-        build = matches[0]
-        build_info = basics[build]
-
-    args = get_args(build_info, launch_mode=launch_mode, linux_nohup=False)
-    logger.info(f"Launching build: {build}")
+    label, args = candidates[choice]
+    logger.info(f"Launching build: {label}")
     logger.info(f"With args: {args}")
     proc = subprocess.Popen(args, shell=True)
 
     sys.exit(proc.wait())
+
+
+def cli_scan(root: Path, workers: int, use_cache: bool = True, show_files: bool = False) -> NoReturn:
+    """Reports which Blender versions the .blend files under root were saved with, and which installed builds would
+    open them. Exits with 1 if files need a version that no installed build matches"""
+    from modules.blendfile_scanner import HeaderCache, get_header_cache_path, scan
+
+    cache = HeaderCache(get_header_cache_path()) if use_cache else None
+    report = scan(root, cache, workers)
+
+    files = sum(len(paths) for paths in report.versions.values()) + len(report.unreadable)
+    print(
+        f"{files} .blend files under {report.root}: read {report.read} headers, {report.cached} were cached,"
+        f" in {report.seconds:.2f}s"
+    )
+
+    basics, matcher = build_index(read_library())
+    all_queries = get_version_specific_queries()
+    needed: dict[str, BuildInfo] = {}
+    missing = []
+    for version, paths in report.versions.items():
+        query = query_for_version(version, all_queries)
+        matches = [basics[b] for b in matcher.match(query)]
+        labels = ", ".join(build_label(b) for b in matches) or "no installed build"
+        saved = " (saved query)" if version in all_queries else ""
+        print(f"\n{version.major}.{version.minor}: {len(paths)} files, {query}{saved} -> {labels}")
+        if show_files:
+            for pth in paths:
+                print(f"    {pth}")
+
+        if not matches:
+            missing.append(f"{version.major}.{version.minor}")
+        needed.update((b.link, b) for b in matches)
+
+    if report.unreadable:
+        print(f"\n{len(report.unreadable)} files are not readable blendfiles")
+        if show_files:
+            for pth in report.unreadable:
+                print(f"    {pth}")
+
+    print("\nBuilds to keep installed:")
+    for build in sorted(needed.values(), reverse=True):
+        print(f"- {build_label(build)}  {build.link}")
+    if missing:
+        print(f"\nNo installed build opens files from {', '.join(missing)}")
+        sys.exit(1)
+    sys.exit(0)
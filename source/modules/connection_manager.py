@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import logging
 import ssl
 import sys
-import logging
+import threading
+import time
+import weakref
+from dataclasses import dataclass
 from typing import TYPE_CHECKING, Union
 
 from modules._platform import get_cwd, get_platform_full, is_frozen
+from modules.http_cache import HTTPCache, get_http_cache_path
+from modules.http_recorder import get_recorder, get_replayer
+from modules.request_metrics import RequestMetrics, RequestRecord, host_of
+from modules.retry_policy import RetryPolicy
 from modules.settings import (
     get_proxy_host,
     get_proxy_password,
@@ -13,10 +21,12 @@ from modules.settings import (
     get_proxy_type,
     get_proxy_user,
     get_use_custom_tls_certificates,
+    get_use_http_cache,
     get_user_id,
 )
-from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
 from urllib3 import PoolManager, ProxyManager, make_headers
+from urllib3.util.retry import Retry
 from urllib3.contrib.socks import SOCKSProxyManager
 
 if TYPE_CHECKING:
@@ -33,10 +43,25 @@ proxy_types_chemes = {
 
 REQUEST_MANAGER = Union[PoolManager, ProxyManager, SOCKSProxyManager]
 
+# Host pools that served no request for this many seconds are closed
+POOL_IDLE_TIMEOUT = 90
+
+# urllib3 only follows redirects, retrying failed requests is left to the RetryPolicy
+NO_RETRIES = Retry(total=None, connect=0, read=0, status=0, other=0, redirect=10)
+
 
-# TODO
-# It is impossible to kill existing instance of PoolManager
-# and create a new one without restarting application
+@dataclass
+class HostStats:
+    requests: int = 0
+    connections: int = 0
+
+    @property
+    def reused(self) -> int:
+        """Requests that were served by an already open connection"""
+        return max(self.requests - self.connections, 0)
+
+    def __str__(self):
+        return f"{self.requests} requests over {self.connections} connections ({self.reused} reused)"
 
 
 class ConnectionManager(QObject):
@@ -49,11 +74,10 @@ class ConnectionManager(QObject):
             proxy_type = get_proxy_type()
         self.proxy_type = proxy_type
         self.manager: REQUEST_MANAGER | None = None
+        self.http_cache = self._create_http_cache()
 
         # Basic Headers
-        agent = f"Blender-Launcher-v2/v.{self.version!s}/{get_platform_full()}/UserID-{get_user_id()}"
-        self._headers = {"user-agent": agent}
-        logger.info(f"Connection Manager Header: {agent}")
+        self._headers = self._create_headers()
         # Get custom certificates file path
         if is_frozen() is True:
             self.cacert = sys._MEIPASS + "/files/custom.pem"  # noqa: SLF001
@@ -61,88 +85,318 @@ class ConnectionManager(QObject):
             self.cacert = (get_cwd() / "source/resources/certificates/custom.pem").as_posix()
 
         self.request_counter = 0
+        # Origins that are served from somewhere else, e.g. a local stand-in server:
+        # {"https://builder.blender.org": "http://127.0.0.1:8000/builder.blender.org"}
+        self.origin_overrides: dict[str, str] = {}
+        self.metrics = RequestMetrics()
+        # Shared by the scraper, downloads and the updater
+        self.retry_policy = RetryPolicy()
+
+        # --record-http / --replay-http
+        self.recorder = get_recorder()
+        self.replayer = get_replayer()
+        if self.replayer is not None:
+            # Recorded retries are replayed in order, there is nothing to wait for
+            self.retry_policy = RetryPolicy(base_delay=0)
+        # Sockets that already served a request, to tell reused connections from new ones.
+        # urllib3 reconnects dropped connections in place, so the connection objects themselves can't be used
+        self._seen_sockets = weakref.WeakSet()
+
+        # Pools are kept alive between scraper phases and downloads, and evicted once idle
+        self._pool_activity: dict[object, tuple[int, float]] = {}
+        self._evicted_stats: dict[str, HostStats] = {}
+        self._pool_lock = threading.Lock()
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setInterval(POOL_IDLE_TIMEOUT * 1000 // 2)
+        self.idle_timer.timeout.connect(self.evict_idle_pools)
+        self.idle_timer.start()
+
+    @staticmethod
+    def _host_of(pool_key) -> str:
+        if pool_key.key_port is None:
+            return f"{pool_key.key_scheme}://{pool_key.key_host}"
+        return f"{pool_key.key_scheme}://{pool_key.key_host}:{pool_key.key_port}"
+
+    def _retire_stats(self, pool_key, pool):
+        """Keeps the statistics of a pool that is about to be closed"""
+        stats = self._evicted_stats.setdefault(self._host_of(pool_key), HostStats())
+        stats.requests += pool.num_requests
+        stats.connections += pool.num_connections
+
+    def evict_idle_pools(self, idle_timeout: float = POOL_IDLE_TIMEOUT):
+        """Closes the pools of hosts that have not been requested from in `idle_timeout` seconds"""
+        if self.manager is None:
+            return
+
+        now = time.monotonic()
+        with self._pool_lock:
+            for key in self.manager.pools.keys():  # noqa: SIM118 -- iterating a RecentlyUsedContainer directly raises
+                pool = self.manager.pools.get(key)
+                if pool is None:
+                    continue
+
+                num_requests, last_active = self._pool_activity.get(key, (-1, now))
+                if pool.num_requests != num_requests:
+                    self._pool_activity[key] = (pool.num_requests, now)
+                elif now - last_active >= idle_timeout:
+                    logger.debug(f"Closing idle connection pool for {self._host_of(key)}")
+                    self._retire_stats(key, pool)
+                    self._pool_activity.pop(key)
+                    self.manager.pools.pop(key, None)
+
+    def connection_stats(self) -> dict[str, HostStats]:
+        """Requests and newly opened connections per host, since the manager was set up"""
+        with self._pool_lock:
+            stats = {host: HostStats(s.requests, s.connections) for host, s in self._evicted_stats.items()}
+            if self.manager is not None:
+                for key in self.manager.pools.keys():  # noqa: SIM118 -- iterating a RecentlyUsedContainer directly raises
+                    pool = self.manager.pools.get(key)
+                    if pool is None:
+                        continue
+                    host_stats = stats.setdefault(self._host_of(key), HostStats())
+                    host_stats.requests += pool.num_requests
+                    host_stats.connections += pool.num_connections
+        return stats
+
+    def log_connection_stats(self):
+        for host, stats in self.connection_stats().items():
+            logger.debug(f"{host}: {stats}")
+
+    def log_request_metrics(self, since: float | None = None):
+        for line in self.metrics.summary(since):
+            logger.debug(line)
+
+    @property
+    def buffers_responses(self) -> bool:
+        """Whether GET responses have to be read in full to be recorded.
+
+        Callers that can consume a body while it arrives should preload it instead when this is set, so
+        the response still reaches the recording. The HTTP cache stores streamed responses as they are read.
+        """
+        return self.recorder is not None
 
     def setup(self):
+        self.manager = self._create_manager()
+
+    def reconfigure(self):
+        """Applies the current connection settings without restarting the application.
+
+        A new pool manager is swapped in for every following request. Requests that are already in flight
+        keep their connections, which are closed instead of being returned once they are released.
+        """
+        self.proxy_type = get_proxy_type()
+        self._headers = self._create_headers()
+        self.http_cache = self._create_http_cache()
+        manager = self._create_manager()
+
+        with self._pool_lock:
+            old_manager, self.manager = self.manager, manager
+            if old_manager is not None:
+                for key in old_manager.pools.keys():  # noqa: SIM118 -- iterating a RecentlyUsedContainer directly raises
+                    pool = old_manager.pools.get(key)
+                    if pool is not None:
+                        self._retire_stats(key, pool)
+            self._pool_activity.clear()
+
+        if old_manager is not None:
+            old_manager.clear()
+        logger.info("Connection settings were applied")
+
+    def _create_headers(self):
+        agent = f"Blender-Launcher-v2/v.{self.version!s}/{get_platform_full()}/UserID-{get_user_id()}"
+        logger.info(f"Connection Manager Header: {agent}")
+        return {"user-agent": agent}
+
+    @staticmethod
+    def _create_http_cache() -> HTTPCache | None:
+        # Cached responses would keep requests out of recordings, and conditional ones out of replays
+        if not get_use_http_cache() or get_recorder() is not None or get_replayer() is not None:
+            return None
+        return HTTPCache(get_http_cache_path())
+
+    def _create_manager(self) -> REQUEST_MANAGER:
         if self.proxy_type == 0:  # Use generic requests
             if get_use_custom_tls_certificates():
                 # Generic requests with CERT_REQUIRED
-                self.manager = PoolManager(
+                return PoolManager(
+                    num_pools=50,
+                    maxsize=10,
+                    headers=self._headers,
+                    cert_reqs=ssl.CERT_REQUIRED,
+                    ca_certs=self.cacert,
+                )
+            # Generic requests w/o CERT_REQUIRED
+            return PoolManager(num_pools=50, maxsize=10, headers=self._headers)
+
+        # Use Proxy
+        ip = get_proxy_host()
+        port = get_proxy_port()
+        scheme = proxy_types_chemes[self.proxy_type]
+
+        if self.proxy_type > 2:  # Use SOCKS Proxy
+            if get_use_custom_tls_certificates():
+                # SOCKS Proxy with CERT_REQUIRED
+                return SOCKSProxyManager(
+                    proxy_url=f"{scheme}{ip}:{port}",
                     num_pools=50,
                     maxsize=10,
                     headers=self._headers,
+                    username=get_proxy_user(),
+                    password=get_proxy_password(),
                     cert_reqs=ssl.CERT_REQUIRED,
                     ca_certs=self.cacert,
                 )
+            # SOCKS Proxy w/o CERT_REQUIRED
+            return SOCKSProxyManager(
+                proxy_url=f"{scheme}{ip}:{port}",
+                num_pools=50,
+                maxsize=10,
+                headers=self._headers,
+                username=get_proxy_user(),
+                password=get_proxy_password(),
+            )
+
+        # Use HTTP Proxy
+        # HTTP Proxy autherification headers
+        auth_headers = make_headers(proxy_basic_auth=f"{get_proxy_user()}:{get_proxy_password()}")
+
+        if get_use_custom_tls_certificates():
+            # HTTP Proxy with CERT_REQUIRED
+            return ProxyManager(
+                proxy_url=f"{scheme}{ip}:{port}",
+                num_pools=50,
+                maxsize=10,
+                headers=self._headers,
+                proxy_headers=auth_headers,
+                cert_reqs=ssl.CERT_REQUIRED,
+                ca_certs=self.cacert,
+            )
+        # HTTP Proxy w/o CERT_REQUIRED
+        return ProxyManager(
+            proxy_url=f"{scheme}{ip}:{port}",
+            num_pools=50,
+            maxsize=10,
+            headers=self._headers,
+            proxy_headers=auth_headers,
+        )
+
+    def resolve_url(self, url: str) -> str:
+        for origin, target in self.origin_overrides.items():
+            if url == origin or url.startswith(f"{origin}/"):
+                return target + url[len(origin) :]
+        return url
+
+    def raw_request(self, _method, _url, fields=None, headers=None, use_cache=True, retry=True, **urlopen_kw):
+        """Sends a request through the current pool manager, raising urllib3 errors to the caller
+
+        Failed requests are retried according to the retry policy, unless `retry=False` is passed by callers
+        that retry on their own. GET requests go through the HTTP cache when it is enabled, responses that are
+        not preloaded are stored once the caller read them to the end. With `use_cache=False` the cached
+        response is ignored and replaced by a fresh one.
+        """
+        manager = self.manager
+        assert manager is not None
+        urlopen_kw.setdefault("retries", NO_RETRIES)
+        _url = self.resolve_url(_url)
+
+        cache = self.http_cache
+        if cache is None or _method.upper() != "GET" or fields is not None:
+            return self._send(_method, _url, fields, headers, retry, **urlopen_kw)
+        stream = not urlopen_kw.get("preload_content", True)
+
+        entry = cache.lookup(_method, _url) if use_cache else None
+        cached = cache.response(entry, stream) if entry is not None else None
+        if cached is not None and entry.is_fresh:
+            logger.debug(f"Using cached response for {_url}")
+            self.metrics.add(
+                RequestRecord(
+                    host_of(_url), time.monotonic(), _method, _url, cached.status, 0, 0, entry.size, False, cached=True
+                )
+            )
+            return cached
+
+        if cached is not None and entry.validators:
+            # Defaults are only applied by urllib3 when no headers are given at all
+            headers = {**manager.headers, **(headers or {}), **entry.validators}
+
+        try:
+            r = self._send(_method, _url, fields, headers, retry, **urlopen_kw)
+        except Exception:
+            if cached is not None:
+                cached.close()
+            raise
+
+        if cached is not None and r.status == 304:
+            logger.debug(f"Cached response for {_url} is still valid")
+            cache.revalidated(entry, r)
+            if stream:
+                r.release_conn()
+            return cached
+        if cached is not None:
+            cached.close()
+
+        if stream:
+            return cache.tee(_method, _url, r)
+        cache.store(_method, _url, r)
+        return r
+
+    def _send(self, _method, _url, fields=None, headers=None, retry=True, **urlopen_kw):
+        # The manager is read on every attempt, a retry after reconfigure() must not use the one it cleared
+        def attempt():
+            manager = self.manager
+            assert manager is not None
+            return self._send_once(manager, _method, _url, fields, headers, **urlopen_kw)
+
+        if not retry:
+            return attempt()
+        return self.retry_policy.run(host_of(_url), attempt)
+
+    def _send_once(self, manager: REQUEST_MANAGER, _method, _url, fields=None, headers=None, **urlopen_kw):
+        """
+        Counter for request. Not supposed to exceed 7 requests
+        4 requests for Blender Builder
+        1 requests for Blender Download
+        3 requests for GitHub
+        """
+        self.request_counter += 1
+        logger.debug(f"Request Counter: {self.request_counter}")
+
+        # The body is read here instead of by urllib3, so time to first byte and total time can be told apart
+        preload_content = urlopen_kw.pop("preload_content", True)
+        started = time.monotonic()
+        try:
+            if self.replayer is not None:
+                r = self.replayer.response(_method, _url)
+            else:
+                r = manager.request(_method, _url, fields, headers, preload_content=False, **urlopen_kw)
+            ttfb = time.monotonic() - started
+
+            sock = getattr(r.connection, "sock", None)
+            reused = sock is not None and sock in self._seen_sockets
+            if sock is not None:
+                self._seen_sockets.add(sock)
+
+            if preload_content:
+                r.read(cache_content=True)
+                total = time.monotonic() - started
+                size = len(r.data or b"")
             else:
-                # Generic requests w/o CERT_REQUIRED
-                self.manager = PoolManager(num_pools=50, maxsize=10, headers=self._headers)
-        else:  # Use Proxy
-            ip = get_proxy_host()
-            port = get_proxy_port()
-            scheme = proxy_types_chemes[self.proxy_type]
-
-            if self.proxy_type > 2:  # Use SOCKS Proxy
-                if get_use_custom_tls_certificates():
-                    # SOCKS Proxy with CERT_REQUIRED
-                    self.manager = SOCKSProxyManager(
-                        proxy_url=f"{scheme}{ip}:{port}",
-                        num_pools=50,
-                        maxsize=10,
-                        headers=self._headers,
-                        username=get_proxy_user(),
-                        password=get_proxy_password(),
-                        cert_reqs=ssl.CERT_REQUIRED,
-                        ca_certs=self.cacert,
-                    )
-                else:
-                    # SOCKS Proxy w/o CERT_REQUIRED
-                    self.manager = SOCKSProxyManager(
-                        proxy_url=f"{scheme}{ip}:{port}",
-                        num_pools=50,
-                        maxsize=10,
-                        headers=self._headers,
-                        username=get_proxy_user(),
-                        password=get_proxy_password(),
-                    )
-            else:  # Use HTTP Proxy
-                # HTTP Proxy autherification headers
-                auth_headers = make_headers(proxy_basic_auth=f"{get_proxy_user()}:{get_proxy_password()}")
-
-                if get_use_custom_tls_certificates():
-                    # HTTP Proxy with CERT_REQUIRED
-                    self.manager = ProxyManager(
-                        proxy_url=f"{scheme}{ip}:{port}",
-                        num_pools=50,
-                        maxsize=10,
-                        headers=self._headers,
-                        proxy_headers=auth_headers,
-                        cert_reqs=ssl.CERT_REQUIRED,
-                        ca_certs=self.cacert,
-                    )
-                else:
-                    # HTTP Proxy w/o CERT_REQUIRED
-                    self.manager = ProxyManager(
-                        proxy_url=f"{scheme}{ip}:{port}",
-                        num_pools=50,
-                        maxsize=10,
-                        headers=self._headers,
-                        proxy_headers=auth_headers,
-                    )
-
-    def request(self, _method, _url, fields=None, headers=None, **urlopen_kw):
+                total = None
+                size = int(r.headers.get("Content-Length", 0))
+        except Exception:
+            self.metrics.add(
+                RequestRecord(host_of(_url), started, _method, _url, None, time.monotonic() - started, None, 0, False)
+            )
+            raise
+
+        self.metrics.add(RequestRecord(host_of(_url), started, _method, _url, r.status, ttfb, total, size, reused))
+        if self.recorder is not None and preload_content:
+            self.recorder.add(_method, _url, r, ttfb, total)
+        return r
+
+    def request(self, _method, _url, fields=None, headers=None, use_cache=True, retry=True, **urlopen_kw):
         try:
-            assert self.manager is not None
-
-            """
-            Counter for request. Not supposed to exceed 7 requests
-            4 requests for Blender Builder
-            1 requests for Blender Download
-            3 requests for GitHub
-            """
-            self.request_counter += 1
-            logger.debug(f"Request Counter: {self.request_counter}")
-
-            return self.manager.request(_method, _url, fields, headers, **urlopen_kw)
+            return self.raw_request(_method, _url, fields, headers, use_cache, retry, **urlopen_kw)
         except Exception:
             self.error.emit()
             return None
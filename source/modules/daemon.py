@@ -0,0 +1,501 @@
+"""Blender Launcher without windows, for machines without a desktop session. Started with `main.py daemon`.
+
+Keeps every build of the library in memory and follows changes to the library folders, checks for new builds on
+the refresh scheduler and answers `list`, `launch`, `install` and `status` requests on a local socket (see
+modules.instance_protocol and modules.daemon_client), so clients do not read the library themselves.
+"""
+
+from __future__ import annotations
+
+import logging
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from modules import instance_protocol as ipc
+from modules._platform import get_config_file, get_platform
+from modules.build_info import BuildInfo, get_args, parse_blender_ver
+from modules.checksums import checksum_link
+from modules.cli_launching import LaunchSettings, build_index, build_label, resolve_launch
+from modules.connection_manager import ConnectionManager
+from modules.daemon_client import daemon_address
+from modules.library import library_subfolder
+from modules.refresh_scheduler import RefreshScheduler, branch_group
+from modules.settings import (
+    create_library_folders,
+    get_check_for_new_builds_automatically,
+    get_deduplicate_builds,
+    get_install_template,
+    get_library_folder,
+    get_new_builds_check_frequency,
+    get_scrape_automated_builds,
+    get_scrape_stable_builds,
+    get_use_archive_cache,
+    get_worker_thread_count,
+)
+from modules.tasks import TaskQueue
+from modules.version_matcher import BasicBuildInfo, BInfoMatcher, VersionSearchQuery
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+from PyQt5.QtNetwork import QLocalServer
+from semver import Version
+from threads.build_reader import ReadBuildTask
+from threads.deduplicator import DeduplicateTask, DeduplicationReport
+from threads.downloader import DownloadTask
+from threads.extractor import ExtractTask
+from threads.library_drawer import DrawLibraryTask
+from threads.remover import RemovalTask
+from threads.renamer import RenameTask
+from threads.scraper import Scraper
+from threads.template_installer import TemplateTask
+
+if TYPE_CHECKING:
+    from PyQt5.QtCore import QCoreApplication
+    from PyQt5.QtNetwork import QLocalSocket
+
+logger = logging.getLogger()
+
+BUILD_FOLDERS = ("stable", "daily", "experimental", "custom")
+# Milliseconds to wait for a burst of changes in the library folders to settle before reading them again
+RESCAN_DELAY = 1000
+
+
+def download_label(info: BuildInfo) -> str:
+    return f"{info.branch}/{info.full_semversion}"
+
+
+def describe(info: BuildInfo, name: str) -> dict:
+    return {
+        "name": name,
+        "link": info.link,
+        "version": str(info.full_semversion),
+        "branch": info.branch,
+        "build_hash": info.build_hash,
+        "commit_time": info.commit_time.isoformat(),
+        "custom_name": info.custom_name,
+    }
+
+
+def match(
+    query: VersionSearchQuery, index: tuple[dict[BasicBuildInfo, BuildInfo], BInfoMatcher]
+) -> list[BuildInfo]:
+    basics, matcher = index
+    return [basics[b] for b in matcher.match(query)]
+
+
+class BuildInstall(QObject):
+    """Downloads, extracts and reads a build into the library, the steps DownloadWidget takes without the widget"""
+
+    finished = pyqtSignal(object)  # Path of the installed build, None if it failed
+
+    def __init__(self, daemon: LauncherDaemon, build_info: BuildInfo):
+        super().__init__(daemon)
+        self.daemon = daemon
+        self.build_info = build_info
+        self.source_file: Path | None = None
+        self.build_dir: Path | None = None
+
+    def start(self):
+        task = DownloadTask(
+            manager=self.daemon.cm,
+            link=self.build_info.link,
+            use_cache=get_use_archive_cache(),
+            # Stable builds cached before checksums were scraped have none, their manifest is fetched instead
+            checksum=self.build_info.checksum,
+            checksum_link=checksum_link(self.build_info.link, self.build_info.branch),
+        )
+        task.finished.connect(self.extract)
+        task.failure.connect(self.failed)
+        self.daemon.task_queue.append(task)
+
+    def extract(self, source: Path):
+        self.source_file = source
+        destination = self.daemon.library_folder / library_subfolder(self.build_info.branch)
+        task = ExtractTask(file=source, destination=destination)
+        task.finished.connect(self.install_template)
+        task.failure.connect(self.failed)
+        self.daemon.task_queue.append(task)
+
+    def install_template(self, build_dir: Path):
+        self.build_dir = build_dir
+        if get_install_template():
+            task = TemplateTask(destination=build_dir)
+            task.finished.connect(self.deduplicate)
+            self.daemon.task_queue.append(task)
+        else:
+            self.deduplicate()
+
+    def deduplicate(self):
+        assert self.build_dir is not None
+        if get_deduplicate_builds():
+            task = DeduplicateTask(path=self.build_dir)
+            task.finished.connect(self.read_info)
+            # The build is installed either way, it just takes more space
+            task.failure.connect(lambda _: self.read_info(DeduplicationReport()))
+            self.daemon.task_queue.append(task)
+        else:
+            self.read_info()
+
+    def read_info(self, *_):
+        assert self.build_dir is not None
+        if self.daemon.platform == "Linux":
+            archive_name = Path(self.build_info.link).with_suffix("").stem
+        else:
+            archive_name = Path(self.build_info.link).stem
+
+        ver = parse_blender_ver(self.build_dir.name, search=True)
+        task = ReadBuildTask(
+            self.build_dir,
+            info=BuildInfo(
+                str(self.build_dir),
+                subversion=str(Version(ver.major, ver.minor, ver.patch, prerelease=ver.prerelease)),
+                build_hash=None,
+                commit_time=self.build_info.commit_time,
+                branch=self.build_info.branch,
+            ),
+            archive_name=archive_name,
+        )
+        task.finished.connect(self.rename)
+        task.failure.connect(self.failed)
+        self.daemon.task_queue.append(task)
+
+    def rename(self, info: BuildInfo):
+        assert self.build_dir is not None
+        task = RenameTask(src=self.build_dir, dst_name=f"blender-{info.full_semversion}")
+        task.finished.connect(self.done)
+        task.failure.connect(self.failed)
+        self.daemon.task_queue.append(task)
+
+    def done(self, path: Path):
+        assert self.source_file is not None
+        self.daemon.task_queue.append(RemovalTask(self.source_file))
+        self.finished.emit(path)
+
+    def failed(self, *_):
+        self.finished.emit(None)
+
+
+class LauncherDaemon(QObject):
+    def __init__(self, app: QCoreApplication, version: Version, offline: bool = False):
+        super().__init__()
+        self.app = app
+        self.version = version
+        self.offline = offline
+        self.platform = get_platform()
+        self.library_folder = Path(get_library_folder())
+        create_library_folders(self.library_folder)
+
+        self.cm = ConnectionManager(version=version)
+        self.cm.setup()
+
+        self.task_queue = TaskQueue(worker_count=get_worker_thread_count(), parent=self)
+        self.task_queue.start()
+
+        # The build index, by folder
+        self.builds: dict[Path, BuildInfo] = {}
+        # Modification times of their .blinfo files, to notice changes like a new custom name
+        self.blinfo_mtimes: dict[Path, int] = {}
+        # The builds newest first, and a matcher for them, built when first needed after the index changes
+        self._sorted: list[BuildInfo] | None = None
+        self._index: tuple[dict[BasicBuildInfo, BuildInfo], BInfoMatcher] | None = None
+        # Read when first needed after the settings file changes
+        self._launch_settings: LaunchSettings | None = None
+        self.reading: set[Path] = set()
+        self.scanned: set[Path] = set()
+        self.scanning = False
+        self.rescan_pending = False
+        self.library_read = False
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.addPaths([str(self.library_folder / folder) for folder in BUILD_FOLDERS])
+        self.rescan_timer = QTimer(self)
+        self.rescan_timer.setSingleShot(True)
+        self.rescan_timer.setInterval(RESCAN_DELAY)
+        self.rescan_timer.timeout.connect(self.scan_library)
+        self.watcher.directoryChanged.connect(lambda _: self.rescan_timer.start())
+        self.settings_file = get_config_file()
+        self.watcher.addPath(str(self.settings_file))
+        self.watcher.fileChanged.connect(self.settings_changed)
+
+        # Builds available for download as of the last check, by link
+        self.available: dict[str, BuildInfo] = {}
+        self.found: dict[str, BuildInfo] = {}
+        self.checking_groups: set[str] = set()
+        self.new_build_groups: set[str] = set()
+        self.check_failed = False
+        self.installs: dict[str, BuildInstall] = {}
+
+        self.scraper = Scraper(self, self.cm)
+        self.scraper.links.connect(self.build_available)
+        self.scraper.error.connect(self.connection_error)
+        self.scraper.stable_error.connect(lambda e: logger.error(f"Failed to check for stable builds: {e}"))
+        self.scraper.finished.connect(self.scraper_finished)
+        self.scheduler = RefreshScheduler(self)
+        self.scheduler.due.connect(self.check_for_builds)
+
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self.new_connection)
+
+    def start(self) -> bool:
+        address = daemon_address()
+        # Left behind by a daemon that did not shut down cleanly
+        QLocalServer.removeServer(address)
+        if not self.server.listen(address):
+            logger.error(f"Cannot listen on {address}: {self.server.errorString()}")
+            return False
+        logger.info(f"Listening on {address}")
+
+        self.scan_library()
+        if not self.offline:
+            self.check_for_builds(True, True)
+        return True
+
+    def stop(self):
+        self.scheduler.stop()
+        self.server.close()
+        self.task_queue.fullstop()
+        if self.scraper.isRunning():
+            self.scraper.terminate()
+        for thread in (*self.task_queue.workers, self.scraper):
+            thread.wait()
+
+    # Library
+
+    def scan_library(self):
+        if self.scanning:
+            self.rescan_pending = True
+            return
+
+        self.scanning = True
+        self.scanned = set()
+        task = DrawLibraryTask(folders=BUILD_FOLDERS)
+        task.found.connect(self.build_found)
+        task.finished.connect(self.scan_finished)
+        self.task_queue.append(task)
+
+    def build_found(self, path: Path):
+        self.scanned.add(path)
+        try:
+            mtime = (path / ".blinfo").stat().st_mtime_ns
+        except OSError:
+            mtime = 0
+        if path in self.reading or (path in self.builds and self.blinfo_mtimes.get(path) == mtime):
+            return
+
+        self.reading.add(path)
+        self.blinfo_mtimes[path] = mtime
+        task = ReadBuildTask(path)
+        task.finished.connect(partial(self.build_read, path))
+        task.failure.connect(partial(self.build_unreadable, path))
+        self.task_queue.append(task)
+
+    def build_read(self, path: Path, info: BuildInfo):
+        self.reading.discard(path)
+        self.builds[path] = info
+        self.library_changed()
+        # Also notices changes to the .blinfo file inside
+        self.watcher.addPath(str(path))
+
+    def build_unreadable(self, path: Path, error: Exception):
+        self.reading.discard(path)
+        self.blinfo_mtimes.pop(path, None)
+        logger.error(f"Failed to read build at {path}: {error}")
+
+    def scan_finished(self):
+        for path in self.builds.keys() - self.scanned:
+            del self.builds[path]
+            self.blinfo_mtimes.pop(path, None)
+            self.library_changed()
+
+        self.scanning = False
+        self.library_read = True
+        logger.debug(f"Library read, {len(self.scanned)} builds")
+        if self.rescan_pending:
+            self.rescan_pending = False
+            self.scan_library()
+
+    def library_ready(self) -> bool:
+        return self.library_read and not self.scanning and not self.reading
+
+    def library_changed(self):
+        self._sorted = None
+        self._index = None
+
+    def sorted_builds(self) -> list[BuildInfo]:
+        if self._sorted is None:
+            self._sorted = sorted(self.builds.values(), reverse=True)
+        return self._sorted
+
+    def library_index(self) -> tuple[dict[BasicBuildInfo, BuildInfo], BInfoMatcher]:
+        if self._index is None:
+            self._index = build_index(self.sorted_builds())
+        return self._index
+
+    def settings_changed(self, path: str):
+        if path != str(self.settings_file):
+            return
+        self._launch_settings = None
+        # Settings are saved by replacing the file, which drops it from the watcher
+        if path not in self.watcher.files() and self.settings_file.exists():
+            self.watcher.addPath(path)
+
+    def launch_settings(self) -> LaunchSettings:
+        if self._launch_settings is None:
+            self._launch_settings = LaunchSettings.read()
+        return self._launch_settings
+
+    # Checking for new builds
+
+    def check_for_builds(self, stable: bool, automated: bool):
+        if self.scraper.isRunning():
+            return
+
+        self.checking_groups = {group for group, due in (("stable", stable), ("automated", automated)) if due}
+        self.found = {}
+        self.new_build_groups = set()
+        self.check_failed = False
+        self.scheduler.run_started()
+
+        self.scraper.scrape_stable = stable and get_scrape_stable_builds()
+        self.scraper.scrape_automated = automated and get_scrape_automated_builds()
+        self.scraper.start()
+
+    def build_available(self, info: BuildInfo):
+        self.found[info.link] = info
+        if info.link not in self.available:
+            self.new_build_groups.add(branch_group(info.branch))
+
+    def connection_error(self):
+        self.check_failed = True
+
+    def scraper_finished(self):
+        # Builds of groups that were not checked, or could not be, are kept from earlier checks
+        self.available = {
+            link: info
+            for link, info in self.available.items()
+            if self.check_failed or branch_group(info.branch) not in self.checking_groups
+        }
+        self.available.update(self.found)
+        logger.info(f"{len(self.available)} builds available for download")
+
+        self.scheduler.run_finished(self.checking_groups, self.new_build_groups, self.check_failed)
+        self.scheduler.configure(get_check_for_new_builds_automatically(), get_new_builds_check_frequency() * 3600)
+
+    def install_finished(self, link: str, path: Path | None):
+        install = self.installs.pop(link)
+        name = download_label(install.build_info)
+        if path is None:
+            logger.error(f"Failed to install {name}")
+        else:
+            logger.info(f"Installed {name} to {path}")
+        install.deleteLater()
+
+    # Requests
+
+    def new_connection(self):
+        while (socket := self.server.nextPendingConnection()) is not None:
+            socket.readyRead.connect(partial(self.read_socket_data, socket))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def read_socket_data(self, socket: QLocalSocket):
+        while socket.canReadLine():
+            try:
+                answer = self.handle_request(ipc.decode(bytes(socket.readLine())))
+            except ValueError as e:
+                logger.error(f"Malformed request: {e}")
+                answer = ipc.reply(ipc.ERROR, str(e))
+            except Exception as e:
+                logger.exception(f"Failed to answer a request: {e}")
+                answer = ipc.reply(ipc.ERROR, str(e))
+
+            if socket.isWritable():
+                socket.write(answer)
+                socket.flush()
+
+    def handle_request(self, message: dict) -> bytes:
+        protocol = message.get("protocol", 0)
+        if not isinstance(protocol, int) or protocol > ipc.PROTOCOL_VERSION:
+            return ipc.reply(ipc.ERROR, f"Unsupported protocol version {protocol}")
+        if message.get("launcher") != str(self.version):
+            return ipc.reply(ipc.VERSION_MISMATCH, f"The daemon runs Blender Launcher {self.version}")
+
+        command = message.get("command")
+        logger.debug(f"Request: {message}")
+        if command == ipc.STATUS:
+            return ipc.reply(
+                ipc.OK,
+                library_read=self.library_ready(),
+                builds=len(self.builds),
+                available=len(self.available),
+                checking=self.scraper.isRunning(),
+                installing=[download_label(install.build_info) for install in self.installs.values()],
+            )
+
+        version = message.get("version")
+        query = VersionSearchQuery.parse(version) if version else None
+
+        if command == ipc.LIST:
+            available = bool(message.get("available"))
+            if available:
+                builds = sorted(self.available.values(), reverse=True)
+                if query is not None:
+                    builds = match(query, build_index(builds))
+            elif query is not None:
+                builds = match(query, self.library_index())
+            else:
+                builds = self.sorted_builds()
+            label = download_label if available else build_label
+            return ipc.reply(ipc.OK, builds=[describe(b, label(b)) for b in builds])
+
+        if command == ipc.LAUNCH:
+            if not self.library_ready():
+                return ipc.reply(ipc.ERROR, "The library is still being read")
+
+            file = Path(message["file"]) if message.get("file") else None
+            query, matches, launch_mode = resolve_launch(
+                self.sorted_builds(),
+                file,
+                query,
+                bool(message.get("open_last")),
+                self.library_index(),
+                self.launch_settings(),
+            )
+            return ipc.reply(
+                ipc.OK,
+                "" if matches else f"No builds match {query}",
+                matches=[
+                    {"name": build_label(b), "args": get_args(b, launch_mode=launch_mode, linux_nohup=False)}
+                    for b in matches
+                ],
+            )
+
+        if command == ipc.INSTALL:
+            return self.install(query)
+
+        return ipc.reply(ipc.ERROR, f"Unknown command {command!r}")
+
+    def install(self, query: VersionSearchQuery | None) -> bytes:
+        if query is None:
+            return ipc.reply(ipc.ERROR, "Which build to install is missing")
+        if not self.available:
+            return ipc.reply(ipc.ERROR, "No builds are available for download yet")
+
+        matches = match(query, build_index(sorted(self.available.values(), reverse=True)))
+        if not matches:
+            return ipc.reply(ipc.ERROR, f"No builds available for download match {query}")
+        if len(matches) > 1:
+            names = ", ".join(download_label(b) for b in matches)
+            return ipc.reply(ipc.ERROR, f"{len(matches)} builds match {query}, narrow it down: {names}")
+
+        info = matches[0]
+        name = download_label(info)
+        installed, _ = self.library_index()
+        if BasicBuildInfo.from_buildinfo(info) in installed:
+            return ipc.reply(ipc.OK, f"{name} is already installed")
+
+        if info.link not in self.installs:
+            install = BuildInstall(self, info)
+            install.finished.connect(partial(self.install_finished, info.link))
+            self.installs[info.link] = install
+            install.start()
+            logger.info(f"Installing {name}")
+        return ipc.reply(ipc.INSTALLING, f"Installing {name}", build=describe(info, name))
@@ -0,0 +1,52 @@
+"""Talks to `main.py daemon` without Qt, so its clients start as quickly as `launch --cli`"""
+
+from __future__ import annotations
+
+import logging
+import socket
+import sys
+from pathlib import Path
+
+from modules import instance_protocol as ipc
+from modules._platform import get_cache_path
+
+logger = logging.getLogger()
+
+DAEMON_NAME = "blender-launcher-daemon"
+
+
+def daemon_address() -> str:
+    """What the daemon listens on: a named pipe on Windows, a socket file in the cache folder elsewhere"""
+    if sys.platform == "win32":
+        return DAEMON_NAME
+    return str(Path(get_cache_path(), f"{DAEMON_NAME}.sock"))
+
+
+def send_to_daemon(message: bytes, timeout: float = ipc.REPLY_TIMEOUT / 1000) -> dict | None:
+    """Sends a request to the daemon. Returns its reply, or None if no daemon is running or it did not answer"""
+    try:
+        if sys.platform == "win32":
+            with open(rf"\\.\pipe\{DAEMON_NAME}", "r+b", buffering=0) as pipe:
+                pipe.write(message)
+                data = pipe.readline()
+        else:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout)
+                sock.connect(daemon_address())
+                sock.sendall(message)
+                data = sock.makefile("rb").readline()
+    except (FileNotFoundError, ConnectionRefusedError):
+        # Not running
+        return None
+    except OSError as e:
+        logger.warning(f"The daemon did not answer: {e}")
+        return None
+    if not data:
+        logger.warning("The daemon closed the connection without answering")
+        return None
+
+    try:
+        return ipc.decode(data)
+    except ValueError as e:
+        logger.error(f"Malformed reply from the daemon: {e}")
+        return None
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+from modules._platform import get_cache_path
+from urllib3 import HTTPResponse
+
+logger = logging.getLogger()
+
+# Default budget for cached response bodies
+HTTP_CACHE_SIZE = 64 * 1024 * 1024
+
+
+@dataclass
+class CachedResponse:
+    method: str
+    url: str
+    final_url: str
+    status: int
+    headers: dict[str, str]
+    size: int
+    expires_at: float
+    last_used: float
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers that let the server answer with 304 Not Modified"""
+        headers = {}
+        lower = {k.lower(): v for k, v in self.headers.items()}
+        if "etag" in lower:
+            headers["If-None-Match"] = lower["etag"]
+        if "last-modified" in lower:
+            headers["If-Modified-Since"] = lower["last-modified"]
+        return headers
+
+
+def parse_cache_control(headers) -> dict[str, str | None]:
+    directives = {}
+    for directive in headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') or None
+    return directives
+
+
+def freshness_lifetime(headers) -> float:
+    """Seconds a response may be reused without asking the server, following Cache-Control and Expires"""
+    cache_control = parse_cache_control(headers)
+    if "no-cache" in cache_control:
+        return 0
+
+    if (max_age := cache_control.get("max-age")) is not None:
+        with contextlib.suppress(ValueError):
+            age = int(headers.get("Age", 0))
+            return max(int(max_age) - age, 0)
+
+    if (expires := headers.get("Expires")) is not None:
+        try:
+            return max(parsedate_to_datetime(expires).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return 0  # An invalid Expires means "already expired"
+
+    return 0
+
+
+class HTTPCache:
+    """An on-disk cache of GET responses, keyed by method and URL.
+
+    Responses are reused while they are fresh according to Cache-Control / Expires. Stale responses that
+    have an ETag or Last-Modified header are revalidated with a conditional request. Least recently used
+    responses are evicted once the bodies exceed `budget` bytes. Streamed responses are copied into the
+    cache while they are read, see `tee`.
+    """
+
+    def __init__(self, path: Path, budget: int = HTTP_CACHE_SIZE):
+        self.path = path
+        self.budget = budget
+        self.index_path = path / "index.json"
+        self._lock = threading.Lock()
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._index = self._read_index()
+
+    @staticmethod
+    def key(method: str, url: str) -> str:
+        return hashlib.sha256(f"{method.upper()} {url}".encode()).hexdigest()[:32]
+
+    def _read_index(self) -> dict[str, CachedResponse]:
+        if not self.index_path.is_file():
+            return {}
+
+        try:
+            with self.index_path.open(encoding="utf-8") as f:
+                return {key: CachedResponse(**entry) for key, entry in json.load(f).items()}
+        except (json.JSONDecodeError, TypeError) as e:
+            logger.error(f"HTTP cache index is corrupted, starting over: {e}")
+            return {}
+
+    def _write_index(self):
+        tmp = self.index_path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump({key: asdict(entry) for key, entry in self._index.items()}, f)
+        os.replace(tmp, self.index_path)
+
+    def _remove(self, key: str):
+        self._index.pop(key, None)
+        with contextlib.suppress(FileNotFoundError):
+            (self.path / f"{key}.body").unlink()
+
+    def lookup(self, method: str, url: str) -> CachedResponse | None:
+        with self._lock:
+            entry = self._index.get(self.key(method, url))
+            if entry is not None:
+                entry.last_used = time.time()
+            return entry
+
+    def response(self, entry: CachedResponse, stream: bool = False) -> HTTPResponse | None:
+        """The cached response of `entry`. With `stream` the body is read from disk as the caller consumes it,
+        and the caller has to close the response"""
+        key = self.key(entry.method, entry.url)
+        body_path = self.path / f"{key}.body"
+        try:
+            body = body_path.open("rb") if stream else io.BytesIO(body_path.read_bytes())
+        except FileNotFoundError:
+            with self._lock:
+                self._remove(key)
+                self._write_index()
+            return None
+
+        # Bodies are stored decoded, so they are not decoded again
+        return HTTPResponse(
+            body=body,
+            headers=entry.headers,
+            status=entry.status,
+            preload_content=False,
+            decode_content=False,
+            request_url=entry.final_url,
+        )
+
+    def _new_entry(self, method: str, url: str, r: HTTPResponse) -> CachedResponse | None:
+        """The entry `r` would be stored as, or None if it could not be reused"""
+        if r.status != 200 or "no-store" in parse_cache_control(r.headers):
+            return None
+
+        entry = CachedResponse(
+            method=method.upper(),
+            url=url,
+            final_url=r.geturl() or url,
+            status=r.status,
+            headers=dict(r.headers),
+            size=0,
+            expires_at=time.time() + freshness_lifetime(r.headers),
+            last_used=time.time(),
+        )
+
+        # Without freshness information or validators, a stored response could never be reused
+        if not entry.is_fresh and not entry.validators:
+            return None
+        return entry
+
+    def _add(self, key: str, entry: CachedResponse):
+        self._index[key] = entry
+        self._evict()
+        self._write_index()
+
+    def store(self, method: str, url: str, r: HTTPResponse):
+        if not r.data or len(r.data) > self.budget:
+            return
+
+        entry = self._new_entry(method, url, r)
+        if entry is None:
+            return
+        entry.size = len(r.data)
+
+        key = self.key(method, url)
+        with self._lock:
+            (self.path / f"{key}.body").write_bytes(r.data)
+            self._add(key, entry)
+
+    def tee(self, method: str, url: str, r: HTTPResponse) -> HTTPResponse:
+        """Returns a response that streams the body of `r` like `r` itself would, and stores it in the cache
+        once it was read to the end"""
+        with contextlib.suppress(ValueError):
+            if int(r.headers.get("Content-Length", 0)) > self.budget:
+                return r
+
+        entry = self._new_entry(method, url, r)
+        if entry is None:
+            return r
+
+        try:
+            body = BodyTee(self, self.key(method, url), entry, r)
+        except OSError as e:
+            logger.debug(f"Could not cache the response for {url}: {e}")
+            return r
+
+        return HTTPResponse(
+            body=body,
+            headers=r.headers,
+            status=r.status,
+            reason=r.reason,
+            preload_content=False,
+            decode_content=False,
+            request_url=entry.final_url,
+        )
+
+    def commit(self, key: str, entry: CachedResponse, part: Path):
+        """Stores a body that was streamed into `part`"""
+        with self._lock:
+            try:
+                os.replace(part, self.path / f"{key}.body")
+            except OSError as e:
+                # On Windows the body can't be replaced while it is being read
+                logger.debug(f"Could not store the response for {entry.url}: {e}")
+                part.unlink(missing_ok=True)
+                return
+            self._add(key, entry)
+
+    def revalidated(self, entry: CachedResponse, r: HTTPResponse):
+        """Refreshes an entry after the server answered 304 Not Modified"""
+        with self._lock:
+            for header in ("Cache-Control", "Expires", "ETag", "Last-Modified", "Date"):
+                if header in r.headers:
+                    entry.headers[header] = r.headers[header]
+            entry.expires_at = time.time() + freshness_lifetime(r.headers)
+            self._write_index()
+
+    def _evict(self):
+        total = sum(entry.size for entry in self._index.values())
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1].last_used):
+            if total <= self.budget:
+                break
+            total -= entry.size
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self._write_index()
+
+
+class BodyTee:
+    """Reads the decoded body of a response and copies it into a cache entry as it goes.
+
+    The entry is only stored once the body was read to the end, a body that was abandoned halfway or outgrew
+    the cache budget is dropped when the tee is closed.
+    """
+
+    def __init__(self, cache: HTTPCache, key: str, entry: CachedResponse, r: HTTPResponse):
+        self.cache = cache
+        self.key = key
+        self.entry = entry
+        self.r = r
+        self.closed = False
+        self._complete = False
+        # Named after the thread, so two requests for the same URL don't write to the same file
+        self._part = cache.path / f"{key}.{os.getpid()}.{threading.get_ident()}.part"
+        self._file: io.BufferedWriter | None = self._part.open("wb")
+
+    def read(self, amt: int | None = None) -> bytes:
+        data = self.r.read(amt)
+        if data and self._file is not None:
+            self.entry.size += len(data)
+            if self.entry.size > self.cache.budget:
+                self._discard()
+            else:
+                self._file.write(data)
+
+        if amt is None or not data:
+            self._complete = True
+            self.close()
+        return data
+
+    def _discard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            with contextlib.suppress(FileNotFoundError):
+                self._part.unlink()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+
+        if self._complete and self._file is not None:
+            self._file.close()
+            self._file = None
+            self.cache.commit(self.key, self.entry, self._part)
+        self._discard()
+        # Returns the connection to the pool after a complete read, and drops it if the body was abandoned
+        self.r.close()
+
+
+def get_http_cache_path() -> Path:
+    return Path(get_cache_path()) / "http"
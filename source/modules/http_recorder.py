@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+from modules.lazy import lazy_import
+from urllib3 import HTTPResponse
+from urllib3.exceptions import HTTPError
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+logger = logging.getLogger()
+
+zstandard = lazy_import("zstandard")
+
+# Set from the command line with --record-http / --replay-http, before any ConnectionManager is created
+_recorder: HTTPRecorder | None = None
+_replayer: HTTPReplayer | None = None
+
+
+class HTTPRecorder:
+    """Captures responses into a folder that HTTPReplayer can serve them from later.
+
+    Every exchange is a line in responses.jsonl, bodies are stored once per content under bodies/ and
+    compressed with zstd. Streamed responses (downloads) are not recorded.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.bodies = path / "bodies"
+        self.bodies.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._compressor = zstandard.ZstdCompressor(level=10)
+
+    def add(self, method: str, url: str, r: HTTPResponse, ttfb: float, total: float | None):
+        body = r.data or b""
+        digest = hashlib.sha256(body).hexdigest()
+        record = {
+            "method": method.upper(),
+            "url": url,
+            "final_url": r.geturl() or url,
+            "status": r.status,
+            "headers": dict(r.headers),
+            "body": digest,
+            "ttfb": round(ttfb, 4),
+            "total": None if total is None else round(total, 4),
+        }
+
+        with self._lock:
+            file = self.bodies / f"{digest}.zst"
+            if not file.exists():
+                file.write_bytes(self._compressor.compress(body))
+            with (self.path / "responses.jsonl").open("a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+class HTTPReplayer:
+    """Serves the responses captured by HTTPRecorder instead of touching the network.
+
+    Responses to the same request are replayed in the order they were recorded, the last one repeats once
+    they run out. Requests that were never recorded fail like an unreachable server.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._records: dict[tuple[str, str], list[dict]] = defaultdict(list)
+        self._served: dict[tuple[str, str], int] = defaultdict(int)
+
+        with (path / "responses.jsonl").open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._records[(record["method"], record["url"])].append(record)
+        logger.info(f"Replaying {sum(map(len, self._records.values()))} recorded responses from {path}")
+
+    def response(self, method: str, url: str) -> HTTPResponse:
+        key = (method.upper(), url)
+        with self._lock:
+            records = self._records.get(key)
+            if not records:
+                raise HTTPError(f"{method} {url} is not part of the recording")
+            record = records[min(self._served[key], len(records) - 1)]
+            self._served[key] += 1
+
+        body = self._decompressor.decompress((self.path / "bodies" / f"{record['body']}.zst").read_bytes())
+        return HTTPResponse(
+            body=io.BytesIO(body),
+            headers=record["headers"],
+            status=record["status"],
+            preload_content=False,
+            request_url=record["final_url"],
+        )
+
+
+def start_recording(path: Path):
+    global _recorder
+    _recorder = HTTPRecorder(path)
+    logger.info(f"Recording HTTP responses to {path}")
+
+
+def start_replaying(path: Path):
+    global _replayer
+    _replayer = HTTPReplayer(path)
+
+
+def get_recorder() -> HTTPRecorder | None:
+    return _recorder
+
+
+def get_replayer() -> HTTPReplayer | None:
+    return _replayer
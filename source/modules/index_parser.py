@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import codecs
+import logging
+import re
+from dataclasses import dataclass, replace
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+logger = logging.getLogger()
+
+MONTHS = {
+    month: i
+    for i, month in enumerate(("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)
+}
+
+# "16-Jul-2024 10:20" (nginx, Apache) or "2024-07-16 10:20" (Apache with FancyIndexing)
+listing_date = re.compile(
+    r"(?P<day>\d{1,2})-(?P<month_name>[A-Za-z]{3})-(?P<year>\d{4})\s+(?P<hour>\d{1,2}):(?P<minute>\d{2})"
+    r"|(?P<iso_year>\d{4})-(?P<iso_month>\d{2})-(?P<iso_day>\d{2})\s+(?P<iso_hour>\d{1,2}):(?P<iso_minute>\d{2})"
+)
+# Bytes, or a human readable size like 12M. "-" stands for folders
+listing_size = re.compile(r"\s*(\d+(?:\.\d+)?)([KMGT]?)\b", re.IGNORECASE)
+SIZE_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    href: str
+    text: str
+    # Naive, like the listing itself
+    date: datetime | None = None
+    size: int | None = None
+    # Text of the first <span class="build-var"> after the link, used by the builder pages
+    build_var: str | None = None
+
+
+def parse_listing_details(text: str) -> tuple[datetime | None, int | None]:
+    """Reads the date and size that follow a link in an index listing"""
+    m = listing_date.search(text)
+    if m is None:
+        return None, None
+
+    date = None
+    try:
+        if m["day"] is not None:
+            month = MONTHS.get(m["month_name"].lower())
+            if month is not None:
+                date = datetime(int(m["year"]), month, int(m["day"]), int(m["hour"]), int(m["minute"]))  # noqa: DTZ001
+        else:
+            date = datetime(  # noqa: DTZ001
+                int(m["iso_year"]), int(m["iso_month"]), int(m["iso_day"]), int(m["iso_hour"]), int(m["iso_minute"])
+            )
+    except ValueError:
+        pass
+
+    size = None
+    if (size_match := listing_size.match(text, m.end())) is not None:
+        size = int(float(size_match.group(1)) * SIZE_UNITS[size_match.group(2).lower()])
+
+    return date, size
+
+
+class IndexLinkParser(HTMLParser):
+    """Collects the links of an index listing from HTML parser events, without building a tree
+
+    With `build_vars`, every link waits for the next <span class="build-var"> before it is finished.
+    """
+
+    def __init__(self, build_vars=False):
+        super().__init__(convert_charrefs=True)
+        self.build_vars = build_vars
+        self.finished: list[IndexEntry] = []
+        # Entries still waiting for the text after their link, or for a build-var span
+        self.pending: list[IndexEntry] = []
+        self._href: str | None = None
+        self._text: list[str] = []
+        self._tail: list[str] | None = None
+        self._build_var: list[str] | None = None
+        self._span_depth = 0
+
+    def _close_tail(self):
+        if self._tail is None:
+            return
+
+        date, size = parse_listing_details("".join(self._tail))
+        entry = replace(self.pending.pop(), date=date, size=size)
+        if self.build_vars:
+            self.pending.append(entry)
+        else:
+            self.finished.append(entry)
+        self._tail = None
+
+    def handle_starttag(self, tag, attrs):
+        self._close_tail()
+        if tag == "a":
+            self._href = dict(attrs).get("href")
+            self._text = []
+        elif tag == "span":
+            if self._build_var is not None:
+                self._span_depth += 1
+            elif self.build_vars and "build-var" in (dict(attrs).get("class") or "").split():
+                self._build_var = []
+                self._span_depth = 0
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._href is not None:
+            self._close_tail()
+            self.pending.append(IndexEntry(self._href, "".join(self._text).strip()))
+            self._href = None
+            self._tail = []
+            return
+
+        self._close_tail()
+        if tag == "span" and self._build_var is not None:
+            if self._span_depth:
+                self._span_depth -= 1
+                return
+            build_var = "".join(self._build_var)
+            self.finished.extend(replace(entry, build_var=build_var) for entry in self.pending)
+            self.pending.clear()
+            self._build_var = None
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+        if self._build_var is not None:
+            self._build_var.append(data)
+        if self._tail is not None:
+            self._tail.append(data)
+
+    def take(self) -> list[IndexEntry]:
+        """Removes and returns the entries that are complete"""
+        finished, self.finished = self.finished, []
+        return finished
+
+    def close(self):
+        super().close()
+        self._close_tail()
+        self.finished.extend(self.pending)
+        self.pending.clear()
+
+
+def iter_index_links(chunks: Iterable[bytes], build_vars=False, encoding: str = "utf-8") -> Iterator[IndexEntry]:
+    """Yields the links of an index listing, as (href, date, size) entries, while it is being read"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    parser = IndexLinkParser(build_vars)
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+        yield from parser.take()
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    yield from parser.take()
+
+
+def parse_index_links_bs4(content: bytes, build_vars=False) -> list[IndexEntry]:
+    """The BeautifulSoup based equivalent of iter_index_links, slower but more forgiving"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "lxml")
+    entries = []
+    for tag in soup.find_all("a", href=True):
+        sibling = tag.find_next_sibling(string=True)
+        date, size = parse_listing_details(sibling) if sibling else (None, None)
+        build_var = None
+        if build_vars and (span := tag.find_next("span", class_="build-var")) is not None:
+            build_var = span.get_text()
+        entries.append(IndexEntry(tag["href"], tag.get_text().strip(), date, size, build_var))
+    return entries
+
+
+def parse_index_links(content: bytes, build_vars=False) -> list[IndexEntry]:
+    """Links of an index listing, falling back to BeautifulSoup if the streaming parser finds none"""
+    try:
+        entries = list(iter_index_links((content,), build_vars))
+    except Exception as e:
+        logger.debug(f"Index parser failed, falling back to BeautifulSoup: {e}")
+        entries = []
+
+    if not entries:
+        entries = parse_index_links_bs4(content, build_vars)
+    return entries
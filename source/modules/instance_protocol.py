@@ -0,0 +1,67 @@
+"""Messages exchanged with the running launcher over its local socket.
+
+Every message is a JSON object on one line, terminated by a newline. Requests carry the protocol version, the
+version of the launcher that sent them and a command:
+
+    {"protocol": 1, "launcher": "2.3.0-rc.1", "command": "show"}
+    {"protocol": 1, "launcher": "2.3.0-rc.1", "command": "launch", "file": "/abs/path.blend", "version": "4.2.^",
+     "open_last": false}
+
+and are answered with a status, plus whatever the command reports:
+
+    {"protocol": 1, "status": "launched", "message": "Launched stable/blender-4.2.0"}
+
+Launchers from before the protocol send their bare version string and close the connection, which is read as
+a "show" request with protocol 0.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+SERVER_NAME = "blender-launcher-server"
+PROTOCOL_VERSION = 1
+
+# Milliseconds
+CONNECT_TIMEOUT = 1000
+REPLY_TIMEOUT = 5000
+
+# Commands
+SHOW = "show"
+LAUNCH = "launch"
+# Only answered by the daemon
+LIST = "list"
+INSTALL = "install"
+STATUS = "status"
+
+# Statuses
+OK = "ok"
+LAUNCHED = "launched"
+CHOOSING = "choosing"
+INSTALLING = "installing"
+VERSION_MISMATCH = "version-mismatch"
+ERROR = "error"
+
+
+def encode(message: dict[str, Any]) -> bytes:
+    return json.dumps({"protocol": PROTOCOL_VERSION, **message}, separators=(",", ":")).encode() + b"\n"
+
+
+def decode(data: bytes) -> dict[str, Any]:
+    """Reads one message. Raises ValueError if it is neither a message nor a bare version string"""
+    if not data.lstrip().startswith(b"{"):
+        return {"protocol": 0, "launcher": data.decode("ascii").strip(), "command": SHOW}
+
+    message = json.loads(data)
+    if not isinstance(message, dict):
+        raise ValueError("A message must be a JSON object")
+    return message
+
+
+def request(command: str, launcher: str, **fields) -> bytes:
+    return encode({"launcher": launcher, "command": command, **fields})
+
+
+def reply(status: str, message: str = "", **fields) -> bytes:
+    return encode({"status": status, "message": message, **fields})
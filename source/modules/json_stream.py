@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+ITEM_SEPARATOR = re.compile(r"[ \t\n\r]*,[ \t\n\r]*")
+DELIMITERS = frozenset(" \t\n\r,]")
+
+
+def iter_chunks(data: bytes, size: int = 64 * 1024) -> Iterator[bytes]:
+    """Splits an already loaded body into chunks, like HTTPResponse.stream does for one that is arriving"""
+    view = memoryview(data)
+    for i in range(0, len(view), size):
+        yield view[i : i + size].tobytes()
+
+
+class _Reader:
+    """Decoded text of a chunked document, keeping only what has not been consumed yet"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self) -> bool:
+        """Appends the next chunk to the buffer, returns False at the end of the document"""
+        if self.eof:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.buffer += self.decoder.decode(b"", final=True)
+            self.eof = True
+        else:
+            self.buffer = self.buffer[self.pos :] + self.decoder.decode(chunk)
+            self.pos = 0
+        return True
+
+    def next_char(self) -> str:
+        """The next character that is not whitespace, without consuming it"""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read_more():
+                raise json.JSONDecodeError("Unexpected end of document", self.buffer, self.pos)
+
+    def error(self, msg: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(msg, self.buffer, self.pos)
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Decodes the items of a top-level JSON array one by one, while the document is still being read.
+
+    Only the item being decoded and the unread rest of the current chunk are held in memory.
+    Raises json.JSONDecodeError if the document is not an array or is malformed.
+    """
+    raw_decode = json.JSONDecoder().raw_decode
+    reader = _Reader(chunks)
+
+    if reader.next_char() != "[":
+        raise reader.error("Expected a JSON array")
+    reader.pos += 1
+    if reader.next_char() == "]":
+        return
+
+    while True:
+        try:
+            item, end = raw_decode(reader.buffer, reader.pos)
+        except json.JSONDecodeError:
+            end = None
+
+        # Numbers and literals cut off by the end of a chunk (1.5 of 1.5e10) decode fine on their own,
+        # only an item followed by a delimiter is known to be complete
+        if end is None or (not reader.eof and (end == len(reader.buffer) or reader.buffer[end] not in DELIMITERS)):
+            if not reader.read_more():
+                raise reader.error("Malformed array item")
+            continue
+        yield item
+
+        # Fast path for the common case of the next item following right away
+        m = ITEM_SEPARATOR.match(reader.buffer, end)
+        if m is not None and m.end() < len(reader.buffer):
+            reader.pos = m.end()
+            continue
+
+        reader.pos = end
+        char = reader.next_char()
+        if char == "]":
+            return
+        if char != ",":
+            raise reader.error("Expected ',' or ']'")
+        reader.pos += 1
+        reader.next_char()
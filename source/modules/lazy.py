@@ -0,0 +1,67 @@
+"""Deferred imports and class attributes, so startup only pays for what it uses.
+
+    zstandard = lazy_import("zstandard")  # loaded on first attribute access
+
+    class BuildInfo:
+        lts_tags = deferred(lts_blender_version)  # computed on first access
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Generic, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+T = TypeVar("T")
+
+
+class LazyModule(ModuleType):
+    """Stands in for a module until one of its attributes is accessed, then imports it.
+
+    The import goes through the regular import machinery, so it is thread safe and shows up in -X importtime
+    where it happens.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def __getattr__(self, attr: str) -> Any:
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+        return getattr(module, attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Returns module `name`, which is only imported once one of its attributes is accessed.
+
+    Raises ModuleNotFoundError right away if the module does not exist. Errors raised while importing it,
+    like a missing native library, only surface on first use. PyInstaller can't see these imports, so every
+    module loaded this way needs a --hidden-import in the build scripts.
+    """
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    return LazyModule(name)
+
+
+class deferred(Generic[T]):  # Lowercase, it is used like a decorator
+    """A class attribute computed by `factory` the first time it is read, then stored on the class"""
+
+    def __init__(self, factory: Callable[[], T]):
+        self.factory = factory
+        self.name = ""
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def __get__(self, instance: Any, owner: type) -> T:
+        value = self.factory()
+        # Replaces this descriptor, later reads are plain attribute lookups
+        setattr(owner, self.name, value)
+        return value
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from modules._platform import get_platform
+from modules.settings import get_library_folder
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+
+def get_blender_builds(folders: Iterable[str | Path]) -> Iterable[tuple[Path, bool]]:
+    """Finds blender builds in the library folder, given the subfolders to search in
+
+    Parameters
+    ----------
+    folders : Iterable[str  |  Path]
+        subfolders to search
+
+    Returns
+    -------
+    Iterable[tuple[Path, bool]]
+        an iterable of found builds and whether they're recognized as valid Blender builds
+    """
+
+    library_folder = get_library_folder()
+    platform = get_platform()
+
+    blender_exe = {
+        "Windows": "blender.exe",
+        "Linux": "blender",
+        "macOS": "Blender/Blender.app/Contents/MacOS/Blender",
+    }.get(platform, "blender")
+
+    for folder in folders:
+        path = library_folder / folder
+        if path.is_dir():
+            for build in path.iterdir():
+                if build.is_dir():
+                    yield (
+                        folder / build,
+                        ((folder / build / ".blinfo").is_file() or (path / build / blender_exe).is_file()),
+                    )
+
+
+def library_subfolder(branch: str) -> str:
+    """The library subfolder that downloaded builds of `branch` are extracted to"""
+    if branch in ("stable", "lts"):
+        return "stable"
+    if branch == "daily":
+        return "daily"
+    return "experimental"
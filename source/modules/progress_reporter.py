@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+class ProgressReporter:
+    """Rate-limits progress callbacks coming from tight loops, like copying blocks or extracting archive members.
+
+    A value is only forwarded when at least `min_interval` seconds have passed since the last one and the
+    progress moved by at least `min_delta` (a fraction of the total). Changes of the total and the final value
+    are always forwarded.
+
+    If `rate_callback` is given, it receives the throughput in bytes/s and the estimated time left in seconds
+    every time a value is forwarded.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[int, int], object],
+        rate_callback: Callable[[float, float], object] | None = None,
+        min_interval: float = 0.1,
+        min_delta: float = 0.005,
+        smoothing: float = 0.3,
+    ):
+        self.callback = callback
+        self.rate_callback = rate_callback
+        self.min_interval = min_interval
+        self.min_delta = min_delta
+        self.smoothing = smoothing
+
+        self.last_time = 0.0
+        self.last_obtained = 0
+        self.last_total = -1
+        self.rate = 0.0
+
+    def __call__(self, obtained: int, total: int):
+        now = time.monotonic()
+
+        if total != self.last_total:
+            self._emit(now, obtained, total, reset_rate=True)
+            return
+
+        if obtained < total:
+            if now - self.last_time < self.min_interval:
+                return
+            if total and (obtained - self.last_obtained) / total < self.min_delta:
+                return
+        elif self.last_obtained >= total:  # The final value was already sent
+            return
+
+        self._emit(now, obtained, total)
+
+    def _emit(self, now: float, obtained: int, total: int, reset_rate=False):
+        if self.rate_callback is not None:
+            if reset_rate:
+                self.rate = 0.0
+            elif now > self.last_time:
+                current_rate = (obtained - self.last_obtained) / (now - self.last_time)
+                # Exponential moving average, so a single slow block doesn't make the ETA jump around
+                if self.rate:
+                    self.rate = self.smoothing * current_rate + (1 - self.smoothing) * self.rate
+                else:
+                    self.rate = current_rate
+
+            eta = (total - obtained) / self.rate if self.rate > 0 else 0.0
+            self.rate_callback(self.rate, eta)
+
+        self.last_time = now
+        self.last_obtained = obtained
+        self.last_total = total
+        self.callback(obtained, total)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+logger = logging.getLogger()
+
+# Multiples of the configured interval per group of branches. Daily, experimental and patch builds are published
+# every day, stable releases every few weeks
+CADENCES = {
+    "automated": 1.0,
+    "stable": 4.0,
+}
+# Every check that finds nothing new doubles the interval of its group, up to this factor
+MAX_STRETCH = 4
+MAX_INTERVAL = 7 * 24 * 3600
+# First retry after a failed check, doubling with every further failure
+RETRY_INTERVAL = 5 * 60
+# Spreads checks of many launchers started at the same time
+JITTER = 0.1
+# A group that is due within this fraction of its interval joins a check that starts anyway
+COALESCE = 0.1
+# The timer is re-armed at least this often, so a check is not late by much after the system slept
+MAX_TIMER_INTERVAL = 3600
+
+
+def branch_group(branch: str) -> str:
+    """The group in CADENCES that builds of `branch` belong to"""
+    return "stable" if branch in ("stable", "lts") else "automated"
+
+
+@dataclass
+class BranchGroup:
+    name: str
+    cadence: float
+    # Wall clock time of the next check
+    due: float = 0.0
+    # Checks in a row that found no new builds
+    idle_runs: int = 0
+
+
+class RefreshScheduler(QObject):
+    """Decides when to check for new builds in the background.
+
+    `due` is emitted with the groups to scrape (stable, automated) once a check is due. Checks never overlap:
+    from `run_started` until `run_finished` nothing is emitted, which also holds for checks started by the user.
+    Repeated checks are cheap, since the scraper revalidates cached responses with conditional requests.
+    """
+
+    due = pyqtSignal(bool, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.groups = {name: BranchGroup(name, cadence) for name, cadence in CADENCES.items()}
+        self.interval: float = 12 * 3600
+        self.enabled = False
+        self.running = False
+        self.failures = 0
+        self._rng = random.Random()
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._tick)
+
+    def start(self, interval: float):
+        """Schedules checks every `interval` seconds, counted from now"""
+        self.interval = interval
+        self.enabled = True
+        self.failures = 0
+        now = time.time()
+        for group in self.groups.values():
+            group.idle_runs = 0
+            group.due = now + self._jittered(self.group_interval(group))
+        logger.debug(f"Checking for new builds every {interval / 3600:g}h")
+        self._arm()
+
+    def stop(self):
+        self.enabled = False
+        self.timer.stop()
+
+    def configure(self, enabled: bool, interval: float):
+        """Applies the check settings. A new interval stretches or shrinks the time left until each check"""
+        if not enabled:
+            self.stop()
+        elif not self.enabled:
+            self.start(interval)
+        elif interval != self.interval:
+            now = time.time()
+            for group in self.groups.values():
+                group.due = now + max(group.due - now, 0) * interval / self.interval
+            logger.debug(f"Checking for new builds every {interval / 3600:g}h")
+            self.interval = interval
+            self._arm()
+
+    def group_interval(self, group: BranchGroup) -> float:
+        return min(self.interval * group.cadence * min(2**group.idle_runs, MAX_STRETCH), MAX_INTERVAL)
+
+    def run_started(self):
+        self.running = True
+        self.timer.stop()
+
+    def run_finished(self, checked: set[str], found_new: set[str], failed: bool):
+        """Reschedules the groups that were checked. `found_new` are the groups with builds that were not seen before"""
+        self.running = False
+        now = time.time()
+
+        if failed:
+            self.failures += 1
+            for name in checked:
+                group = self.groups[name]
+                retry = min(RETRY_INTERVAL * 2 ** (self.failures - 1), self.group_interval(group))
+                group.due = now + self._jittered(retry)
+        else:
+            self.failures = 0
+            for name in checked:
+                group = self.groups[name]
+                group.idle_runs = 0 if name in found_new else group.idle_runs + 1
+                group.due = now + self._jittered(self.group_interval(group))
+
+        for group in self.groups.values():
+            logger.debug(f"Next {group.name} check in {(group.due - now) / 3600:.2f}h")
+        self._arm()
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * self._rng.uniform(1 - JITTER, 1 + JITTER)
+
+    def _arm(self):
+        if not self.enabled or self.running:
+            return
+        delay = min(group.due for group in self.groups.values()) - time.time()
+        self.timer.start(int(min(max(delay, 0), MAX_TIMER_INTERVAL) * 1000))
+
+    def _tick(self):
+        if not self.enabled or self.running:
+            return
+
+        now = time.time()
+        if all(group.due > now for group in self.groups.values()):
+            self._arm()
+            return
+
+        due = {
+            group.name
+            for group in self.groups.values()
+            if group.due - COALESCE * self.group_interval(group) <= now
+        }
+        self.due.emit("stable" in due, "automated" in due)
+        if not self.running:
+            # Nothing was started, try again later instead of firing right away
+            self.timer.start(RETRY_INTERVAL * 1000)
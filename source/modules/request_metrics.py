@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import bisect
+import copy
+import threading
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+# Upper bounds of the latency histogram buckets, in seconds. The last bucket catches everything slower
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# How many individual requests are kept around for inspection
+MAX_RECORDS = 1000
+
+
+def host_of(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+@dataclass(frozen=True)
+class RequestRecord:
+    host: str
+    started: float  # time.monotonic() when the request was sent
+    method: str
+    url: str
+    status: int | None  # None when the request failed
+    ttfb: float  # seconds until the response headers arrived
+    total: float | None  # seconds until the body was read, None for streamed responses
+    size: int  # bytes of the body
+    reused: bool  # served by a connection that was already open
+    cached: bool = False  # served from the HTTP cache without touching the network
+
+
+@dataclass
+class Histogram:
+    counts: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    def add(self, value: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def percentile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the `q` percentile, infinite for the overflow bucket"""
+        total = self.total
+        if total == 0:
+            return None
+
+        rank = q / 100 * total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else float("inf")
+        return float("inf")
+
+
+def _format_bound(bound: float | None) -> str:
+    if bound is None:
+        return "-"
+    if bound == float("inf"):
+        return f">{LATENCY_BUCKETS[-1]:g}s"
+    return f"<{bound * 1000:g}ms"
+
+
+@dataclass
+class HostMetrics:
+    requests: int = 0
+    failures: int = 0
+    reused: int = 0
+    cached: int = 0
+    size: int = 0
+    statuses: Counter = field(default_factory=Counter)
+    ttfb: Histogram = field(default_factory=Histogram)
+    total: Histogram = field(default_factory=Histogram)
+
+    def add(self, record: RequestRecord):
+        self.requests += 1
+        self.size += record.size
+        if record.cached:
+            self.cached += 1
+            return
+        if record.status is None:
+            self.failures += 1
+            return
+
+        self.statuses[record.status] += 1
+        self.reused += record.reused
+        self.ttfb.add(record.ttfb)
+        if record.total is not None:
+            self.total.add(record.total)
+
+    def __str__(self):
+        statuses = ", ".join(f"{status}x{count}" for status, count in sorted(self.statuses.items()))
+        return (
+            f"{self.requests} requests ({self.reused} reused, {self.cached} cached, {self.failures} failed), "
+            f"{self.size / 1024:.1f} KiB, "
+            f"TTFB p50 {_format_bound(self.ttfb.percentile(50))} p90 {_format_bound(self.ttfb.percentile(90))}, "
+            f"total p50 {_format_bound(self.total.percentile(50))} p90 {_format_bound(self.total.percentile(90))}, "
+            f"status [{statuses}]"
+        )
+
+
+class RequestMetrics:
+    """Collects a record of every request and aggregates them per host. Safe to use from worker threads"""
+
+    def __init__(self, max_records: int = MAX_RECORDS):
+        self._lock = threading.Lock()
+        self._records: deque[RequestRecord] = deque(maxlen=max_records)
+        self._hosts: dict[str, HostMetrics] = {}
+
+    def add(self, record: RequestRecord):
+        with self._lock:
+            self._records.append(record)
+            self._hosts.setdefault(record.host, HostMetrics()).add(record)
+
+    def records(self) -> list[RequestRecord]:
+        with self._lock:
+            return list(self._records)
+
+    def hosts(self, since: float | None = None) -> dict[str, HostMetrics]:
+        """Metrics per host, either since startup or only of the kept records sent after `since`"""
+        with self._lock:
+            if since is None:
+                return copy.deepcopy(self._hosts)
+            records = [record for record in self._records if record.started >= since]
+
+        hosts: dict[str, HostMetrics] = {}
+        for record in records:
+            hosts.setdefault(record.host, HostMetrics()).add(record)
+        return hosts
+
+    def summary(self, since: float | None = None) -> list[str]:
+        return [f"{host}: {metrics}" for host, metrics in sorted(self.hosts(since).items())]
+
+    def reset(self):
+        with self._lock:
+            self._records.clear()
+            self._hosts.clear()
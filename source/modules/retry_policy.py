@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import contextlib
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, TypeVar
+
+from urllib3.exceptions import HTTPError, SSLError
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+logger = logging.getLogger()
+
+T = TypeVar("T")
+
+# Server answers that are worth asking again for
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait according to a Retry-After header, given either in seconds or as an HTTP date"""
+    if value is None:
+        return None
+
+    with contextlib.suppress(ValueError):
+        return max(float(value), 0)
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable_error(e: Exception) -> bool:
+    if not isinstance(e, HTTPError):
+        return False
+    # A broken certificate setup won't fix itself between attempts
+    return not isinstance(e, SSLError) and not isinstance(getattr(e, "reason", None), SSLError)
+
+
+@dataclass
+class RetryBudget:
+    """Limits retries to a fraction of the traffic to a host, so an outage doesn't multiply the load on it.
+
+    Every first attempt deposits `ratio` tokens, every retry withdraws one.
+    """
+
+    ratio: float = 0.2
+    maximum: float = 10
+    tokens: float = 10
+
+    def deposit(self):
+        self.tokens = min(self.tokens + self.ratio, self.maximum)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+@dataclass
+class RetryPolicy:
+    """Retries network operations with exponential backoff and full jitter.
+
+    Retryable errors and statuses are attempted up to `max_attempts` times per call, as long as the retry
+    budget of the host allows it. A Retry-After header replaces the computed delay, unless it asks for more
+    than `max_retry_after` seconds. At most `max_per_host` operations run against the same host at once.
+    """
+
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 15.0
+    max_retry_after: float = 60.0
+    max_per_host: int = 4
+
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _budgets: dict[str, RetryBudget] = field(default_factory=dict, init=False, repr=False)
+    _slots: dict[str, threading.BoundedSemaphore] = field(default_factory=dict, init=False, repr=False)
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (starting at 1)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def budget(self, host: str) -> RetryBudget:
+        with self._lock:
+            return self._budgets.setdefault(host, RetryBudget())
+
+    @contextlib.contextmanager
+    def slot(self, host: str) -> Iterator[None]:
+        """Holds one of the concurrent operations allowed for `host`"""
+        with self._lock:
+            semaphore = self._slots.setdefault(host, threading.BoundedSemaphore(self.max_per_host))
+        with semaphore:
+            yield
+
+    def _may_retry(self, host: str, attempt: int) -> bool:
+        if attempt >= self.max_attempts:
+            return False
+
+        budget = self.budget(host)
+        with self._lock:
+            if budget.withdraw():
+                return True
+        logger.warning(f"Retry budget for {host} is exhausted")
+        return False
+
+    def run(
+        self,
+        host: str,
+        operation: Callable[[], T],
+        on_retry: Callable[[int, float, str], object] | None = None,
+        hold_slot: bool = True,
+    ) -> T:
+        """Runs `operation` until it succeeds or is out of attempts.
+
+        If the operation returns a response with a retryable status, it is released and attempted again.
+        The last response is returned as-is, errors of the last attempt are raised to the caller.
+        `on_retry` receives the attempt number, the delay and the reason before each retry.
+        Long transfers pass `hold_slot=False` and take a `slot` themselves only while they connect, so they
+        don't keep other requests to the host waiting until they are done.
+        """
+        budget = self.budget(host)
+        with self._lock:
+            budget.deposit()
+
+        attempt = 1
+        while True:
+            with self.slot(host) if hold_slot else contextlib.nullcontext():
+                try:
+                    result = operation()
+                except Exception as e:
+                    if not is_retryable_error(e) or not self._may_retry(host, attempt):
+                        raise
+                    delay = self.backoff(attempt)
+                    reason = str(e)
+                else:
+                    status = getattr(result, "status", None)
+                    if status not in RETRY_STATUSES or not self._may_retry(host, attempt):
+                        return result
+
+                    delay = parse_retry_after(result.headers.get("Retry-After"))
+                    if delay is None:
+                        delay = self.backoff(attempt)
+                    elif delay > self.max_retry_after:
+                        logger.warning(f"{host} asked to retry in {delay:.0f}s, giving up")
+                        return result
+                    reason = f"status {status}"
+                    result.drain_conn()
+                    result.release_conn()
+
+            logger.debug(f"Retrying {host} in {delay:.2f}s (attempt {attempt + 1}/{self.max_attempts}): {reason}")
+            if on_retry is not None:
+                on_retry(attempt, delay, reason)
+            time.sleep(delay)
+            attempt += 1
@@ -6,13 +6,17 @@ import sys
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from modules._platform import get_config_file, get_config_path, get_cwd, get_platform, local_config, user_config
 from modules.bl_api_manager import dropdown_blender_version
+from modules.settings_reader import SettingsReader
 from modules.version_matcher import VersionSearchQuery
-from PyQt5.QtCore import QSettings
 from semver import Version
 
+if TYPE_CHECKING:
+    from PyQt5.QtCore import QSettings
+
 EPOCH = datetime.fromtimestamp(0, tz=timezone.utc)
 ISO_EPOCH = EPOCH.isoformat()
 
@@ -64,7 +68,22 @@ proxy_types = {
 }
 
 
-def get_settings():
+# Set by `launch --cli`, which reads the settings without loading Qt
+_read_only = False
+
+
+def use_read_only_settings():
+    """Reads the settings with SettingsReader from now on, so Qt is never imported. Changes are not saved"""
+    global _read_only
+    _read_only = True
+
+
+def get_settings() -> QSettings | SettingsReader:
+    if _read_only:
+        return SettingsReader(get_config_file())
+
+    from PyQt5.QtCore import QSettings
+
     file = get_config_file()
     if not file.parent.is_dir():
         file.parent.mkdir(parents=True)
@@ -383,6 +402,14 @@ def set_use_custom_tls_certificates(is_checked):
     get_settings().setValue("use_custom_tls_certificates", is_checked)
 
 
+def get_use_http_cache():
+    return get_settings().value("use_http_cache", defaultValue=True, type=bool)
+
+
+def set_use_http_cache(is_checked):
+    get_settings().setValue("use_http_cache", is_checked)
+
+
 def get_user_id():
     user_id = get_settings().value("user_id", type=str).strip()
     if not user_id:
@@ -414,7 +441,11 @@ def get_new_builds_check_frequency():
     settings = get_settings()
 
     if settings.contains("new_builds_check_frequency"):
-        return settings.value("new_builds_check_frequency", type=int)
+        frequency = settings.value("new_builds_check_frequency", type=int)
+        # Older versions saved minutes, which end up beyond the four weeks the settings allow
+        if frequency > 24 * 7 * 4:
+            frequency = max(frequency // 60, 1)
+        return frequency
     return 12
 
 
@@ -488,6 +519,31 @@ def set_show_patch_archive_builds(b: bool):
     get_settings().setValue("show_patch_archive_builds", b)
 
 
+def get_deduplicate_builds() -> bool:
+    return get_settings().value("deduplicate_builds", defaultValue=False, type=bool)
+
+
+def set_deduplicate_builds(b: bool):
+    get_settings().setValue("deduplicate_builds", b)
+
+
+def get_use_archive_cache() -> bool:
+    return get_settings().value("use_archive_cache", defaultValue=False, type=bool)
+
+
+def set_use_archive_cache(b: bool):
+    get_settings().setValue("use_archive_cache", b)
+
+
+def get_archive_cache_size() -> int:
+    """Size in gigabytes"""
+    return get_settings().value("archive_cache_size", defaultValue=10, type=int)
+
+
+def set_archive_cache_size(size: int):
+    get_settings().setValue("archive_cache_size", size)
+
+
 def get_make_error_popup():
     return get_settings().value("error_popup", defaultValue=True, type=bool)
 
@@ -0,0 +1,143 @@
+"""Reads the settings file without Qt, for paths like `launch --cli` that should not pay for loading it.
+
+Understands what QSettings writes in IniFormat: [General] and group sections, %-escaped keys, quoted strings
+with C style escapes, comma separated lists, @Invalid() and @@ escaped values. @Variant values (pickled Python
+objects) are treated as missing.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+logger = logging.getLogger()
+
+ESCAPES = {"a": "\a", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v", "'": "'", '"': '"', "\\": "\\"}
+key_escape = re.compile(r"%U([0-9A-Fa-f]{4})|%([0-9A-Fa-f]{2})")
+hex_digits = re.compile(r"[0-9A-Fa-f]+")
+octal_digits = re.compile(r"[0-7]{1,3}")
+
+# Returned for values that cannot be read without Qt, so they fall back to their defaults
+MISSING = object()
+
+
+def unescape_key(key: str) -> str:
+    key = key_escape.sub(lambda m: chr(int(m.group(1) or m.group(2), 16)), key)
+    # Subgroups inside a section are separated by backslashes
+    return key.replace("\\", "/")
+
+
+def parse_value(raw: str) -> Any:
+    """A value as QSettings would return it: a string, a list of strings, None or MISSING"""
+    raw = raw.strip()
+    if raw.startswith("@"):
+        if raw.startswith("@@"):
+            raw = raw[1:]
+        elif raw == "@Invalid()":
+            return None
+        elif raw.startswith("@ByteArray(") and raw.endswith(")"):
+            return raw[len("@ByteArray(") : -1]
+        else:
+            return MISSING
+
+    items: list[str] = []
+    current: list[str] = []
+    quoted = False
+    i = 0
+    while i < len(raw):
+        char = raw[i]
+        i += 1
+        if char == '"':
+            quoted = not quoted
+        elif char == "\\" and i < len(raw):
+            escape = raw[i]
+            if escape == "x" and (m := hex_digits.match(raw, i + 1)) is not None:
+                current.append(chr(int(m.group(), 16)))
+                i = m.end()
+            elif (m := octal_digits.match(raw, i)) is not None:
+                current.append(chr(int(m.group(), 8)))
+                i = m.end()
+            else:
+                current.append(ESCAPES.get(escape, escape))
+                i += 1
+        elif char == "," and not quoted:
+            items.append("".join(current).strip())
+            current = []
+        elif char in " \t" and not quoted and not current:
+            # Whitespace between list items
+            continue
+        else:
+            current.append(char)
+
+    if not items:
+        return "".join(current)
+    items.append("".join(current).strip())
+    return items
+
+
+@lru_cache(maxsize=4)
+def _read(path: Path, _mtime_ns: int, _size: int) -> dict[str, Any]:
+    values: dict[str, Any] = {}
+    section = ""
+    with path.open(encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(";"):
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                section = unescape_key(line[1:-1])
+                if section.lower() == "general":
+                    section = ""
+                continue
+
+            key, sep, raw = line.partition("=")
+            if not sep:
+                continue
+            key = unescape_key(key.strip())
+            values[f"{section}/{key}" if section else key] = parse_value(raw)
+    return values
+
+
+class SettingsReader:
+    """The read side of QSettings for an INI file. Changes are not saved"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        try:
+            stat = path.stat()
+            self._values = _read(path, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            self._values = {}
+
+    def contains(self, key: str) -> bool:
+        return self._values.get(key, MISSING) is not MISSING
+
+    def value(self, key: str, defaultValue=None, type=None):  # noqa: A002 -- mirrors QSettings.value
+        value = self._values.get(key, MISSING)
+        if value is MISSING:
+            return defaultValue
+        if type is None:
+            return value
+        if value is None:
+            # An invalid value converts to the empty value of the type, like in QSettings
+            return type()
+        if type is bool:
+            if isinstance(value, str):
+                return value.lower() == "true"
+            return bool(value)
+        if type is str and isinstance(value, list):
+            return ", ".join(value)
+        if type is list and isinstance(value, str):
+            return [value] if value else []
+        try:
+            return type(value)
+        except (TypeError, ValueError):
+            return defaultValue
+
+    def setValue(self, key: str, value):  # Mirrors QSettings.setValue
+        logger.debug(f"Settings are read only here, not saving {key}")
@@ -4,7 +4,7 @@ import contextlib
 import datetime
 import re
 from dataclasses import dataclass
-from functools import cache
+from functools import cache, cached_property
 from operator import attrgetter
 from typing import TYPE_CHECKING
 
@@ -226,35 +226,132 @@ class VersionSearchQuery:
 # VersionSearchQuery("^", "*", "*"): Match any version in the latest major release
 
 
+@dataclass
+class _Column:
+    """Builds grouped by one place of their version, with the smallest and largest value of that place"""
+
+    children: dict[int, _Column | list[int]]
+    low: int
+    high: int
+
+
+def _group(indices: list[int], versions: Sequence[BasicBuildInfo], places: tuple[str, ...]) -> _Column | list[int]:
+    """Groups the (sorted) builds by each place in turn. The leaves are positions in `versions`"""
+    if not places:
+        return indices
+
+    getter = attrgetter(places[0])
+    groups: dict[int, list[int]] = {}
+    for i in indices:
+        groups.setdefault(getter(versions[i]), []).append(i)
+
+    return _Column(
+        children={key: _group(group, versions, places[1:]) for key, group in groups.items()},
+        low=min(groups),
+        high=max(groups),
+    )
+
+
 @dataclass(frozen=True)
 class BInfoMatcher:
     versions: tuple[BasicBuildInfo, ...]
 
+    @cached_property
+    def _tree(self) -> _Column | None:
+        """The builds grouped by major, minor and patch. Each group is sorted by commit time"""
+        if not self.versions:
+            return None
+        versions = self.versions
+        # Comparing plain tuples is much quicker than comparing semver Versions
+        indices = sorted(range(len(versions)), key=lambda i: versions[i].commit_time)
+        return _group(indices, versions, ("major", "minor", "patch"))  # type: ignore
+
+    @cached_property
+    def _by_hash(self) -> dict[str, list[int]]:
+        by_hash: dict[str, list[int]] = {}
+        for i, v in enumerate(self.versions):
+            by_hash.setdefault(v.build_hash, []).append(i)
+        return by_hash
+
+    @cached_property
+    def _by_branch(self) -> dict[str, frozenset[int]]:
+        by_branch: dict[str, set[int]] = {}
+        for i, v in enumerate(self.versions):
+            by_branch.setdefault(v.branch, set()).add(i)
+        return {branch: frozenset(indices) for branch, indices in by_branch.items()}
+
     def match(self, s: VersionSearchQuery) -> tuple[BasicBuildInfo, ...]:
+        """The builds matching the query, in the order they were given. The places of the query narrow the builds
+        down in this order: build_hash, major, minor, patch, branch, commit_time; so ^ and - pick the largest and
+        smallest value among the builds left by the places before"""
         versions = self.versions
+        return tuple(versions[i] for i in self.match_positions(s))
+
+    def match_positions(self, s: VersionSearchQuery) -> list[int]:
+        """Like match, but returns the positions of the matching builds in `versions`, in ascending order"""
+        if s.build_hash is not None and s.build_hash != "*":
+            # Few builds share a hash, match among those
+            indices = self._by_hash.get(s.build_hash)
+            if indices is None:
+                return []
+            if len(indices) != len(self.versions):
+                matcher = BInfoMatcher(tuple(self.versions[i] for i in indices))
+                return [indices[i] for i in matcher.match_positions(s.with_build_hash(None))]
+
+        if (
+            s.major == s.minor == s.patch == "*"
+            and s.branch in (None, "*")
+            and s.commit_time in (None, "*")
+            and s.build_hash in (None, "*")
+        ):
+            return list(range(len(self.versions)))
 
-        for place in ("build_hash", "major", "minor", "patch", "branch", "commit_time"):
-            getter = attrgetter(place)
-            p: str | int | datetime.datetime | None = getter(s)
-            if p == "^":
-                # get the max number for `place` in version
-                max_p = max(getter(v) for v in versions)
+        tree = self._tree
+        if tree is None:
+            return []
 
-                versions = [v for v in versions if getter(v) == max_p]
-            elif p == "*" or p is None:
-                continue  # all versions match
+        columns: list[_Column] = [tree]
+        for p in (s.major, s.minor, s.patch):
+            if p == "^":
+                high = max(c.high for c in columns)
+                children = [c.children[high] for c in columns if c.high == high]
             elif p == "-":
-                # get the min number for `place` in version
-                min_p = min(getter(v) for v in versions)
-
-                versions = [v for v in versions if getter(v) == min_p]
+                low = min(c.low for c in columns)
+                children = [c.children[low] for c in columns if c.low == low]
+            elif p == "*":
+                children = [child for c in columns for child in c.children.values()]
             else:
-                versions = [v for v in versions if getter(v) == p]
+                children = [c.children[p] for c in columns if p in c.children]  # type: ignore
 
-            if not versions:
-                return ()
+            if not children:
+                return []
+            columns = children  # type: ignore
+        leaves: list[list[int]] = columns  # type: ignore
 
-        return tuple(versions)
+        if s.branch is not None and s.branch != "*":
+            in_branch = self._by_branch.get(s.branch, frozenset())
+            leaves = [[i for i in leaf if i in in_branch] for leaf in leaves]
+            leaves = [leaf for leaf in leaves if leaf]
+            if not leaves:
+                return []
+
+        versions = self.versions
+        if s.commit_time == "^":
+            # The leaves are sorted by commit time
+            newest = max(versions[leaf[-1]].commit_time for leaf in leaves)
+            indices = [i for leaf in leaves if versions[leaf[-1]].commit_time == newest for i in leaf]
+            indices = [i for i in indices if versions[i].commit_time == newest]
+        elif s.commit_time == "-":
+            oldest = min(versions[leaf[0]].commit_time for leaf in leaves)
+            indices = [i for leaf in leaves if versions[leaf[0]].commit_time == oldest for i in leaf]
+            indices = [i for i in indices if versions[i].commit_time == oldest]
+        elif s.commit_time == "*" or s.commit_time is None:
+            indices = [i for leaf in leaves for i in leaf]
+        else:
+            indices = [i for leaf in leaves for i in leaf if versions[i].commit_time == s.commit_time]
+
+        indices.sort()
+        return indices
 
 
 if __name__ == "__main__":  # Test BInfoMatcher
@@ -273,8 +370,8 @@ if __name__ == "__main__":  # Test BInfoMatcher
     matcher = BInfoMatcher(builds)
 
     def test_binfo_matcher():
-        # find the latest minor builds with any patch number
-        results = matcher.match(VersionSearchQuery("^", "^", "*"))
+        # find the latest minor builds with any patch number and commit time
+        results = matcher.match(VersionSearchQuery("^", "^", "*", commit_time="*"))
         assert results == (
             BasicBuildInfo(Version.parse("4.3.0"), "daily", "", datetime.datetime(2024, 7, 30, tzinfo=utc)),
             BasicBuildInfo(Version.parse("4.3.0"), "daily", "", datetime.datetime(2024, 7, 28, tzinfo=utc)),
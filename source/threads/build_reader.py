@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from modules.build_info import BuildInfo, fill_build_info
+from modules.task import Task
+from PyQt5.QtCore import pyqtSignal
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@dataclass(frozen=True)
+class WriteBuildTask(Task):
+    written = pyqtSignal()
+    error = pyqtSignal()
+
+    path: Path
+    build_info: BuildInfo
+
+    def run(self):
+        try:
+            self.build_info.write_to(self.path)
+            self.written.emit()
+        except Exception:
+            self.error.emit()
+            raise
+
+
+@dataclass(frozen=True)
+class ReadBuildTask(Task):
+    path: Path
+    info: BuildInfo | None = None
+    archive_name: str | None = None
+    auto_write: bool = True
+
+    finished = pyqtSignal(BuildInfo)
+    failure = pyqtSignal(Exception)
+
+    def run(self):
+        try:
+            build_info = fill_build_info(self.path, self.archive_name, self.info, self.auto_write)
+            self.finished.emit(build_info)
+
+        except Exception as e:
+            self.failure.emit(e)
+            raise
+
+    def __str__(self):
+        return f"Read build at {self.path}"
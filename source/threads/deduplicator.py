@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import logging
+import os
+import shutil
+import sys
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from modules.settings import get_library_folder
+from modules.task import Task
+from PyQt5.QtCore import pyqtSignal
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+logger = logging.getLogger()
+
+# Files smaller than this are not worth an extra inode lookup or a store entry
+MIN_DEDUP_SIZE = 4096
+
+# Files that are rewritten in place by the launcher and must never share their data
+EXCLUDED_NAMES = {".blinfo"}
+
+# Folders of the library that hold builds managed by the launcher
+DEDUP_FOLDERS = ("stable", "daily", "experimental")
+
+HASH_BUFSIZE = 1024 * 1024
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+
+def get_dedup_store_path() -> Path:
+    return Path(get_library_folder()) / ".dedup"
+
+
+def hash_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f, memoryview(bytearray(HASH_BUFSIZE)) as mv:
+        while n := f.readinto(mv):
+            h.update(mv[:n])
+    return h.hexdigest()
+
+
+def temp_path(path: Path) -> Path:
+    """A new path next to `path`, so concurrent tasks never write to the same file"""
+    return path.with_name(f"{path.name}.{uuid.uuid4().hex[:12]}.dedup")
+
+
+def reflink(src: Path, dst: Path) -> bool:
+    """Creates `dst` as a copy-on-write clone of `src`. Returns False if the filesystem does not support it.
+    Never opens an existing `dst`: it may be an object that is already linked into builds"""
+    if sys.platform != "linux":
+        return False
+
+    import fcntl
+
+    try:
+        with src.open("rb") as fsrc, dst.open("xb") as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except FileExistsError:
+        return False
+    except OSError:
+        with contextlib.suppress(FileNotFoundError):
+            dst.unlink()
+        return False
+
+    shutil.copymode(src, dst)
+    return True
+
+
+@dataclass
+class DeduplicationReport:
+    files_scanned: int = 0
+    files_linked: int = 0
+    bytes_saved: int = 0
+    objects_removed: int = 0
+
+    def __str__(self):
+        return f"Linked {self.files_linked} of {self.files_scanned} files, saved {self.bytes_saved / 1048576:.1f} MB"
+
+
+@dataclass
+class DedupStore:
+    """A content-addressed store of file objects, named after their SHA-256 digests
+
+    Build files are replaced with reflinks of the matching object where the filesystem supports it,
+    and with hardlinks otherwise.
+    """
+
+    path: Path
+    # (st_dev, st_ino) of every object, so files that are already linked can be skipped without hashing them
+    inodes: set[tuple[int, int]] = field(default_factory=set)
+    seen: set[str] = field(default_factory=set)
+
+    def __post_init__(self):
+        self.objects = self.path / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+
+        for obj in self.iter_objects():
+            st = obj.stat()
+            self.inodes.add((st.st_dev, st.st_ino))
+
+    def iter_objects(self):
+        for folder in self.objects.iterdir():
+            if folder.is_dir():
+                # Objects that are still being written are not objects yet
+                yield from (obj for obj in folder.iterdir() if obj.suffix != ".dedup")
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest[2:]
+
+    def add(self, path: Path, report: DeduplicationReport):
+        st = path.lstat()
+        report.files_scanned += 1
+
+        if (st.st_dev, st.st_ino) in self.inodes:
+            return
+
+        digest = hash_file(path)
+        self.seen.add(digest)
+        obj = self.object_path(digest)
+
+        try:
+            ost = obj.stat()
+        except FileNotFoundError:
+            obj.parent.mkdir(exist_ok=True)
+            self.publish(path, obj, st)
+            return
+
+        if ost.st_size != st.st_size:
+            return
+
+        tmp = temp_path(path)
+        if reflink(obj, tmp):
+            shutil.copymode(path, tmp)
+        elif ost.st_mode != st.st_mode:
+            # Identical content with different permissions can't share an inode
+            return
+        else:
+            os.link(obj, tmp)
+            self.inodes.add((ost.st_dev, ost.st_ino))
+        os.replace(tmp, path)
+        # Renaming does nothing if a concurrent task already linked `path` to the object
+        with contextlib.suppress(FileNotFoundError):
+            tmp.unlink()
+
+        report.files_linked += 1
+        report.bytes_saved += st.st_size
+
+    def publish(self, path: Path, obj: Path, st: os.stat_result):
+        """Makes `path` the object `obj`. The object only appears once it is complete, and a concurrent task that
+        published it first wins"""
+        tmp = temp_path(obj)
+        if reflink(path, tmp):
+            try:
+                with contextlib.suppress(FileExistsError):  # Added by a concurrent task
+                    os.link(tmp, obj)
+            finally:
+                tmp.unlink()
+            return
+
+        try:
+            os.link(path, obj)
+        except FileExistsError:  # Added by a concurrent task
+            return
+        self.inodes.add((st.st_dev, st.st_ino))
+
+    def add_files(
+        self,
+        files: list[tuple[Path, int]],
+        report: DeduplicationReport,
+        callback: Callable[[int, int], None] | None,
+    ):
+        total_size = sum(size for _, size in files)
+        processed_size = 0
+        for file, size in files:
+            try:
+                self.add(file, report)
+            except OSError as e:
+                logger.warning(f"Failed to deduplicate {file}: {e}")
+            processed_size += size
+            if callback is not None:
+                callback(processed_size, total_size)
+
+    def collect_garbage(self, report: DeduplicationReport):
+        """Removes objects that no build refers to anymore"""
+        for obj in list(self.iter_objects()):
+            if obj.parent.name + obj.name in self.seen:
+                continue
+            if obj.stat().st_nlink == 1:
+                obj.unlink()
+                report.objects_removed += 1
+                with contextlib.suppress(OSError):  # Only succeeds once the folder is empty
+                    obj.parent.rmdir()
+
+
+def dedup_candidates(root: Path) -> Iterable[tuple[Path, int]]:
+    """Yields the files under `root` worth deduplicating, along with their sizes"""
+    for path in root.rglob("*"):
+        # .dedup files are being swapped in by a concurrent task
+        if path.name in EXCLUDED_NAMES or path.suffix == ".dedup" or path.is_symlink() or not path.is_file():
+            continue
+        size = path.stat().st_size
+        if size >= MIN_DEDUP_SIZE:
+            yield path, size
+
+
+def deduplicate(
+    builds: Iterable[Path],
+    callback: Callable[[int, int], None] | None = None,
+    collect_garbage: bool = False,
+) -> DeduplicationReport:
+    report = DeduplicationReport()
+    store = DedupStore(get_dedup_store_path())
+
+    files = [file for build in builds for file in dedup_candidates(build)]
+    store.add_files(files, report, callback)
+
+    if collect_garbage:
+        store.collect_garbage(report)
+
+    logger.info(f"Deduplication finished: {report}")
+    return report
+
+
+@dataclass(frozen=True)
+class DeduplicateTask(Task):
+    path: Path
+
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)  # DeduplicationReport
+    failure = pyqtSignal(Exception)
+
+    def run(self):
+        try:
+            report = deduplicate((self.path,), self.progress.emit)
+            self.finished.emit(report)
+        except Exception as e:
+            self.failure.emit(e)
+            raise
+
+    def __str__(self):
+        return f"Deduplicate {self.path}"
+
+
+@dataclass(frozen=True)
+class CompactLibraryTask(Task):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)  # DeduplicationReport
+    failure = pyqtSignal(Exception)
+
+    def run(self):
+        try:
+            library_folder = Path(get_library_folder())
+            builds = [
+                build
+                for folder in DEDUP_FOLDERS
+                if (library_folder / folder).is_dir()
+                for build in (library_folder / folder).iterdir()
+                if build.is_dir()
+            ]
+            report = deduplicate(builds, self.progress.emit, collect_garbage=True)
+            self.finished.emit(report)
+        except Exception as e:
+            self.failure.emit(e)
+            raise
+
+    def __str__(self):
+        return "Compact library"
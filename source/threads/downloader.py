@@ -1,22 +1,43 @@
+from __future__ import annotations
+
+import hashlib
 import logging
 from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from modules._copyfileobj import copyfileobj
-from modules.connection_manager import REQUEST_MANAGER
+from modules.archive_cache import get_archive_cache
+from modules.checksums import manifest_checksum
 from modules.enums import MessageType
+from modules.progress_reporter import ProgressReporter
+from modules.request_metrics import host_of
+from modules.retry_policy import RETRY_STATUSES
 from modules.settings import get_library_folder
 from modules.task import Task
 from PyQt5.QtCore import pyqtSignal
-from urllib3.exceptions import MaxRetryError
+from urllib3.exceptions import HTTPError, ResponseError
+
+if TYPE_CHECKING:
+    from modules.connection_manager import ConnectionManager
+
+
+def get_validator(headers) -> str | None:
+    return headers.get("ETag") or headers.get("Last-Modified")
 
 
 @dataclass(frozen=True)
 class DownloadTask(Task):
-    manager: REQUEST_MANAGER
+    manager: ConnectionManager
     link: str
+    use_cache: bool = False
+    # Expected SHA-256 of the archive. If unknown, it is read from checksum_link when that is given
+    checksum: str | None = None
+    checksum_link: str | None = None
     progress = pyqtSignal(int, int)
+    rate = pyqtSignal(float, float)  # bytes/s, seconds left
     finished = pyqtSignal(Path)
+    failure = pyqtSignal()
 
     def run(self):
         self.progress.emit(0, 0)
@@ -24,21 +45,100 @@ class DownloadTask(Task):
         temp_folder.mkdir(exist_ok=True)
         dist = temp_folder / Path(self.link).name
 
+        cache = get_archive_cache() if self.use_cache else None
+        # The server is only asked whether the archive changed when there is one to reuse
+        if cache is not None and cache.contains(self.link) and cache.get(self.link, self._head_validator(), dist):
+            size = dist.stat().st_size
+            self.progress.emit(size, size)
+            self.finished.emit(dist)
+            return
+
+        checksum = self.checksum
+        if checksum is None and self.checksum_link is not None:
+            checksum = self._fetch_checksum(self.checksum_link)
+
         try:
-            with self.manager.request("GET", self.link, preload_content=False, timeout=10) as r:
-                self._download(r, dist)
-        except MaxRetryError as e:
-            logging.error(e)
-            self.message.emit("Requesting is taking longer than usual! see debug logs for more.", MessageType.ERROR)
-            with self.manager.request("GET", self.link, preload_content=False) as r:
-                self._download(r, dist)
+            # Interrupted downloads start over, so the whole transfer is retried rather than just the request
+            result = self.manager.retry_policy.run(
+                host_of(self.link),
+                lambda: self._attempt(dist, checksum),
+                on_retry=self._on_retry,
+                hold_slot=False,
+            )
+        except HTTPError as e:
+            logging.error(f"Failed to download {self.link}: {e}")
+            self.message.emit("Download failed! see debug logs for more.", MessageType.ERROR)
+            self.failure.emit()
+            return
+
+        if result is None:
+            self.failure.emit()
+            return
+        validator, hasher = result
+
+        if hasher is not None:
+            digest = hasher.hexdigest()
+            if digest != checksum:
+                logging.error(f"Checksum mismatch for {self.link}: expected {checksum}, got {digest}")
+                dist.unlink()
+                self.message.emit("Downloaded archive is corrupted! see debug logs for more.", MessageType.ERROR)
+                self.failure.emit()
+                return
+            logging.debug(f"Verified SHA-256 of {dist.name}")
+
+        if cache is not None:
+            cache.put(self.link, validator, dist)
 
         self.finished.emit(dist)
 
-    def _download(self, r, dist: Path):
+    def _head_validator(self) -> str | None:
+        try:
+            r = self.manager.raw_request("HEAD", self.link, timeout=10)
+        except HTTPError as e:
+            logging.debug(f"Could not validate cached archive for {self.link}: {e}")
+            return None
+        return get_validator(r.headers)
+
+    def _fetch_checksum(self, link: str) -> str | None:
+        try:
+            r = self.manager.raw_request("GET", link, timeout=10)
+        except HTTPError as e:
+            logging.debug(f"Could not fetch checksum {link}: {e}")
+            return None
+
+        if r.status != 200:
+            logging.debug(f"No checksum published at {link}")
+            return None
+
+        return manifest_checksum(r.data.decode("utf-8", errors="replace"), Path(self.link).name)
+
+    def _attempt(self, dist: Path, checksum: str | None):
+        hasher = hashlib.sha256() if checksum is not None else None
+        # The host's slot is only held until the response starts, the transfer itself can take minutes
+        with self.manager.retry_policy.slot(host_of(self.link)):
+            # A connection dropped mid-transfer has to raise instead of leaving a truncated archive behind
+            r = self.manager.raw_request(
+                "GET", self.link, preload_content=False, retry=False, timeout=10, enforce_content_length=True
+            )
+        with r:
+            if r.status in RETRY_STATUSES:
+                raise ResponseError(f"Server answered {r.status}")
+            if r.status != 200:
+                logging.error(f"Failed to download {self.link}: server answered {r.status}")
+                self.message.emit(f"Download failed with status {r.status}!", MessageType.ERROR)
+                return None
+            return self._download(r, dist, hasher), hasher
+
+    def _on_retry(self, attempt: int, delay: float, reason: str):
+        logging.error(f"Download of {self.link} failed (attempt {attempt}): {reason}")
+        self.message.emit("Requesting is taking longer than usual! see debug logs for more.", MessageType.ERROR)
+
+    def _download(self, r, dist: Path, hasher=None) -> str | None:
         size = int(r.headers["Content-Length"])
+        reporter = ProgressReporter(self.progress.emit, self.rate.emit)
         with dist.open("wb") as f:
-            copyfileobj(r, f, lambda x: self.progress.emit(x, size))
+            copyfileobj(r, f, lambda x: reporter(x, size), hasher=hasher)
+        return get_validator(r.headers)
 
     def __str__(self):
         return f"Download {self.link}"
@@ -1,13 +1,125 @@
+from __future__ import annotations
+
+import heapq
+import os
 import tarfile
 import zipfile
-from collections.abc import Callable
 from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from modules._platform import _check_call
+from modules.progress_reporter import ProgressReporter
 from modules.task import Task
 from PyQt5.QtCore import pyqtSignal
 
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+# Archives with fewer members than this are not worth the cost of spawning a process pool
+PARALLEL_ZIP_MIN_MEMBERS = 256
+
+# How many chunks to hand each worker. More chunks means finer-grained progress
+# reports and better load balancing, at the cost of reopening the archive more often
+CHUNKS_PER_WORKER = 4
+
+
+def get_extract_worker_count() -> int:
+    cpu_count = os.cpu_count()
+    if cpu_count is None:
+        return 1
+
+    return max(cpu_count - 1, 1)
+
+
+def partition_members(members: Sequence[zipfile.ZipInfo], count: int) -> list[list[zipfile.ZipInfo]]:
+    """Splits zip members into `count` chunks with roughly equal compressed sizes
+
+    Members are assigned largest-first to whichever chunk currently holds the least data,
+    so a handful of huge files does not end up sharing a worker with everything else.
+
+    Arguments:
+        members -- the file members of a zip archive
+        count -- the amount of chunks to create
+
+    Returns:
+        list[list[zipfile.ZipInfo]] -- non-empty chunks
+    """
+    chunks: list[list[zipfile.ZipInfo]] = [[] for _ in range(max(count, 1))]
+    heap = [(0, i) for i in range(len(chunks))]
+
+    for member in sorted(members, key=lambda m: m.compress_size, reverse=True):
+        size, i = heapq.heappop(heap)
+        chunks[i].append(member)
+        heapq.heappush(heap, (size + member.compress_size, i))
+
+    return [chunk for chunk in chunks if chunk]
+
+
+def member_path(destination: Path, member: zipfile.ZipInfo) -> Path:
+    """Where `ZipFile.extract` puts the member: drive letters, absolute paths and ".." are dropped, so nothing lands
+    outside of `destination`, and characters Windows does not allow are replaced"""
+    arcname = member.filename.replace("/", os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = [part for part in arcname.split(os.path.sep) if part not in ("", os.path.curdir, os.path.pardir)]
+    if os.path.sep == "\\":
+        table = str.maketrans(':<>|"?*', "_______")
+        parts = [stripped for part in parts if (stripped := part.translate(table).rstrip("."))]
+    return destination.joinpath(*parts)
+
+
+def _extract_zip_chunk(source: Path, destination: Path, names: list[str]) -> int:
+    """Runs in a worker process. Opens its own handle to the archive and extracts `names` from it"""
+    extracted_size = 0
+    with zipfile.ZipFile(source) as zf:
+        for name in names:
+            member = zf.getinfo(name)
+            zf.extract(member, destination)
+            extracted_size += member.file_size
+    return extracted_size
+
+
+def extract_zip_parallel(
+    source: Path,
+    destination: Path,
+    infolist: Sequence[zipfile.ZipInfo],
+    progress_callback: Callable[[int, int], None],
+    workers: int | None = None,
+):
+    # Loads multiprocessing, which nothing else needs at startup
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if workers is None:
+        workers = get_extract_worker_count()
+
+    uncompress_size = sum(member.file_size for member in infolist)
+    progress_callback(0, uncompress_size)
+
+    # Create the directory tree up front so workers never race on makedirs
+    files = []
+    for member in infolist:
+        if member.is_dir():
+            member_path(destination, member).mkdir(parents=True, exist_ok=True)
+        else:
+            member_path(destination, member).parent.mkdir(parents=True, exist_ok=True)
+            files.append(member)
+
+    chunks = partition_members(files, workers * CHUNKS_PER_WORKER)
+
+    extracted_size = 0
+    # Forking a process that runs Qt threads can copy locks held by other threads into the workers
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [
+            executor.submit(_extract_zip_chunk, source, destination, [member.filename for member in chunk])
+            for chunk in chunks
+        ]
+        for future in as_completed(futures):
+            extracted_size += future.result()
+            progress_callback(extracted_size, uncompress_size)
+
 
 def extract(source: Path, destination: Path, progress_callback: Callable[[int, int], None]):
     progress_callback(0, 0)
@@ -16,6 +128,11 @@ def extract(source: Path, destination: Path, progress_callback: Callable[[int, i
         with zipfile.ZipFile(source) as zf:
             infolist = zf.infolist()
             folder = infolist[0].filename.split("/")[0]
+
+            if len(infolist) >= PARALLEL_ZIP_MIN_MEMBERS and get_extract_worker_count() > 1:
+                extract_zip_parallel(source, destination, infolist, progress_callback)
+                return destination / folder
+
             uncompress_size = sum(member.file_size for member in infolist)
             progress_callback(0, uncompress_size)
             extracted_size = 0
@@ -60,12 +177,20 @@ class ExtractTask(Task):
     destination: Path
 
     progress = pyqtSignal(int, int)
+    rate = pyqtSignal(float, float)  # bytes/s, seconds left
     finished = pyqtSignal(Path)
+    failure = pyqtSignal()
 
     def run(self):
-        result = extract(self.file, self.destination, self.progress.emit)
+        try:
+            result = extract(self.file, self.destination, ProgressReporter(self.progress.emit, self.rate.emit))
+        except Exception:
+            self.failure.emit()
+            raise
         if result is not None:
             self.finished.emit(result)
+        else:
+            self.failure.emit()
 
     def __str__(self):
         return f"Extract {self.file} to {self.destination}"
@@ -1,35 +1,139 @@
-from subprocess import Popen
+from __future__ import annotations
 
-from PyQt5.QtCore import QThread, pyqtSignal
+import contextlib
+import logging
+import os
+import selectors
+import socket
+import threading
+import time
+from typing import TYPE_CHECKING
 
+from PyQt5.QtCore import QCoreApplication, QObject, Qt, QThread, pyqtSignal
 
-class Observer(QThread):
-    count_changed = pyqtSignal(int)
-    append_proc = pyqtSignal(Popen)
+if TYPE_CHECKING:
+    from subprocess import Popen
 
-    def __init__(self, parent):
+logger = logging.getLogger()
+
+# How often processes that cannot be waited on (without pidfd, outside of Linux) are polled
+POLL_INTERVAL = 0.1
+
+
+class WatchedProcess(QObject):
+    exited = pyqtSignal(int, float)  # exit code, runtime in seconds
+
+    def __init__(self, proc: Popen):
+        QObject.__init__(self)
+        self.proc = proc
+        self.started_at = time.monotonic()
+        self.returncode: int | None = None
+        self.runtime: float | None = None
+
+
+def _open_pidfd(pid: int) -> int | None:
+    """A file descriptor that becomes readable when the process exits, None where Linux pidfds are not available"""
+    if not hasattr(os, "pidfd_open"):
+        return None
+    try:
+        return os.pidfd_open(pid)
+    except OSError as e:  # kernels older than 5.3
+        logger.debug(f"Cannot open a pidfd for {pid}, polling it instead: {e}")
+        return None
+
+
+class ProcessReaper(QThread):
+    """Waits on every launched process from a single thread and reports their exits. On Linux the thread sleeps on
+    the pidfds of the processes, so an exit is noticed at once; elsewhere processes are polled every POLL_INTERVAL"""
+
+    process_exited = pyqtSignal(object)  # WatchedProcess
+    _reaped = pyqtSignal(object)  # WatchedProcess
+
+    def __init__(self):
         QThread.__init__(self)
-        self.parent = parent
-        self.processes = []
-        self.append_proc.connect(self.handle_append_proc)
+        # Exits are reported from the thread that watches, after whoever called `watch` connected to the result
+        self._reaped.connect(self._report, Qt.ConnectionType.QueuedConnection)
+        self._lock = threading.Lock()
+        self._pending: list[WatchedProcess] = []
+        self._stopping = False
+        # Selectors only take sockets on Windows
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+
+    def watch(self, proc: Popen) -> WatchedProcess:
+        """Starts waiting on the process. Connect to `exited` of the result to learn when it ends"""
+        watched = WatchedProcess(proc)
+        with self._lock:
+            self._pending.append(watched)
+        self._wake()
+        if not self.isRunning():
+            self.start()
+        return watched
+
+    def stop(self):
+        self._stopping = True
+        self._wake()
+        self.wait()
+
+    def _wake(self):
+        with contextlib.suppress(BlockingIOError):
+            self._wake_w.send(b"\0")
+
+    def _take_pending(self) -> list[WatchedProcess]:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return pending
+
+    def _reap(self, watched: WatchedProcess):
+        watched.returncode = watched.proc.wait()
+        watched.runtime = time.monotonic() - watched.started_at
+        logger.info(f"Process {watched.proc.pid} exited with {watched.returncode} after {watched.runtime:.1f}s")
+        self._reaped.emit(watched)
+
+    def _report(self, watched: WatchedProcess):
+        watched.exited.emit(watched.returncode, watched.runtime)
+        self.process_exited.emit(watched)
 
     def run(self):
-        while self.parent:
-            for proc in self.processes:
-                if proc.poll() is not None:
-                    proc.kill()
-                    self.processes.remove(proc)
-                    proc_count = len(self.processes)
-
-                    if proc_count > 0:
-                        self.count_changed.emit(proc_count)
+        polled: list[WatchedProcess] = []
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._wake_r, selectors.EVENT_READ)
+
+            while not self._stopping:
+                for watched in self._take_pending():
+                    pidfd = _open_pidfd(watched.proc.pid)
+                    if pidfd is None:
+                        polled.append(watched)
                     else:
-                        return
+                        selector.register(pidfd, selectors.EVENT_READ, watched)
+
+                for key, _ in selector.select(POLL_INTERVAL if polled else None):
+                    if key.fileobj is self._wake_r:
+                        with contextlib.suppress(BlockingIOError):
+                            self._wake_r.recv(512)
+                        continue
+                    selector.unregister(key.fd)
+                    os.close(key.fd)
+                    self._reap(key.data)
+
+                for watched in [w for w in polled if w.proc.poll() is not None]:
+                    polled.remove(watched)
+                    self._reap(watched)
+
+            for key in list(selector.get_map().values()):
+                if key.fileobj is not self._wake_r:
+                    os.close(key.fd)
+
 
-            QThread.sleep(1)
+_reaper: ProcessReaper | None = None
 
-        return
 
-    def handle_append_proc(self, proc):
-        self.processes.append(proc)
-        self.count_changed.emit(len(self.processes))
+def get_reaper() -> ProcessReaper:
+    """The reaper shared by every widget, stopped when the application quits"""
+    global _reaper
+    if _reaper is None:
+        _reaper = ProcessReaper()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_reaper.stop)
+    return _reaper
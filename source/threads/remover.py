@@ -2,9 +2,11 @@ from dataclasses import dataclass
 from pathlib import Path
 from shutil import rmtree
 
+from modules.lazy import lazy_import
 from modules.task import Task
 from PyQt5.QtCore import pyqtSignal
-from send2trash import send2trash
+
+send2trash = lazy_import("send2trash")
 
 
 @dataclass
@@ -16,7 +18,7 @@ class RemovalTask(Task):
     def run(self):
         try:
             if self.trash:
-                send2trash(str(self.path))
+                send2trash.send2trash(str(self.path))
             else:
                 if self.path.is_dir():
                     rmtree(self.path.as_posix())
@@ -1,18 +1,16 @@
 from __future__ import annotations
 
 import base64
-import contextlib
 import json
 import logging
 import re
+import time
 from datetime import datetime, timezone
-from itertools import chain
+from itertools import chain, islice
 from pathlib import Path
 from typing import TYPE_CHECKING
 from urllib.parse import urljoin
 
-import distro
-from bs4 import BeautifulSoup, SoupStrainer
 from modules._platform import get_architecture, get_platform, reset_locale, set_locale, stable_cache_path
 from modules.bl_api_manager import (
     dropdown_blender_version,
@@ -21,6 +19,10 @@ from modules.bl_api_manager import (
     update_stable_builds_cache,
 )
 from modules.build_info import BuildInfo, parse_blender_ver
+from modules.checksums import parse_sha256_manifest
+from modules.index_parser import IndexEntry, parse_index_links
+from modules.json_stream import iter_chunks, iter_json_array
+from modules.lazy import lazy_import
 from modules.scraper_cache import StableCache
 from modules.settings import (
     get_minimum_blender_stable_version,
@@ -33,20 +35,26 @@ from modules.settings import (
 )
 from PyQt5.QtCore import QThread, pyqtSignal
 from semver import Version
+from urllib3.exceptions import HTTPError
 
 if TYPE_CHECKING:
     from modules.connection_manager import ConnectionManager
 
 logger = logging.getLogger()
 
+distro = lazy_import("distro")
 
-def get_release_tag(connection_manager: ConnectionManager) -> str | None:
+# Builder feeds are decoded in pieces of this size, the archive feeds run into megabytes
+JSON_CHUNK_SIZE = 64 * 1024
+
+
+def get_release_tag(connection_manager: ConnectionManager, use_cache=True) -> str | None:
     if get_use_pre_release_builds():
         url = "https://api.github.com/repos/Victor-IX/Blender-Launcher-V2/releases"
-        latest_tag = get_tag(connection_manager, url, pre_release=True)
+        latest_tag = get_tag(connection_manager, url, pre_release=True, use_cache=use_cache)
     else:
         url = "https://github.com/Victor-IX/Blender-Launcher-V2/releases/latest"
-        latest_tag = get_tag(connection_manager, url)
+        latest_tag = get_tag(connection_manager, url, use_cache=use_cache)
 
     logger.info(f"Latest release tag: {latest_tag}")
 
@@ -57,8 +65,9 @@ def get_tag(
     connection_manager: ConnectionManager,
     url: str,
     pre_release=False,
+    use_cache=True,
 ) -> str | None:
-    r = connection_manager.request("GET", url)
+    r = connection_manager.request("GET", url, use_cache=use_cache)
 
     if r is None:
         return None
@@ -112,11 +121,11 @@ def get_tag(
         return tag
 
 
-def get_api_data(connection_manager: ConnectionManager, file: str) -> str | None:
+def get_api_data(connection_manager: ConnectionManager, file: str, use_cache=True) -> str | None:
     base_fmt = "https://api.github.com/repos/Victor-IX/Blender-Launcher-V2/contents/source/resources/api/{}.json"
     url = base_fmt.format(file)
     logger.debug(f"Start fetching API data from: {url}")
-    r = connection_manager.request("GET", url)
+    r = connection_manager.request("GET", url, use_cache=use_cache)
 
     if r is None:
         logger.error(f"Failed to fetch data from: {url}.")
@@ -182,30 +191,39 @@ class Scraper(QThread):
             regex_filter = r"blender-.+lin.+64.+tar+(?!.*sha256).*"
 
         self.b3d_link = re.compile(regex_filter, re.IGNORECASE)
+        self.sha256_link = re.compile(r"\.sha256$", re.IGNORECASE)
         self.hash = re.compile(r"\w{12}")
         self.subversion = re.compile(r"-\d\.[a-zA-Z0-9.]+-")
 
         self.scrape_stable = get_scrape_stable_builds()
         self.scrape_automated = get_scrape_automated_builds()
+        # Disabled for a forced check, so cached responses are fetched again
+        self.use_cache = True
 
     def run(self):
+        started = time.monotonic()
         self.get_api_data_manager()
         self.get_download_links()
         self.get_release_tag_manager()
 
+        logger.debug(f"Scrape finished in {time.monotonic() - started:.2f}s")
+        self.manager.log_connection_stats()
+        self.manager.log_request_metrics(since=started)
+
     def get_release_tag_manager(self):
         assert self.manager.manager is not None
-        latest_tag = get_release_tag(self.manager)
+        latest_tag = get_release_tag(self.manager, self.use_cache)
 
         if latest_tag is not None:
             self.new_bl_version.emit(latest_tag)
-        self.manager.manager.clear()
 
     def get_api_data_manager(self):
         assert self.manager.manager is not None
 
-        bl_api_data = get_api_data(self.manager, "blender_launcher_api")
-        blender_version_api_data = get_api_data(self.manager, f"stable_builds_api_{self.platform.lower()}")
+        bl_api_data = get_api_data(self.manager, "blender_launcher_api", self.use_cache)
+        blender_version_api_data = get_api_data(
+            self.manager, f"stable_builds_api_{self.platform.lower()}", self.use_cache
+        )
 
         if bl_api_data is not None:
             update_local_api_files(bl_api_data)
@@ -214,8 +232,6 @@ class Scraper(QThread):
 
         update_stable_builds_cache(blender_version_api_data)
 
-        self.manager.manager.clear()
-
     def get_download_links(self):
         set_locale()
 
@@ -242,37 +258,53 @@ class Scraper(QThread):
             f"{branch}/archive" if check_archive() else branch for branch, check_archive in branch_mapping.items()
         )
 
+        # Responses that go to the recorder are read in full anyway
+        stream = not self.manager.buffers_responses
+
         for branch_type in branches:
             url = base_fmt.format(branch_type)
-            r = self.manager.request("GET", url)
+            r = self.manager.request("GET", url, use_cache=self.use_cache, preload_content=not stream)
 
             if r is None:
                 continue
 
-            data = json.loads(r.data)
-            architecture_specific_build = False
-
             # Remove /archive from branch name
-            if "/archive" in branch_type:
-                branch_type = branch_type.replace("/archive", "")
-
-            for build in data:
-                if (
-                    build["platform"] == self.json_platform
-                    and build["architecture"].lower() == self.architecture.lower()
-                    and self.b3d_link.match(build["file_name"])
-                ):
-                    architecture_specific_build = True
-                    yield self.new_build_from_dict(build, branch_type, architecture_specific_build)
+            branch_name = branch_type.replace("/archive", "")
+
+            # Builds for the platform without a matching architecture, only used if there is none that matches
+            fallback = []
+            architecture_specific_build = False
+            chunks = r.stream(JSON_CHUNK_SIZE) if stream else iter_chunks(r.data, JSON_CHUNK_SIZE)
+            try:
+                for build in iter_json_array(chunks):
+                    if build["platform"] != self.json_platform or not self.b3d_link.match(build["file_name"]):
+                        continue
+                    if build["architecture"].lower() == self.architecture.lower():
+                        architecture_specific_build = True
+                        fallback.clear()
+                        yield self.new_build_from_dict(build, branch_name, architecture_specific_build)
+                    elif not architecture_specific_build:
+                        fallback.append(build)
+                # The array ends before the body does. Reading the rest lets the connection be reused, and the
+                # HTTP cache store the body
+                for _ in chunks:
+                    pass
+            except (json.JSONDecodeError, HTTPError) as e:
+                logger.error(f"Failed to read the {branch_type} builds from {url}: {e}")
+                continue
+            finally:
+                if stream:
+                    # A fully read response already went back to the pool. One that was left half read can't be
+                    # reused, and is dropped along with its HTTP cache entry
+                    r.close()
 
             if not architecture_specific_build:
                 logger.warning(
-                    f"No builds found for {branch_type} build on {self.platform} architecture {self.architecture}"
+                    f"No builds found for {branch_name} build on {self.platform} architecture {self.architecture}"
                 )
 
-                for build in data:
-                    if build["platform"] == self.json_platform and self.b3d_link.match(build["file_name"]):
-                        yield self.new_build_from_dict(build, branch_type, architecture_specific_build)
+                for build in fallback:
+                    yield self.new_build_from_dict(build, branch_name, architecture_specific_build)
 
     def new_build_from_dict(self, build, branch_type, architecture_specific_build):
         dt = datetime.fromtimestamp(build["file_mtime"], tz=timezone.utc)
@@ -303,27 +335,50 @@ class Scraper(QThread):
         )
 
     def scrap_download_links(self, url, branch_type, _limit=None):
-        r = self.manager.request("GET", url)
+        r = self.manager.request("GET", url, use_cache=self.use_cache)
 
         if r is None:
             return
 
-        content = r.data
+        entries = parse_index_links(r.data, build_vars=branch_type != "stable")
 
-        soup_stainer = SoupStrainer("a", href=True)
-        soup = BeautifulSoup(content, "lxml", parse_only=soup_stainer)
+        # Checksum manifests of this folder, fetched at most once each when a build needs them
+        manifests: dict[str, dict[str, str] | None] = {
+            entry.href: None for entry in entries if self.sha256_link.search(entry.href)
+        }
 
-        for tag in soup.find_all(limit=_limit, href=self.b3d_link):
-            build_info = self.new_blender_build(tag, url, branch_type)
+        for entry in islice((entry for entry in entries if self.b3d_link.search(entry.href)), _limit):
+            build_info = self.new_blender_build(entry, url, branch_type)
 
             if build_info is not None:
+                build_info.checksum = self.find_checksum(url, manifests, Path(build_info.link).name)
                 yield build_info
 
         r.release_conn()
         r.close()
 
-    def new_blender_build(self, tag, url, branch_type):
-        link = urljoin(url, tag["href"]).rstrip("/")
+    def find_checksum(self, url: str, manifests: dict[str, dict[str, str] | None], file_name: str) -> str | None:
+        # Manifests are named after the release they cover, e.g. blender-4.0.2.sha256
+        candidates = [href for href in manifests if file_name.startswith(href.removesuffix(".sha256") + "-")]
+
+        # Files that no manifest is named after are not looked up in every other one, that would cost a request each
+        for href in candidates:
+            checksums = manifests[href]
+            if checksums is None:
+                r = self.manager.request("GET", urljoin(url, href), use_cache=self.use_cache)
+                if r is None or r.status != 200:
+                    checksums = {}
+                else:
+                    checksums = parse_sha256_manifest(r.data.decode("utf-8", errors="replace"))
+                manifests[href] = checksums
+
+            if file_name in checksums:
+                return checksums[file_name]
+
+        return None
+
+    def new_blender_build(self, entry: IndexEntry, url, branch_type):
+        link = urljoin(url, entry.href).rstrip("/")
         r = self.manager.request("HEAD", link)
 
         if r is None:
@@ -343,12 +398,8 @@ class Scraper(QThread):
         subversion = parse_blender_ver(stem, search=True)
         branch = branch_type
         if branch_type != "stable":
-            build_var = ""
-            tag = tag.find_next("span", class_="build-var")
-
-            # For some reason tag can be None on macOS
-            if tag is not None:
-                build_var = tag.get_text()
+            # For some reason there can be no build-var on macOS
+            build_var = entry.build_var or ""
 
             if self.platform == "macOS":
                 if "arm64" in link:
@@ -370,17 +421,15 @@ class Scraper(QThread):
 
     def scrap_stable_releases(self):
         url = "https://download.blender.org/release/"
-        r = self.manager.request("GET", url)
+        r = self.manager.request("GET", url, use_cache=self.use_cache)
 
         if r is None:
             return
 
         content = r.data
-        soup = BeautifulSoup(content, "lxml")
-
         b3d_link = re.compile(r"Blender(\d+\.\d+)")
 
-        releases = soup.find_all(href=b3d_link)
+        releases = [entry for entry in parse_index_links(content) if b3d_link.search(entry.href)]
         if not any(releases):
             logger.info("Failed to gather stable releases")
             logger.info(content)
@@ -397,7 +446,7 @@ class Scraper(QThread):
 
         cache_modified = False
         for release in releases:
-            href = release["href"]
+            href = release.href
             match = re.search(b3d_link, href)
             if match is None:
                 continue
@@ -405,30 +454,27 @@ class Scraper(QThread):
             ver = parse_blender_ver(match.group(1))
             if ver >= minimum_smver_version:
                 # Check modified dates of folders, if available
-                date_sibling = release.find_next_sibling(string=True)
-                if date_sibling:
-                    date_str = " ".join(date_sibling.strip().split()[:2])
-                    with contextlib.suppress(ValueError):
-                        modified_date = datetime.strptime(date_str, "%d-%b-%Y %H:%M").astimezone(tz=timezone.utc)
-                        if ver not in self.cache:
-                            logger.debug(f"Creating new folder for version {ver}")
-                            folder = self.cache.new_build(ver)
-                        else:
-                            folder = self.cache[ver]
-
-                        if folder.modified_date != modified_date:
-                            builds = list(self.scrap_download_links(urljoin(url, href), "stable"))
-                            logger.debug(f"Caching {href}: {modified_date} (previous was {folder.modified_date})")
-
-                            folder.assets = builds
-                            folder.modified_date = modified_date
-
-                            cache_modified = True
-                        else:
-                            logger.debug(f"Skipping {href}: {modified_date}")
-                        builds = self.cache[ver].assets
-                        yield from builds
-                        continue
+                if release.date is not None:
+                    modified_date = release.date.astimezone(tz=timezone.utc)
+                    if ver not in self.cache:
+                        logger.debug(f"Creating new folder for version {ver}")
+                        folder = self.cache.new_build(ver)
+                    else:
+                        folder = self.cache[ver]
+
+                    if folder.modified_date != modified_date:
+                        builds = list(self.scrap_download_links(urljoin(url, href), "stable"))
+                        logger.debug(f"Caching {href}: {modified_date} (previous was {folder.modified_date})")
+
+                        folder.assets = builds
+                        folder.modified_date = modified_date
+
+                        cache_modified = True
+                    else:
+                        logger.debug(f"Skipping {href}: {modified_date}")
+                    builds = self.cache[ver].assets
+                    yield from builds
+                    continue
 
                 yield from self.scrap_download_links(urljoin(url, href), "stable")
 
@@ -1,12 +1,14 @@
 import abc
 import re
-import webbrowser
 
+from modules.lazy import lazy_import
 from PyQt5 import QtCore
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QAction, QWidget
 from widgets.base_menu_widget import BaseMenuWidget
 
+webbrowser = lazy_import("webbrowser")
+
 
 class BaseBuildWidget(QWidget):
     def __init__(self, parent):
@@ -10,6 +10,7 @@ class BaseProgressBarWidget(QProgressBar):
     def __init__(self, parent=None) -> None:
         super().__init__(parent)
         self.title = ""
+        self.rate_text = ""
 
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.setMinimum(0)
@@ -17,6 +18,7 @@ class BaseProgressBarWidget(QProgressBar):
 
     def set_title(self, title: str):
         self.title = title
+        self.rate_text = ""
         self.setFormat(f"{self.title}: {self.last_progress[0]:.1f} of {self.last_progress[1]:.1f} MB")
 
     @pyqtSlot(int, int)
@@ -33,6 +35,16 @@ class BaseProgressBarWidget(QProgressBar):
         total = total / 1048576
 
         # Repaint and call signal
-        self.setFormat(f"{self.title}: {obtained:.1f} of {total:.1f} MB")
+        self.setFormat(f"{self.title}: {obtained:.1f} of {total:.1f} MB{self.rate_text}")
         self.progress_updated.emit(obtained, total)
         self.last_progress = (obtained, total)
+
+    @pyqtSlot(float, float)
+    def set_rate(self, bytes_per_second: float, eta: float):
+        """Shows the throughput and the estimated time left next to the progress on its next update"""
+        if bytes_per_second <= 0:
+            self.rate_text = ""
+            return
+
+        minutes, seconds = divmod(int(eta), 60)
+        self.rate_text = f" ({bytes_per_second / 1048576:.1f} MB/s, {minutes}:{seconds:02} left)"
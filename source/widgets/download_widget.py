@@ -5,12 +5,21 @@ from enum import Enum
 from pathlib import Path
 from typing import TYPE_CHECKING, Literal
 
-from modules.build_info import BuildInfo, ReadBuildTask, parse_blender_ver
+from modules.build_info import BuildInfo, parse_blender_ver
+from modules.checksums import checksum_link
 from modules.enums import MessageType
-from modules.settings import get_install_template, get_library_folder
+from modules.lazy import lazy_import
+from modules.library import library_subfolder
+from modules.settings import (
+    get_deduplicate_builds,
+    get_install_template,
+    get_library_folder,
+    get_use_archive_cache,
+)
 from PyQt5.QtCore import Qt, pyqtSignal, pyqtSlot
 from PyQt5.QtWidgets import QHBoxLayout, QLabel, QPushButton, QVBoxLayout
 from semver import Version
+from threads.build_reader import ReadBuildTask
 from threads.downloader import DownloadTask
 from threads.extractor import ExtractTask
 from threads.renamer import RenameTask
@@ -26,6 +35,9 @@ if TYPE_CHECKING:
     from widgets.library_widget import LibraryWidget
     from windows.main_window import BlenderLauncher
 
+# Only needed when deduplication is turned on
+deduplicator = lazy_import("threads.deduplicator")
+
 
 class DownloadState(Enum):
     IDLE = 1
@@ -33,6 +45,7 @@ class DownloadState(Enum):
     EXTRACTING = 3
     READING = 4
     RENAMING = 5
+    DEDUPLICATING = 6
 
 
 class DownloadWidget(BaseBuildWidget):
@@ -161,14 +174,19 @@ class DownloadWidget(BaseBuildWidget):
             self.build_state_widget.setNewBuild(False)
             self.show_new = False
 
-        assert self.parent.manager is not None
         self.set_state(DownloadState.DOWNLOADING)
         self.dl_task = DownloadTask(
-            manager=self.parent.manager,
+            manager=self.parent.cm,
             link=self.build_info.link,
+            use_cache=get_use_archive_cache(),
+            # Stable builds cached before checksums were scraped have none, their manifest is fetched instead
+            checksum=self.build_info.checksum,
+            checksum_link=checksum_link(self.build_info.link, self.build_info.branch),
         )
         self.dl_task.progress.connect(self.progressBar.set_progress)
+        self.dl_task.rate.connect(self.progressBar.set_rate)
         self.dl_task.finished.connect(self.init_extractor)
+        self.dl_task.failure.connect(self.download_failed)
         self.parent.task_queue.append(self.dl_task)
 
     def set_state(self, state: DownloadState):
@@ -190,6 +208,9 @@ class DownloadWidget(BaseBuildWidget):
             self.progressBar.set_title("Extracting")
             self.cancelButton.setEnabled(False)
             self.build_state_widget.setExtract()
+        elif state == DownloadState.DEDUPLICATING:
+            self.progressBar.show()
+            self.progressBar.set_title("Deduplicating")
         elif state == DownloadState.READING:
             self.progressBar.show()
         # elif state == DownloadState.RENAMING:
@@ -197,18 +218,12 @@ class DownloadWidget(BaseBuildWidget):
     def init_extractor(self, source):
         self.set_state(DownloadState.EXTRACTING)
 
-        library_folder = Path(get_library_folder())
-
-        if self.build_info.branch in ("stable", "lts"):
-            dist = library_folder / "stable"
-        elif self.build_info.branch == "daily":
-            dist = library_folder / "daily"
-        else:
-            dist = library_folder / "experimental"
+        dist = Path(get_library_folder()) / library_subfolder(self.build_info.branch)
 
         self.source_file = source
         a = ExtractTask(file=source, destination=dist)
         a.progress.connect(self.progressBar.set_progress)
+        a.rate.connect(self.progressBar.set_rate)
         a.finished.connect(self.init_template_installer)
         self.parent.task_queue.append(a)
 
@@ -219,10 +234,24 @@ class DownloadWidget(BaseBuildWidget):
         if get_install_template():
             self.progressBar.set_title("Copying data...")
             t = TemplateTask(destination=self.build_dir)
-            t.finished.connect(self.download_get_info)
+            t.finished.connect(self.init_deduplicator)
             self.parent.task_queue.append(t)
         else:
+            self.init_deduplicator()
+
+    def init_deduplicator(self):
+        if not get_deduplicate_builds():
             self.download_get_info()
+            return
+
+        assert self.build_dir is not None
+        self.set_state(DownloadState.DEDUPLICATING)
+        t = deduplicator.DeduplicateTask(path=self.build_dir)
+        t.progress.connect(self.progressBar.set_progress)
+        t.finished.connect(self.download_get_info)
+        # The build is installed either way, it just takes more space
+        t.failure.connect(lambda _: self.download_get_info(deduplicator.DeduplicationReport()))
+        self.parent.task_queue.append(t)
 
     def download_cancelled(self):
         self.item.setSelected(True)
@@ -239,7 +268,11 @@ class DownloadWidget(BaseBuildWidget):
 
         self.build_state_widget.setDownload(False)
 
-    def download_get_info(self):
+    def download_failed(self):
+        self.set_state(DownloadState.IDLE)
+        self.downloadButton.show()
+
+    def download_get_info(self, *_):
         self.set_state(DownloadState.READING)
         if self.parent.platform == "Linux":
             archive_name = Path(self.build_info.link).with_suffix("").stem
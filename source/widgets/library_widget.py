@@ -15,8 +15,6 @@ from modules.build_info import (
     LaunchMode,
     LaunchOpenLast,
     LaunchWithBlendFile,
-    ReadBuildTask,
-    WriteBuildTask,
     launch_build,
 )
 from modules.settings import (
@@ -35,7 +33,8 @@ from PyQt5.QtGui import (
     QHoverEvent,
 )
 from PyQt5.QtWidgets import QAction, QApplication, QHBoxLayout, QLabel, QWidget
-from threads.observer import Observer
+from threads.build_reader import ReadBuildTask, WriteBuildTask
+from threads.observer import get_reaper
 from threads.register import Register
 from threads.remover import RemovalTask
 from threads.template_installer import TemplateTask
@@ -50,6 +49,7 @@ from windows.custom_build_dialog_window import CustomBuildDialogWindow
 from windows.dialog_window import DialogWindow
 
 if TYPE_CHECKING:
+    from threads.observer import WatchedProcess
     from windows.main_window import BlenderLauncher
 
 logger = logging.getLogger()
@@ -80,7 +80,7 @@ class LibraryWidget(BaseBuildWidget):
         self.link = link
         self.list_widget = list_widget
         self.show_new = show_new
-        self.observer = None
+        self.processes: list[WatchedProcess] = []
         self.build_info: BuildInfo | None = None
         self.child_widget = None
         self.parent_widget = parent_widget
@@ -457,14 +457,25 @@ class LibraryWidget(BaseBuildWidget):
         proc = launch_build(self.build_info, exe, launch_mode=launch_mode)
 
         assert proc is not None
-        if self.observer is None:
-            self.observer = Observer(self)
-            self.observer.count_changed.connect(self.proc_count_changed)
-            self.observer.started.connect(self.observer_started)
-            self.observer.finished.connect(self.observer_finished)
-            self.observer.start()
+        watched = get_reaper().watch(proc)
+        watched.exited.connect(self.process_exited)
+        self.processes.append(watched)
+
+        if len(self.processes) == 1:
+            self.processes_started()
+        self.proc_count_changed(len(self.processes))
+
+    @pyqtSlot(int, float)
+    def process_exited(self, returncode: int, runtime: float):
+        watched = self.sender()
+        if watched not in self.processes:
+            return
+        self.processes.remove(watched)
 
-        self.observer.append_proc.emit(proc)
+        if self.processes:
+            self.proc_count_changed(len(self.processes))
+        else:
+            self.processes_finished()
 
     def proc_count_changed(self, count):
         self.build_state_widget.setCount(count)
@@ -472,21 +483,20 @@ class LibraryWidget(BaseBuildWidget):
         if self.child_widget is not None:
             self.child_widget.proc_count_changed(count)
 
-    def observer_started(self):
+    def processes_started(self):
         self.deleteAction.setEnabled(False)
         self.installTemplateAction.setEnabled(False)
 
         if self.child_widget is not None:
-            self.child_widget.observer_started()
+            self.child_widget.processes_started()
 
-    def observer_finished(self):
-        self.observer = None
+    def processes_finished(self):
         self.build_state_widget.setCount(0)
         self.deleteAction.setEnabled(True)
         self.installTemplateAction.setEnabled(True)
 
         if self.child_widget is not None:
-            self.child_widget.observer_finished()
+            self.child_widget.processes_finished()
 
     @QtCore.pyqtSlot()
     def rename_branch(self):
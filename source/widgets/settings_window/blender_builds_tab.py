@@ -1,10 +1,12 @@
 from modules.bl_api_manager import dropdown_blender_version
 from modules.settings import (
     favorite_pages,
+    get_archive_cache_size,
     get_bash_arguments,
     get_blender_startup_arguments,
     get_check_for_new_builds_automatically,
     get_check_for_new_builds_on_startup,
+    get_deduplicate_builds,
     get_enable_quick_launch_key_seq,
     get_install_template,
     get_launch_blender_no_console,
@@ -18,10 +20,13 @@ from modules.settings import (
     get_show_daily_archive_builds,
     get_show_experimental_archive_builds,
     get_show_patch_archive_builds,
+    get_use_archive_cache,
+    set_archive_cache_size,
     set_bash_arguments,
     set_blender_startup_arguments,
     set_check_for_new_builds_automatically,
     set_check_for_new_builds_on_startup,
+    set_deduplicate_builds,
     set_enable_quick_launch_key_seq,
     set_install_template,
     set_launch_blender_no_console,
@@ -34,6 +39,7 @@ from modules.settings import (
     set_show_daily_archive_builds,
     set_show_experimental_archive_builds,
     set_show_patch_archive_builds,
+    set_use_archive_cache,
 )
 from PyQt5 import QtGui
 from PyQt5.QtCore import Qt
@@ -44,6 +50,7 @@ from PyQt5.QtWidgets import (
     QGridLayout,
     QLabel,
     QLineEdit,
+    QPushButton,
     QSpinBox,
 )
 from widgets.settings_form_widget import SettingsFormWidget
@@ -54,6 +61,7 @@ from .settings_group import SettingsGroup
 class BlenderBuildsTabWidget(SettingsFormWidget):
     def __init__(self, parent=None):
         super().__init__(parent=parent)
+        self.parent = parent
 
         # Checking for builds settings
         self.buildcheck_settings = SettingsGroup("Checking For Builds", parent=self)
@@ -72,11 +80,13 @@ class BlenderBuildsTabWidget(SettingsFormWidget):
 
         # Whether to check for new builds based on a timer
         self.CheckForNewBuildsAutomatically = QCheckBox()
-        self.CheckForNewBuildsAutomatically.setChecked(False)
+        self.CheckForNewBuildsAutomatically.setChecked(get_check_for_new_builds_automatically())
         self.CheckForNewBuildsAutomatically.clicked.connect(self.toggle_check_for_new_builds_automatically)
         self.CheckForNewBuildsAutomatically.setText("Check automatically")
         self.CheckForNewBuildsAutomatically.setToolTip(
-            "Check for new Blender builds automatically\
+            "Check for new Blender builds automatically in the background\
+            \nStable builds are checked less often than daily, experimental and patch builds,\
+            \nand checks that find nothing new are spaced out further\
             \nDEFAULT: Off"
         )
         # How often to check for new builds if ^^ enabled
@@ -84,11 +94,11 @@ class BlenderBuildsTabWidget(SettingsFormWidget):
         self.NewBuildsCheckFrequency.setEnabled(get_check_for_new_builds_automatically())
         self.NewBuildsCheckFrequency.setContextMenuPolicy(Qt.ContextMenuPolicy.NoContextMenu)
         self.NewBuildsCheckFrequency.setToolTip(
-            "Time in hours between new Blender builds check\
+            "Time in hours between checks for new daily, experimental and patch builds\
             \nDEFAULT: 12h"
         )
         self.NewBuildsCheckFrequency.setMaximum(24 * 7 * 4)  # 4 weeks?
-        self.NewBuildsCheckFrequency.setMinimum(12)
+        self.NewBuildsCheckFrequency.setMinimum(1)
         self.NewBuildsCheckFrequency.setPrefix("Interval: ")
         self.NewBuildsCheckFrequency.setSuffix("h")
         self.NewBuildsCheckFrequency.setValue(get_new_builds_check_frequency())
@@ -193,10 +203,49 @@ class BlenderBuildsTabWidget(SettingsFormWidget):
         self.InstallTemplate.clicked.connect(self.toggle_install_template)
         self.InstallTemplate.setChecked(get_install_template())
 
+        # Deduplicate Builds
+        self.DeduplicateBuilds = QCheckBox()
+        self.DeduplicateBuilds.setText("Deduplicate Builds")
+        self.DeduplicateBuilds.setToolTip(
+            "Replace files shared between installed builds with links to a single copy\
+            \nDEFAULT: Off"
+        )
+        self.DeduplicateBuilds.clicked.connect(self.toggle_deduplicate_builds)
+        self.DeduplicateBuilds.setChecked(get_deduplicate_builds())
+        self.CompactLibraryButton = QPushButton("Compact Library")
+        self.CompactLibraryButton.setToolTip("Deduplicate every build that is already installed")
+        self.CompactLibraryButton.clicked.connect(self.compact_library)
+
+        # Archive Cache
+        self.UseArchiveCache = QCheckBox()
+        self.UseArchiveCache.setText("Keep Downloaded Archives")
+        self.UseArchiveCache.setToolTip(
+            "Keep downloaded archives so reinstalling a build does not download it again\
+            \nDEFAULT: Off"
+        )
+        self.UseArchiveCache.clicked.connect(self.toggle_use_archive_cache)
+        self.UseArchiveCache.setChecked(get_use_archive_cache())
+        self.ArchiveCacheSize = QSpinBox()
+        self.ArchiveCacheSize.setEnabled(get_use_archive_cache())
+        self.ArchiveCacheSize.setContextMenuPolicy(Qt.ContextMenuPolicy.NoContextMenu)
+        self.ArchiveCacheSize.setToolTip(
+            "Maximum size of the archive cache, least recently used archives are removed first\
+            \nDEFAULT: 10 GB"
+        )
+        self.ArchiveCacheSize.setRange(1, 1024)
+        self.ArchiveCacheSize.setPrefix("Size: ")
+        self.ArchiveCacheSize.setSuffix(" GB")
+        self.ArchiveCacheSize.setValue(get_archive_cache_size())
+        self.ArchiveCacheSize.editingFinished.connect(self.archive_cache_size_changed)
+
         self.downloading_layout = QGridLayout()
         self.downloading_layout.addWidget(self.EnableMarkAsFavorite, 0, 0, 1, 1)
         self.downloading_layout.addWidget(self.MarkAsFavorite, 0, 1, 1, 1)
         self.downloading_layout.addWidget(self.InstallTemplate, 1, 0, 1, 2)
+        self.downloading_layout.addWidget(self.DeduplicateBuilds, 2, 0, 1, 1)
+        self.downloading_layout.addWidget(self.CompactLibraryButton, 2, 1, 1, 1)
+        self.downloading_layout.addWidget(self.UseArchiveCache, 3, 0, 1, 1)
+        self.downloading_layout.addWidget(self.ArchiveCacheSize, 3, 1, 1, 1)
         self.download_settings.setLayout(self.downloading_layout)
 
         # Launching builds settings
@@ -289,6 +338,20 @@ class BlenderBuildsTabWidget(SettingsFormWidget):
     def toggle_install_template(self, is_checked):
         set_install_template(is_checked)
 
+    def toggle_deduplicate_builds(self, is_checked):
+        set_deduplicate_builds(is_checked)
+
+    def toggle_use_archive_cache(self, is_checked):
+        set_use_archive_cache(is_checked)
+        self.ArchiveCacheSize.setEnabled(is_checked)
+
+    def archive_cache_size_changed(self):
+        set_archive_cache_size(self.ArchiveCacheSize.value())
+
+    def compact_library(self):
+        self.CompactLibraryButton.setEnabled(False)
+        self.parent.compact_library(done=lambda: self.CompactLibraryButton.setEnabled(True))
+
     def toggle_mark_as_favorite(self, is_checked):
         self.MarkAsFavorite.setEnabled(is_checked)
         if is_checked:
@@ -341,7 +404,7 @@ class BlenderBuildsTabWidget(SettingsFormWidget):
         self.NewBuildsCheckFrequency.setEnabled(is_checked)
 
     def new_builds_check_frequency_changed(self):
-        set_new_builds_check_frequency(self.NewBuildsCheckFrequency.value() * 60)
+        set_new_builds_check_frequency(self.NewBuildsCheckFrequency.value())
 
     def toggle_check_on_startup(self, is_checked):
         set_check_for_new_builds_on_startup(is_checked)
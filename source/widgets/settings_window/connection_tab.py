@@ -5,6 +5,7 @@ from modules.settings import (
     get_proxy_type,
     get_proxy_user,
     get_use_custom_tls_certificates,
+    get_use_http_cache,
     get_user_id,
     proxy_types,
     set_proxy_host,
@@ -13,6 +14,7 @@ from modules.settings import (
     set_proxy_type,
     set_proxy_user,
     set_use_custom_tls_certificates,
+    set_use_http_cache,
     set_user_id,
 )
 from PyQt5 import QtGui
@@ -26,6 +28,7 @@ from .settings_group import SettingsGroup
 class ConnectionTabWidget(SettingsFormWidget):
     def __init__(self, parent=None):
         super().__init__(parent=parent)
+        self.parent = parent
 
         # Proxy Settings
         self.proxy_settings = SettingsGroup("Proxy", parent=self)
@@ -137,31 +140,69 @@ class ConnectionTabWidget(SettingsFormWidget):
 
         self.addRow(self.connection_authentication_settings)
 
+        # HTTP Cache
+        self.http_cache_settings = SettingsGroup("HTTP Cache", parent=self)
+
+        self.UseHTTPCacheCheckBox = QCheckBox()
+        self.UseHTTPCacheCheckBox.setText("Cache Responses")
+        self.UseHTTPCacheCheckBox.setToolTip(
+            "Keep API data and build listings on disk and only download them again when the server reports a change\
+            \nForce Check always downloads them again\
+            \nDEFAULT: True"
+        )
+        self.UseHTTPCacheCheckBox.setChecked(get_use_http_cache())
+        self.UseHTTPCacheCheckBox.clicked.connect(self.toggle_use_http_cache)
+
+        http_cache_layout = QFormLayout()
+        http_cache_layout.addRow(self.UseHTTPCacheCheckBox)
+        self.http_cache_settings.setLayout(http_cache_layout)
+        self.addRow(self.http_cache_settings)
+
         self.proxy_settings.setLayout(layout)
         self.addRow(self.proxy_settings)
 
+    def apply_connection_settings(self):
+        if self.parent is not None:
+            self.parent.cm.reconfigure()
+
     def toggle_use_custom_tls_certificates(self, is_checked):
         set_use_custom_tls_certificates(is_checked)
+        self.apply_connection_settings()
+
+    def toggle_use_http_cache(self, is_checked):
+        set_use_http_cache(is_checked)
+        self.apply_connection_settings()
 
     def change_proxy_type(self, proxy_type):
         set_proxy_type(proxy_type)
+        self.apply_connection_settings()
 
     def update_proxy_host(self):
         host = self.ProxyHostLineEdit.text()
-        set_proxy_host(host)
+        if host != get_proxy_host():
+            set_proxy_host(host)
+            self.apply_connection_settings()
 
     def update_proxy_port(self):
         port = self.ProxyPortLineEdit.text()
-        set_proxy_port(port)
+        if port != get_proxy_port():
+            set_proxy_port(port)
+            self.apply_connection_settings()
 
     def update_proxy_user(self):
         user = self.ProxyUserLineEdit.text()
-        set_proxy_user(user)
+        if user != get_proxy_user():
+            set_proxy_user(user)
+            self.apply_connection_settings()
 
     def update_proxy_password(self):
         password = self.ProxyPasswordLineEdit.text()
-        set_proxy_password(password)
+        if password != get_proxy_password():
+            set_proxy_password(password)
+            self.apply_connection_settings()
 
     def update_user_id(self):
         user_id = self.UserIDLineEdit.text()
-        set_user_id(user_id)
+        if user_id != get_user_id():
+            set_user_id(user_id)
+            self.apply_connection_settings()
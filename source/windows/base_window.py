@@ -32,7 +32,6 @@ class BaseWindow(QMainWindow):
             # Setup pool manager
             self.cm = ConnectionManager(version=version)
             self.cm.setup()
-            self.manager = self.cm.manager
 
             # Setup font
             QFontDatabase.addApplicationFont(":resources/fonts/OpenSans-SemiBold.ttf")
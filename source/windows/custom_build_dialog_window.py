@@ -7,7 +7,7 @@ from enum import Enum
 from typing import TYPE_CHECKING
 
 from modules._platform import get_platform
-from modules.build_info import BuildInfo, ReadBuildTask
+from modules.build_info import BuildInfo
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtWidgets import (
     QCheckBox,
@@ -22,6 +22,7 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QWidget,
 )
+from threads.build_reader import ReadBuildTask
 from widgets.lintable_line_edit import LintableLineEdit
 from windows.base_window import BaseWindow
 
@@ -3,11 +3,14 @@ from __future__ import annotations
 import contextlib
 import json
 import logging
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import timezone
 from pathlib import Path
 from typing import TYPE_CHECKING
 
 from items.enablable_list_widget_item import EnablableListWidgetItem
-from modules.blendfile_reader import BlendfileHeader, read_blendfile_header
+from modules.blendfile_reader import BlendfileHeader, read_blendfile_info
 from modules.build_info import BuildInfo, LaunchOpenLast, LaunchWithBlendFile, launch_build
 from modules.settings import (
     get_favorite_path,
@@ -18,6 +21,7 @@ from modules.settings import (
 from modules.tasks import TaskQueue
 from modules.version_matcher import VALID_QUERIES, BInfoMatcher, VersionSearchQuery
 from modules.version_matcher import BasicBuildInfo as BBI
+from PyQt5 import sip
 from PyQt5.QtCore import Qt, QTimer, pyqtSlot
 from PyQt5.QtGui import QFont, QFontMetricsF, QKeyEvent
 from PyQt5.QtWidgets import (
@@ -34,10 +38,28 @@ from widgets.lintable_line_edit import LintableLineEdit
 from windows.base_window import BaseWindow
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable
     from datetime import datetime
 
 logger = logging.getLogger()
 
+# More builds changing state than this are put in order by refilling the list, instead of moving them one by one
+MOVE_LIMIT = 64
+
+
+@dataclass
+class ListedBuild:
+    """A build in the list, with its label measured once"""
+
+    info: BuildInfo
+    basic: BBI
+    item: EnablableListWidgetItem
+    label: tuple[str, str, str, str]
+    widths: tuple[float, float, float, float]
+    rank: int = 0
+    "Its place among the builds sorted oldest first"
+    matched: bool = False
+
 
 class LaunchingWindow(BaseWindow):
     def __init__(
@@ -46,31 +68,44 @@ class LaunchingWindow(BaseWindow):
         version_query: VersionSearchQuery | None = None,
         blendfile: Path | None = None,
         open_last: bool = False,
+        builds: Iterable[BuildInfo] | None = None,
+        exit_on_launch: bool = True,
     ):
+        """`builds` skips reading the library, for a launcher that already knows its builds. Unless `exit_on_launch`
+        is False, the application quits once a build is launched"""
         super().__init__(app=app)
         self.resize(480, 480)
         self.setFocus(Qt.FocusReason.PopupFocusReason)
 
-        # task queue
-        self.task_queue = TaskQueue(
-            worker_count=1,
-            parent=self,
-        )
-        self.task_queue.start()
-
         self.version_query = version_query
         self.blendfile = blendfile
         self.saved_header: BlendfileHeader | None = None
         self.open_last = open_last
+        self.exit_on_launch = exit_on_launch
+        self.launched_build: BuildInfo | None = None
 
         # Get all available versions of Blender
-        self.builds: dict[str, BuildInfo] = {}
-        self.list_items: dict[BBI, EnablableListWidgetItem] = {}
-        self.label_elements: dict[BBI, tuple[str, str, str, str]] = {}
-        self.drawing_task = DrawLibraryTask()
-        self.drawing_task.found.connect(self._build_found)
-        self.drawing_task.finished.connect(self.search_finished)
-        self.task_queue.append(self.drawing_task)
+        self.builds: dict[BBI, ListedBuild] = {}
+        # Built when first searched, and again after builds are added. `listed` is in the order of its versions
+        self.matcher: BInfoMatcher | None = None
+        self.listed: list[ListedBuild] = []
+        # The builds of enabled items, and the sort key of each row in the list
+        self.matched: list[ListedBuild] = []
+        self.row_keys: list[tuple[bool, int]] = []
+        self.order_outdated = False
+        self.task_queue: TaskQueue | None = None
+        if builds is None:
+            # task queue
+            self.task_queue = TaskQueue(
+                worker_count=1,
+                parent=self,
+            )
+            self.task_queue.start()
+
+            self.drawing_task = DrawLibraryTask()
+            self.drawing_task.found.connect(self._build_found)
+            self.drawing_task.finished.connect(self.search_finished)
+            self.task_queue.append(self.drawing_task)
 
         self.launch_timer = QTimer(self)
         self.launch_timer.setSingleShot(True)
@@ -141,13 +176,14 @@ class LaunchingWindow(BaseWindow):
         else:
             self.save_current_query_button = None
 
-        if self.version_query is not None:
-            self.update_query_boxes(self.version_query)
-
         self.builds_list = QListWidget(self)
         self.builds_list.itemSelectionChanged.connect(self.cancel_timer)
         self.builds_list.itemDoubleClicked.connect(self.set_query_from_selected_build)
 
+        # Filling the boxes searches the list
+        if self.version_query is not None:
+            self.update_query_boxes(self.version_query)
+
         self.central_layout.addWidget(self.status_label, 0, 1, 1, 2)
         self.central_layout.addWidget(self.help_label, 0, 0, 1, 1)
         self.central_layout.addWidget(QLabel("Version selection: ", parent=self), 1, 0, 1, 1)
@@ -172,6 +208,12 @@ class LaunchingWindow(BaseWindow):
         self.__disabled_font = QFont(self.font_8)
         self.__disabled_font.setItalic(True)
         self.__disabled_font.setWeight(QFont.Weight.Light)
+        self.__metrics = QFontMetricsF(self.__disabled_font)
+
+        if builds is not None:
+            for info in builds:
+                self.add_build(info)
+            self.search_finished()
 
     @pyqtSlot()
     def update_query_from_edits(self, update_actual_query=True):
@@ -231,8 +273,7 @@ class LaunchingWindow(BaseWindow):
     def set_query_from_selected_build(self):
         items = self.builds_list.selectedItems()
         if len(items) == 1:  # get build info from the item and set it as the query
-            text = items[0].text()
-            build = self.builds[text]
+            build: BuildInfo = items[0].build
             version = build.full_semversion
 
             vsq = VersionSearchQuery(
@@ -254,23 +295,39 @@ class LaunchingWindow(BaseWindow):
             with blinfo.open("r", encoding="utf-8") as f:
                 blinfo = json.load(f)
             with contextlib.suppress(Exception):
-                info = BuildInfo.from_dict(str(pth), blinfo["blinfo"][0])
+                self.add_build(BuildInfo.from_dict(str(pth), blinfo["blinfo"][0]))
 
-                semversion = self.__version_url(info)
-                combined_url = " ".join(semversion)
+    def add_build(self, info: BuildInfo):
+        semversion = self.__version_url(info)
 
-                item = EnablableListWidgetItem(
-                    enabled_font=self.__enabled_font,
-                    disable_font=self.__disabled_font,
-                    build=info,
-                    parent=self.builds_list,
-                )
-                item.setText(combined_url)
-                basic_info = BBI.from_buildinfo(info)
+        item = EnablableListWidgetItem(
+            enabled_font=self.__enabled_font,
+            disable_font=self.__disabled_font,
+            build=info,
+            parent=self.builds_list,
+        )
+        item.setText(" ".join(semversion))
+        item.enabled = False
+        basic_info = BBI.from_buildinfo(info)
+
+        # A copy of a build takes the place of the one found before
+        if (copy := self.builds.get(basic_info)) is not None:
+            self.builds_list.takeItem(self.builds_list.row(copy.item))
+            sip.delete(copy.item)
+            if copy.matched:
+                self.matched.remove(copy)
+        self.builds[basic_info] = ListedBuild(
+            info=info,
+            basic=basic_info,
+            item=item,
+            label=semversion,
+            widths=tuple(self.__width(s) for s in semversion),  # type: ignore
+        )
+        self.matcher = None
+        self.order_outdated = True
 
-                self.builds[combined_url] = info
-                self.list_items[basic_info] = item
-                self.label_elements[basic_info] = semversion
+    def __width(self, s: str) -> float:
+        return self.__metrics.size(Qt.TextFlag.TextSingleLine, s).width()
 
     @staticmethod
     def __version_url(info: BuildInfo) -> tuple[str, str, str, str]:
@@ -302,44 +359,20 @@ class LaunchingWindow(BaseWindow):
 
     def repad_list(self):
         # Update the items so the text is aligned correctly
-        # loop over the builds and get the max length for each piece
-        target_p_len = 0
-        target_v_len = 0
-        target_b_len = 0
-        target_dtime = 0
-        metrics = QFontMetricsF(self.__disabled_font)
-
-        def sizeof(s):
-            return metrics.size(Qt.TextFlag.TextSingleLine, s).width()
-
-        size_of_space = sizeof(" ")
-        for build in self.list_items:
-            p, v, b, dtime = self.label_elements[build]
-            target_p_len = max(target_p_len, sizeof(p))
-            target_v_len = max(target_v_len, sizeof(v))
-            target_b_len = max(target_b_len, sizeof(b))
-            target_dtime = max(target_dtime, sizeof(dtime))
-
-        # edit the text on the list items to align the text
-        def formatter(p: str, v: str, b: str, dtime: str) -> str:
-            # get the proper number of spaces to fill the max length
-            num_of_spaces_p = int(max(0, target_p_len - sizeof(p)) // size_of_space)
-            num_of_spaces_v = int(max(0, target_v_len - sizeof(v)) // size_of_space)
-            num_of_spaces_b = int(max(0, target_b_len - sizeof(b)) // size_of_space)
-            num_of_spaces_d = int(max(0, target_dtime - sizeof(dtime)) // size_of_space)
-            return f"{p}{' ' * num_of_spaces_p} {v}{' ' * num_of_spaces_v} {b}{' ' * num_of_spaces_b} {dtime}{' ' * num_of_spaces_d}"
-
-        # rebuild the dictionaries and format the text
-        for build, item in self.list_items.copy().items():
-            build = self.builds.pop(item.text())
-            basic_info = BBI.from_buildinfo(build)
-
-            p, v, b, dtime = self.label_elements.pop(basic_info)
-
-            new_text = formatter(p, v, b, dtime)
-            item.setText(new_text)
-            self.builds[new_text] = build
-            self.label_elements[basic_info] = (p, v, b, dtime)
+        # get the max width of each piece, measured when the builds were added
+        if not self.builds:
+            return
+        targets = [max(widths) for widths in zip(*(listed.widths for listed in self.builds.values()))]
+        size_of_space = self.__width(" ")
+
+        # pad each piece with the proper number of spaces to fill the max width
+        for listed in self.builds.values():
+            text = " ".join(
+                f"{piece}{' ' * int(max(0, target - width) // size_of_space)}"
+                for piece, width, target in zip(listed.label, listed.widths, targets)
+            )
+            if listed.item.text() != text:
+                listed.item.setText(text)
 
     @pyqtSlot()
     def search_finished(self):
@@ -349,25 +382,30 @@ class LaunchingWindow(BaseWindow):
 
         # Use quick launch if it exists
         if self.version_query is None and self.blendfile is None and (path := get_favorite_path()):
-            for build in self.builds.values():
-                if build.link == path:
-                    self.list_items[BBI.from_buildinfo(build)].setSelected(True)
+            for listed in self.builds.values():
+                if listed.info.link == path:
+                    listed.item.setSelected(True)
                     self.set_query_from_selected_build()
 
-        self.matcher = self.make_matcher()
-
         all_queries = get_version_specific_queries()
 
         if self.version_query is not None:  # then it was given via the CLI
             self.update_query_boxes(self.version_query)
 
         if self.blendfile is not None and self.blendfile.exists():  # check the blendfile's target version
-            header = read_blendfile_header(self.blendfile)
-            logger.debug(f"HEADER: {header}")
-            if header is None:
-                raise
+            info = read_blendfile_info(self.blendfile, thumbnail=False)
+            logger.debug(f"BLENDFILE: {info}")
+            if info is None:
+                raise Exception("Could not decode blendfile header")
+            header = info.header
             self.saved_header = header
-            self.status_label.setText(f"Detected header version: {header.version}")
+            if info.subversion is not None:
+                self.status_label.setText(
+                    f"Detected header version: {header.version.major}.{header.version.minor} "
+                    f"(subversion {info.subversion})"
+                )
+            else:
+                self.status_label.setText(f"Detected header version: {header.version}")
             if self.save_current_query_button is not None:
                 self.save_current_query_button.setText(
                     f"Save current search for .blend files made in {header.version.major}.{header.version.minor}"
@@ -392,7 +430,7 @@ class LaunchingWindow(BaseWindow):
         if self.launch_timer_duration != -1 and len(matches) == 1:
             self.ready = True
             build = builds[0]
-            self.list_items[BBI.from_buildinfo(build)].setSelected(True)
+            self.matched[0].item.setSelected(True)
 
             if self.launch_timer_duration == 0:  # launch immediately
                 self.actually_launch(build)
@@ -400,33 +438,98 @@ class LaunchingWindow(BaseWindow):
                 self.prepare_launch(build)
 
     def make_matcher(self):
-        return BInfoMatcher(tuple(map(BBI.from_buildinfo, self.builds.values())))
+        self.listed = list(self.builds.values())
+        return BInfoMatcher(tuple(listed.basic for listed in self.listed))
 
     def update_search(self) -> tuple[tuple[BBI, ...], list[BuildInfo]]:
-        """Updates the visibility of each item in the list depending on the search query. returns matches"""
+        """Updates the state of each item in the list depending on the search query. returns matches"""
         assert self.version_query is not None
         logger.debug(f"QUERY: {self.version_query!r}")
-        matcher = self.make_matcher()
-        matches = matcher.match(self.version_query)
-        versions = {b.version for b in matches}
+        if self.matcher is None:
+            self.matcher = self.make_matcher()
+        matched = [self.listed[i] for i in self.matcher.match_positions(self.version_query)]
+
+        # Only the items of builds that started or stopped matching change
+        still_matched = {id(listed) for listed in matched}
+        changed = [listed for listed in matched if not listed.matched]
+        changed.extend(listed for listed in self.matched if id(listed) not in still_matched)
+        self.matched = matched
+        if self.order_outdated or len(changed) > MOVE_LIMIT:
+            for listed in changed:
+                self.toggle(listed)
+            self.refill_list()
+        elif changed:
+            self.move_items(changed)
+
+        self.launch_button.setEnabled(len(matched) == 1)
+
+        return tuple(listed.basic for listed in matched), [listed.info for listed in matched]
 
-        enabled_builds: list[BuildInfo] = []
-
-        for build in self.builds.values():
-            item = self.list_items[BBI.from_buildinfo(build)]
-
-            item.enabled = build.full_semversion in versions
-            if item.enabled:
-                enabled_builds.append(build)
-
-        if len(versions) != 1:
-            self.launch_button.setEnabled(False)
-        else:
-            self.launch_button.setEnabled(True)
+    @staticmethod
+    def toggle(listed: ListedBuild):
+        listed.matched = not listed.matched
+        listed.item.enabled = listed.matched
 
-        self.builds_list.sortItems(Qt.SortOrder.DescendingOrder)
+    @staticmethod
+    def age_key(listed: ListedBuild) -> tuple[int, int, int, datetime]:
+        """Sorts builds oldest first. Commit times without a timezone are taken as UTC, so they compare with the rest"""
+        basic = listed.basic
+        commit_time = basic.commit_time
+        if commit_time.tzinfo is None:
+            commit_time = commit_time.replace(tzinfo=timezone.utc)
+        return basic.major, basic.minor, basic.patch, commit_time
 
-        return matches, enabled_builds
+    @staticmethod
+    def row_key(listed: ListedBuild) -> tuple[bool, int]:
+        """Sorts matching builds first, newest first"""
+        return not listed.matched, -listed.rank
+
+    def refill_list(self):
+        """Takes every item out of the list and puts them back in order"""
+        if self.order_outdated:
+            ordered = sorted(self.builds.values(), key=self.age_key)
+            for rank, listed in enumerate(ordered):
+                listed.rank = rank
+            self.order_outdated = False
+
+        selected = self.builds_list.selectedItems()
+        self.builds_list.setUpdatesEnabled(False)
+        taken = [self.builds_list.takeItem(row) for row in reversed(range(self.builds_list.count()))]
+
+        ordered = sorted(self.builds.values(), key=self.row_key)
+        for listed in ordered:
+            self.builds_list.addItem(listed.item)
+        self.row_keys = [self.row_key(listed) for listed in ordered]
+
+        # Items are put back as they are, anything that no build refers to anymore is deleted
+        listed_items = {id(listed.item) for listed in ordered}
+        for item in taken:
+            if id(item) not in listed_items:
+                sip.delete(item)
+
+        for item in selected:
+            item.setSelected(True)
+        self.builds_list.setUpdatesEnabled(True)
+
+    def move_items(self, changed: list[ListedBuild]):
+        """Moves the items of builds that started or stopped matching to their new place in the list"""
+        selected = []
+        for listed in changed:
+            row = bisect_left(self.row_keys, self.row_key(listed))
+            del self.row_keys[row]
+            if listed.item.isSelected():
+                selected.append(listed.item)
+            self.builds_list.takeItem(row)
+
+        for listed in changed:
+            self.toggle(listed)
+            key = self.row_key(listed)
+            row = bisect_left(self.row_keys, key)
+            self.row_keys.insert(row, key)
+            self.builds_list.insertItem(row, listed.item)
+
+        for item in selected:
+            item.setSelected(True)
 
     @pyqtSlot()
     def save_current_query(self):
@@ -496,9 +599,11 @@ class LaunchingWindow(BaseWindow):
             launch_mode = LaunchOpenLast()
 
         launch_build(info=build, launch_mode=launch_mode)
+        self.launched_build = build
 
         self.close()
-        self.app.exit()
+        if self.exit_on_launch:
+            self.app.exit()
 
     @pyqtSlot()
     def close_(self):
@@ -506,5 +611,6 @@ class LaunchingWindow(BaseWindow):
         self.close()
 
     def closeEvent(self, e):
-        self.task_queue.fullstop()
+        if self.task_queue is not None:
+            self.task_queue.fullstop()
         e.accept()
@@ -6,21 +6,22 @@ import re
 import shlex
 import shutil
 import sys
-import webbrowser
 from datetime import datetime, timezone
 from enum import Enum
-from functools import partial
+from functools import cache, partial
 from pathlib import Path
-from platform import version
 from time import localtime, mktime, strftime
 from typing import TYPE_CHECKING
 
 from items.base_list_widget_item import BaseListWidgetItem
+from modules import instance_protocol as ipc
 from modules._platform import _popen, get_cwd, get_launcher_name, get_platform, is_frozen
-from modules.connection_manager import ConnectionManager
 from modules.enums import MessageType
+from modules.lazy import lazy_import
+from modules.refresh_scheduler import RefreshScheduler, branch_group
 from modules.settings import (
     create_library_folders,
+    get_check_for_new_builds_automatically,
     get_check_for_new_builds_on_startup,
     get_default_downloads_page,
     get_default_library_page,
@@ -32,7 +33,7 @@ from modules.settings import (
     get_launch_minimized_to_tray,
     get_library_folder,
     get_make_error_popup,
-    get_proxy_type,
+    get_new_builds_check_frequency,
     get_quick_launch_key_seq,
     get_scrape_automated_builds,
     get_scrape_stable_builds,
@@ -48,6 +49,7 @@ from modules.settings import (
     set_tray_icon_notified,
 )
 from modules.tasks import Task, TaskQueue, TaskWorker
+from modules.version_matcher import VersionSearchQuery
 from PyQt5.QtCore import QSize, Qt, pyqtSignal, pyqtSlot
 from PyQt5.QtNetwork import QLocalServer
 from PyQt5.QtWidgets import (
@@ -77,20 +79,34 @@ from widgets.library_widget import LibraryWidget
 from windows.base_window import BaseWindow
 from windows.dialog_window import DialogIcon, DialogWindow
 from windows.file_dialog_window import FileDialogWindow
+from windows.launching_window import LaunchingWindow
 from windows.settings_window import SettingsWindow
 
-try:
-    from pynput import keyboard
+webbrowser = lazy_import("webbrowser")
+# Only needed once the library is compacted
+deduplicator = lazy_import("threads.deduplicator")
 
-    HOTKEYS_AVAILABLE = True
-except Exception as e:
-    logging.error(f"Error importing pynput: {e}\nGlobal hotkeys not supported.")
-    HOTKEYS_AVAILABLE = False
+
+@cache
+def load_hotkeys():
+    """pynput's keyboard module, or None where global hotkeys are not supported.
+
+    Imported on first use only, pynput connects to the display server while it is imported.
+    """
+    try:
+        from pynput import keyboard
+    except Exception as e:
+        logging.error(f"Error importing pynput: {e}\nGlobal hotkeys not supported.")
+        return None
+    return keyboard
 
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from modules.build_info import BuildInfo
     from PyQt5.QtGui import QDragEnterEvent, QDragMoveEvent
+    from PyQt5.QtNetwork import QLocalSocket
     from widgets.base_build_widget import BaseBuildWidget
     from widgets.base_list_widget import BaseListWidget
 
@@ -124,7 +140,7 @@ class BlenderLauncher(BaseWindow):
 
         # Server
         self.server = QLocalServer()
-        self.server.listen("blender-launcher-server")
+        self.server.listen(ipc.SERVER_NAME)
         self.quick_launch_fail_signal.connect(self.quick_launch_fail)
         self.server.newConnection.connect(self.new_connection)
 
@@ -148,7 +164,7 @@ class BlenderLauncher(BaseWindow):
         self.cashed_builds = []
         self.notification_pool = []
         self.windows = [self]
-        self.timer = None
+        self.launching_windows: set[LaunchingWindow] = set()
         self.started = True
         self.latest_tag = ""
         self.new_downloads = False
@@ -164,6 +180,8 @@ class BlenderLauncher(BaseWindow):
         self.setWindowTitle("Blender Launcher")
         self.app.setWindowIcon(self.icons.taskbar)
 
+        self.cm.error.connect(self.connection_error)
+
         # Setup scraper
         self.scraper = Scraper(self, self.cm)
         self.scraper.links.connect(self.draw_to_downloads)
@@ -171,6 +189,14 @@ class BlenderLauncher(BaseWindow):
         self.scraper.stable_error.connect(self.scraper_error)
         self.scraper.new_bl_version.connect(self.set_version)
         self.scraper.finished.connect(self.scraper_finished)
+        # Groups of branches ("stable", "automated") being checked, and the ones with builds not seen before
+        self.checking_groups: set[str] = set()
+        self.new_build_groups: set[str] = set()
+        self.check_failed = False
+
+        # Background checks
+        self.scheduler = RefreshScheduler(self)
+        self.scheduler.due.connect(self.scheduled_check)
 
         # Vesrion Update
         self.pre_release_build = get_use_pre_release_builds
@@ -483,7 +509,8 @@ class BlenderLauncher(BaseWindow):
     def setup_global_hotkeys_listener(self):
         if self.hk_listener is not None:
             self.hk_listener.stop()
-        if HOTKEYS_AVAILABLE:
+        keyboard = load_hotkeys()
+        if keyboard is not None:
             key_seq = get_quick_launch_key_seq()
             keys = key_seq.split("+")
 
@@ -690,9 +717,7 @@ class BlenderLauncher(BaseWindow):
 
     def destroy(self):
         self.quit_signal.emit()
-
-        if self.timer is not None:
-            self.timer.cancel()
+        self.scheduler.stop()
 
         self.tray_icon.hide()
         self.app.quit()
@@ -701,13 +726,7 @@ class BlenderLauncher(BaseWindow):
         self.set_status("Reading local builds", False)
 
         if clear:
-            self.cm = ConnectionManager(version=version, proxy_type=get_proxy_type())
-            self.cm.setup()
-            self.cm.error.connect(self.connection_error)
-            self.manager = self.cm.manager
-
-            if self.timer is not None:
-                self.timer.cancel()
+            self.scheduler.stop()
             if self.scraper is not None:
                 self.scraper.quit()
             self.DownloadsStableListWidget.clear_()
@@ -749,13 +768,10 @@ class BlenderLauncher(BaseWindow):
 
         utcnow = strftime(("%H:%M"), localtime())
         self.set_status("Error: connection failed at " + utcnow)
+        if self.app_state == AppState.CHECKINGBUILDS:
+            self.check_failed = True
         self.app_state = AppState.IDLE
 
-        # if get_check_for_new_builds_automatically() is True:
-        #     self.timer = threading.Timer(
-        #         get_new_builds_check_frequency(), self.draw_downloads)
-        #     self.timer.start()
-
     @pyqtSlot(str)
     def scraper_error(self, s: str):
         self.DownloadsStablePageWidget.set_info_label_text(s)
@@ -763,44 +779,70 @@ class BlenderLauncher(BaseWindow):
     def force_check(self):
         if QApplication.queryKeyboardModifiers() & Qt.Modifier.SHIFT:  # Shift held while pressing check
             # Ignore scrape_stable and scrape_automated settings
-            self.start_scraper(True, True)
+            self.start_scraper(True, True, use_cache=False)
         else:
             # Use settings
-            self.start_scraper()
+            self.start_scraper(use_cache=False)
+
+    @pyqtSlot(bool, bool)
+    def scheduled_check(self, stable_due: bool, automated_due: bool):
+        """Checks the groups of branches the scheduler found due, leaving the builds listed for the others alone"""
+        scrape_stable = stable_due and get_scrape_stable_builds()
+        scrape_automated = automated_due and get_scrape_automated_builds()
+        logger.debug(f"Scheduled check for new builds (stable: {scrape_stable}, automated: {scrape_automated})")
+        self.start_scraper(scrape_stable, scrape_automated, groups={"stable": stable_due, "automated": automated_due})
+
+    def start_scraper(self, scrape_stable=None, scrape_automated=None, use_cache=True, groups=None):
+        """Starts a check for new builds
+
+        `groups` limits which download pages are refreshed, as {"stable": bool, "automated": bool}. All of them
+        are by default, and the pages of disabled scrapers are cleared.
+        """
+        if self.scraper.isRunning():
+            logger.debug("A check for new builds is already running")
+            return
 
-    def start_scraper(self, scrape_stable=None, scrape_automated=None):
         self.set_status("Checking for new builds", False)
 
         if scrape_stable is None:
             scrape_stable = get_scrape_stable_builds()
         if scrape_automated is None:
             scrape_automated = get_scrape_automated_builds()
+        if groups is None:
+            groups = {"stable": True, "automated": True}
 
-        if scrape_stable:
-            self.DownloadsStablePageWidget.set_info_label_text("Checking for new builds")
-        else:
-            self.DownloadsStablePageWidget.set_info_label_text("Checking for stable builds is disabled")
+        if groups["stable"]:
+            if scrape_stable:
+                self.DownloadsStablePageWidget.set_info_label_text("Checking for new builds")
+            else:
+                self.DownloadsStablePageWidget.set_info_label_text("Checking for stable builds is disabled")
 
-        if scrape_automated:
-            msg = "Checking for new builds"
-        else:
-            msg = "Checking for automated builds is disabled"
+        if groups["automated"]:
+            if scrape_automated:
+                msg = "Checking for new builds"
+            else:
+                msg = "Checking for automated builds is disabled"
 
-        for page in self.DownloadsToolBox.pages:
-            if page is not self.DownloadsStablePageWidget:
-                page.set_info_label_text(msg)
+            for page in self.DownloadsToolBox.pages:
+                if page is not self.DownloadsStablePageWidget:
+                    page.set_info_label_text(msg)
 
-        # Sometimes these builds end up being invalid, particularly when new builds are available, which, there usually
-        # are at least once every two days. They are so easily gathered there's little loss here
-        self.DownloadsDailyListWidget.clear_()
-        self.DownloadsExperimentalListWidget.clear_()
+            # Sometimes these builds end up being invalid, particularly when new builds are available, which, there
+            # usually are at least once every two days. They are so easily gathered there's little loss here
+            self.DownloadsDailyListWidget.clear_()
+            self.DownloadsExperimentalListWidget.clear_()
 
-        self.cashed_builds.clear()
+        self.checking_groups = {group for group, refresh in groups.items() if refresh}
+        self.cashed_builds = [b for b in self.cashed_builds if branch_group(b.branch) not in self.checking_groups]
+        self.new_build_groups.clear()
+        self.check_failed = False
         self.new_downloads = False
         self.app_state = AppState.CHECKINGBUILDS
+        self.scheduler.run_started()
 
         self.scraper.scrape_stable = scrape_stable
         self.scraper.scrape_automated = scrape_automated
+        self.scraper.use_cache = use_cache
         self.scraper.manager = self.cm
         self.scraper.start()
 
@@ -809,6 +851,8 @@ class BlenderLauncher(BaseWindow):
             self.show_message("New builds of Blender are available!", message_type=MessageType.NEWBUILDS)
 
         for list_widget in self.DownloadsToolBox.list_widgets:
+            if ("stable" if list_widget is self.DownloadsStableListWidget else "automated") not in self.checking_groups:
+                continue
             for widget in list_widget.widgets.copy():
                 if widget.build_info not in self.cashed_builds:
                     widget.destroy()
@@ -819,17 +863,18 @@ class BlenderLauncher(BaseWindow):
         self.last_time_checked = dt
         self.app_state = AppState.IDLE
 
-        # if get_check_for_new_builds_automatically() is True:
-        #     self.timer = threading.Timer(
-        #         get_new_builds_check_frequency(), self.draw_downloads)
-        #     self.timer.start()
-        #     self.started = False
+        self.scheduler.run_finished(self.checking_groups, self.new_build_groups, self.check_failed)
         self.ready_to_scrape()
 
     def ready_to_scrape(self):
         self.app_state = AppState.IDLE
         self.set_status("Last check at " + self.last_time_checked.strftime(DATETIME_FORMAT), True)
 
+        self.apply_check_settings()
+
+    def apply_check_settings(self):
+        self.scheduler.configure(get_check_for_new_builds_automatically(), get_new_builds_check_frequency() * 3600)
+
     def draw_from_cashed(self, build_info):
         if self.app_state == AppState.IDLE:
             for cashed_build in self.cashed_builds:
@@ -873,6 +918,7 @@ class BlenderLauncher(BaseWindow):
             downloads_list_widget.add_item(item, widget)
             if is_new:
                 self.new_downloads = True
+                self.new_build_groups.add(branch_group(branch))
 
     def draw_to_library(self, path: Path, show_new=False):
         branch = Path(path).parent.name
@@ -982,6 +1028,18 @@ class BlenderLauncher(BaseWindow):
         a = RemovalTask(path)
         self.task_queue.append(a)
 
+    def compact_library(self, done: Callable[[], None] | None = None):
+        """Queues a CompactLibraryTask. `done` is called once it finished or failed"""
+        a = deduplicator.CompactLibraryTask()
+        a.finished.connect(self.compact_library_finished)
+        if done is not None:
+            a.finished.connect(lambda _: done())
+            a.failure.connect(lambda _: done())
+        self.task_queue.append(a)
+
+    def compact_library_finished(self, report):
+        self.show_message(f"Library compacted! {report}")
+
     def _aboutToQuit(self):  # MacOS Target
         self.quit_()
 
@@ -1024,16 +1082,47 @@ class BlenderLauncher(BaseWindow):
             self.quit_()
 
     def new_connection(self):
-        self.socket = self.server.nextPendingConnection()
-        assert self.socket is not None
-        self.socket.readyRead.connect(self.read_socket_data)
-        self._show()
+        while (socket := self.server.nextPendingConnection()) is not None:
+            socket.readyRead.connect(partial(self.read_socket_data, socket))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def read_socket_data(self, socket: QLocalSocket):
+        while socket.bytesAvailable():
+            if bytes(socket.peek(1)) == b"{":
+                if not socket.canReadLine():
+                    # The rest of the message has not arrived yet
+                    return
+                data = bytes(socket.readLine())
+            else:
+                # Launchers from before the protocol send their version without a newline
+                data = bytes(socket.readAll())
 
-    def read_socket_data(self):
-        assert self.socket is not None
-        data = self.socket.readAll()
+            try:
+                answer = self.handle_instance_request(ipc.decode(data))
+            except ValueError as e:
+                logger.error(f"Malformed message from another instance: {e}")
+                answer = ipc.reply(ipc.ERROR, str(e))
+
+            # Clients that do not wait for an answer may be gone already
+            if socket.isWritable():
+                socket.write(answer)
+                socket.flush()
+
+    def handle_instance_request(self, message: dict) -> bytes:
+        """Answers a request from another Blender Launcher process, see modules.instance_protocol"""
+        protocol = message.get("protocol", 0)
+        if not isinstance(protocol, int) or protocol > ipc.PROTOCOL_VERSION:
+            return ipc.reply(ipc.ERROR, f"Unsupported protocol version {protocol}")
+
+        command = message.get("command")
+        same_version = message.get("launcher") == str(self.version)
+        logger.debug(f"Request from another instance: {message}")
+
+        if command == ipc.SHOW:
+            self._show()
+            if same_version:
+                return ipc.reply(ipc.OK)
 
-        if str(data, encoding="ascii") != str(self.version):
             self.dlg = DialogWindow(
                 parent=self,
                 title="Warning",
@@ -1045,6 +1134,59 @@ class BlenderLauncher(BaseWindow):
                 cancel_text=None,
                 icon=DialogIcon.WARNING,
             )
+            return ipc.reply(ipc.VERSION_MISMATCH, f"Blender Launcher {self.version} is already running")
+
+        if command == ipc.LAUNCH:
+            if not same_version:
+                # Builds are resolved the way the requesting version does it, in its own process
+                return ipc.reply(ipc.VERSION_MISMATCH, f"Blender Launcher {self.version} is already running")
+            try:
+                return self.launch_from_request(message)
+            except Exception as e:
+                logger.exception(f"Failed to launch for another instance: {e}")
+                return ipc.reply(ipc.ERROR, str(e))
+
+        return ipc.reply(ipc.ERROR, f"Unknown command {command!r}")
+
+    def launch_from_request(self, message: dict) -> bytes:
+        """Resolves a forwarded `launch` against the builds already shown in the library, instead of reading the
+        library folder again in a new process"""
+        version = message.get("version")
+        query = VersionSearchQuery.parse(version) if version else None
+        file = Path(message["file"]) if message.get("file") else None
+
+        builds = [
+            widget.build_info
+            for list_widget in (
+                self.LibraryStableListWidget,
+                self.LibraryDailyListWidget,
+                self.LibraryExperimentalListWidget,
+                self.UserCustomListWidget,
+            )
+            for widget in list_widget.widgets
+            if isinstance(widget, LibraryWidget) and widget.build_info is not None
+        ]
+        if not builds:
+            return ipc.reply(ipc.ERROR, "The library has not been read yet")
+
+        window = LaunchingWindow(
+            self.app,
+            version_query=query,
+            blendfile=file,
+            open_last=bool(message.get("open_last")),
+            builds=builds,
+            exit_on_launch=False,
+        )
+        build = window.launched_build
+        if build is not None:
+            return ipc.reply(ipc.LAUNCHED, f"Launched {Path(build.link).parent.stem}/{build.full_semversion}")
+
+        # Kept alive until it is closed
+        self.launching_windows.add(window)
+        window.destroyed.connect(lambda: self.launching_windows.discard(window))
+        window.show()
+        window.activateWindow()
+        return ipc.reply(ipc.CHOOSING, "Choose the build in the running Blender Launcher")
 
     def open_docs(self):
         webbrowser.open("https://Victor-IX.github.io/Blender-Launcher-V2")
@@ -3,16 +3,8 @@ from modules.settings import (
     get_enable_high_dpi_scaling,
     get_enable_quick_launch_key_seq,
     get_new_builds_check_frequency,
-    get_proxy_host,
-    get_proxy_password,
-    get_proxy_port,
-    get_proxy_type,
-    get_proxy_user,
-    get_user_id,
     get_quick_launch_key_seq,
-    get_use_custom_tls_certificates,
     get_worker_thread_count,
-    proxy_types,
 )
 from PyQt5.QtCore import QSize, Qt
 from PyQt5.QtWidgets import QSizePolicy, QTabWidget, QVBoxLayout, QWidget
@@ -47,14 +39,6 @@ class SettingsWindow(BaseWindow):
         self.old_enable_quick_launch_key_seq = get_enable_quick_launch_key_seq()
         self.old_quick_launch_key_seq = get_quick_launch_key_seq()
 
-        self.old_use_custom_tls_certificates = get_use_custom_tls_certificates()
-        self.old_proxy_type = get_proxy_type()
-        self.old_proxy_host = get_proxy_host()
-        self.old_proxy_port = get_proxy_port()
-        self.old_proxy_user = get_proxy_user()
-        self.old_proxy_password = get_proxy_password()
-        self.old_user_id = get_user_id()
-
         self.old_check_for_new_builds_automatically = get_check_for_new_builds_automatically()
         self.old_new_builds_check_frequency = get_new_builds_check_frequency()
 
@@ -113,54 +97,16 @@ class SettingsWindow(BaseWindow):
         elif self.old_quick_launch_key_seq != quick_launch_key_seq and enable_quick_launch_key_seq:
             self.parent.setup_global_hotkeys_listener()
 
-        """Update connection"""
-        use_custom_tls_certificates = get_use_custom_tls_certificates()
-        proxy_type = get_proxy_type()
-        proxy_host = get_proxy_host()
-        proxy_port = get_proxy_port()
-        proxy_user = get_proxy_user()
-        proxy_password = get_proxy_password()
-        user_id = get_user_id()
-
-        # Restart app if any of the connection settings changed
-        if self.old_use_custom_tls_certificates != use_custom_tls_certificates:
-            pending_to_restart.append(
-                "Use Custom TLS Certificates: "
-                + checkdct[self.old_use_custom_tls_certificates]
-                + "🠆"
-                + checkdct[use_custom_tls_certificates]
-            )
-
-        if self.old_proxy_type != proxy_type:
-            r_proxy_types = dict(zip(proxy_types.values(), proxy_types.keys()))
-
-            pending_to_restart.append(f"Proxy Type: {r_proxy_types[self.old_proxy_type]}🠆{r_proxy_types[proxy_type]}")
-
-        if self.old_proxy_host != proxy_host:
-            pending_to_restart.append(f"Proxy Host: {self.old_proxy_host}🠆{proxy_host}")
-
-        if self.old_proxy_port != proxy_port:
-            pending_to_restart.append(f"Proxy Port: {self.old_proxy_port}🠆{proxy_port}")
-
-        if self.old_proxy_user != proxy_user:
-            pending_to_restart.append(f"Proxy User: {self.old_proxy_user}🠆{proxy_user}")
-
-        if self.old_proxy_password != proxy_password:
-            pending_to_restart.append("Proxy Password")
-
-        if self.old_user_id != user_id:
-            pending_to_restart.append(f"User ID: {self.old_user_id}🠆{user_id}")
-
         """Update build check frequency"""
         check_for_new_builds_automatically = get_check_for_new_builds_automatically()
         new_builds_check_frequency = get_new_builds_check_frequency()
 
-        # Restart scraper if any of the build check settings changed
+        # Reschedule the background checks if any of the build check settings changed
         if (
             self.old_check_for_new_builds_automatically != check_for_new_builds_automatically
             or self.old_new_builds_check_frequency != new_builds_check_frequency
         ):
-            self.parent.draw_library(clear=True)
+            self.parent.apply_check_settings()
 
         """Update high DPI scaling"""
         enable_high_dpi_scaling = get_enable_high_dpi_scaling()
@@ -62,7 +62,6 @@ class BlenderLauncherUpdater(BaseWindow):
         self.queue.start()
 
         if release_tag is None:
-            assert self.manager is not None
             release_tag = get_release_tag(self.cm)
             if release_tag is None:
                 # This is ok because release_tag can only be None when
@@ -70,15 +69,15 @@ class BlenderLauncherUpdater(BaseWindow):
                 raise RuntimeError("Failed to automatically determine the latest release tag!")
 
         self.release_tag = release_tag
+        self.failed = False
 
         self.show()
         self.download()
 
     def get_link(self, response: GitHubRelease | None = None) -> str:
-        assert self.manager is not None
         if response is None:
             api_req = api_link.format(self.release_tag)
-            d = self.manager.request("GET", api_req, headers=self._headers)
+            d = self.cm.raw_request("GET", api_req, headers=self._headers)
             assert d.data is not None
             response = json.loads(d.data)
         assert response is not None
@@ -111,17 +110,24 @@ class BlenderLauncherUpdater(BaseWindow):
         # This function should not use proxy for downloading new builds!
         link = self.get_link() if self.platform == "Linux" else release_link.format(self.release_tag, self.platform)
 
-        assert self.manager is not None
         self.ProgressBar.set_title("Downloading")
-        a = DownloadTask(self.manager, link)
+        a = DownloadTask(self.cm, link)
         a.progress.connect(self.ProgressBar.set_progress)
+        a.rate.connect(self.ProgressBar.set_rate)
         a.finished.connect(self.extract)
+        a.failure.connect(self.download_failed)
         self.queue.append(a)
 
+    def download_failed(self):
+        self.failed = True
+        self.HeaderLabel.setText("Failed to download the update, see debug logs for more.")
+        self.ProgressBar.set_title("Download failed")
+
     def extract(self, source):
         self.ProgressBar.set_title("Extracting")
         a = ExtractTask(source, self.cwd)
         a.progress.connect(self.ProgressBar.set_progress)
+        a.rate.connect(self.ProgressBar.set_rate)
         a.finished.connect(self.finish)
         self.queue.append(a)
 
@@ -138,5 +144,9 @@ class BlenderLauncherUpdater(BaseWindow):
 
     def closeEvent(self, event):
         self.queue.fullstop()
+        if self.failed:
+            # Nothing is left to wait for
+            self.app.quit()
+            return
         event.ignore()
         self.showMinimized()